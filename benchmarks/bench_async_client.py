@@ -0,0 +1,103 @@
+"""
+Load benchmark: blocking `requests` calls vs. the pooled async TripXplo client.
+
+Starts a local TripXplo stub, then serves ``GET /packages`` from a single
+uvicorn worker twice — once with the old synchronous client called from an
+``async def`` route, once with ``main:app`` — and reports requests/second and
+latency percentiles at a fixed client concurrency.
+
+    python -m benchmarks.bench_async_client --concurrency 50 --duration 5
+"""
+import argparse
+import asyncio
+import logging
+import os
+import statistics
+import time
+
+STUB_PORT = 8765
+BEFORE_PORT = 8766
+AFTER_PORT = 8767
+
+os.environ.setdefault("TRIPXPLO_API_BASE", f"http://127.0.0.1:{STUB_PORT}")
+os.environ.setdefault("TRIPXPLO_EMAIL", "bench@example.com")
+os.environ.setdefault("TRIPXPLO_PASSWORD", "bench")
+os.environ.setdefault("OPENROUTER_API_KEY", "bench")
+
+import httpx  # noqa: E402
+from fastapi import FastAPI  # noqa: E402
+
+from benchmarks.stub_tripxplo import app as stub_app, serve_in_thread  # noqa: E402
+
+
+def build_blocking_app() -> FastAPI:
+    """The pre-change route: a blocking `requests` call inside `async def`."""
+    from src.services import tripxplo_api
+
+    app = FastAPI()
+
+    @app.get("/packages")
+    async def fetch_packages():
+        return {"packages": tripxplo_api.get_packages()}
+
+    return app
+
+
+async def drive(url: str, concurrency: int, duration: float) -> dict:
+    latencies: list[float] = []
+    errors = 0
+    deadline = time.perf_counter() + duration
+
+    async with httpx.AsyncClient(limits=httpx.Limits(max_connections=concurrency)) as client:
+        async def worker():
+            nonlocal errors
+            while time.perf_counter() < deadline:
+                start = time.perf_counter()
+                try:
+                    res = await client.get(url, timeout=30)
+                    res.raise_for_status()
+                    latencies.append(time.perf_counter() - start)
+                except httpx.HTTPError:
+                    errors += 1
+
+        started = time.perf_counter()
+        await asyncio.gather(*(worker() for _ in range(concurrency)))
+        elapsed = time.perf_counter() - started
+
+    latencies.sort()
+    quantiles = statistics.quantiles(latencies, n=100) if len(latencies) > 1 else [0.0] * 99
+    return {
+        "requests": len(latencies),
+        "errors": errors,
+        "rps": len(latencies) / elapsed,
+        "p50_ms": quantiles[49] * 1000,
+        "p99_ms": quantiles[98] * 1000,
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--concurrency", type=int, default=50)
+    parser.add_argument("--duration", type=float, default=5.0)
+    args = parser.parse_args()
+
+    from main import app as async_app
+
+    # Per-request INFO lines would dominate the measurement.
+    logging.disable(logging.INFO)
+
+    serve_in_thread(stub_app, STUB_PORT)
+    serve_in_thread(build_blocking_app(), BEFORE_PORT)
+    serve_in_thread(async_app, AFTER_PORT)
+
+    print(f"concurrency={args.concurrency} duration={args.duration}s")
+    for label, port in (("before (requests)", BEFORE_PORT), ("after (httpx pool)", AFTER_PORT)):
+        result = asyncio.run(drive(f"http://127.0.0.1:{port}/packages", args.concurrency, args.duration))
+        print(
+            f"{label:<20} {result['rps']:8.1f} req/s  p50={result['p50_ms']:7.1f}ms  "
+            f"p99={result['p99_ms']:7.1f}ms  ok={result['requests']} errors={result['errors']}"
+        )
+
+
+if __name__ == "__main__":
+    main()
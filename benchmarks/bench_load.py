@@ -0,0 +1,246 @@
+"""
+Offline load test: the full app against local TripXplo and OpenRouter stubs.
+
+Starts the TripXplo stub (benchmarks/stub_tripxplo.py), the OpenAI-compatible
+stub (benchmarks/stub_openai.py) and ``main:app`` on one uvicorn worker, waits
+for the catalog sync, then drives each scenario at rising concurrency:
+
+* ``packages`` — ``GET /packages`` and ``GET /packages/{id}``
+* ``pricing``  — ``GET /packages/{id}/quote`` over a spread of start dates
+* ``query``    — ``POST /query`` with a rotating set of questions
+* ``outage``   — ``/packages/{id}/hotels`` and ``/query`` while every TripXplo
+  call fails (circuit breakers and last-good data)
+
+For every scenario and level it reports RPS, p50/p95/p99, errors and the
+upstream calls it caused. ``--baseline`` compares against a saved report and
+exits non-zero when RPS drops or p95 grows by more than ``--tolerance``.
+
+    python -m benchmarks.bench_load --levels 1,8,32 --duration 3
+    python -m benchmarks.bench_load --write-baseline benchmarks/baseline.json
+    python -m benchmarks.bench_load --baseline benchmarks/baseline.json --tolerance 0.3
+"""
+import argparse
+import asyncio
+import json
+import logging
+import os
+import random
+import statistics
+import sys
+import time
+from datetime import date, timedelta
+from typing import Awaitable, Callable, Dict, List
+
+STUB_PORT = 8775
+LLM_PORT = 8776
+APP_PORT = 8777
+CATALOG_SIZE = 200
+
+os.environ.setdefault("TRIPXPLO_API_BASE", f"http://127.0.0.1:{STUB_PORT}")
+os.environ.setdefault("OPENROUTER_API_BASE", f"http://127.0.0.1:{LLM_PORT}")
+os.environ.setdefault("TRIPXPLO_EMAIL", "bench@example.com")
+os.environ.setdefault("TRIPXPLO_PASSWORD", "bench")
+os.environ.setdefault("OPENROUTER_API_KEY", "bench")
+os.environ.setdefault("STUB_CATALOG_SIZE", str(CATALOG_SIZE))
+os.environ.setdefault("CATALOG_PAGE_SIZE", "50")
+# Every simulated user shares one address; keep the concurrency limits, drop the per-client bucket
+os.environ.setdefault("ADMISSION_RATE", "0")
+
+import httpx  # noqa: E402
+
+from benchmarks import stub_openai, stub_tripxplo  # noqa: E402
+from benchmarks.stub_tripxplo import serve_in_thread  # noqa: E402
+
+APP = f"http://127.0.0.1:{APP_PORT}"
+QUESTIONS = [
+    "list Goa packages under 30000",
+    "suggest a honeymoon trip to Kerala",
+    "show Manali packages for 4 nights",
+    "hotels in Andaman",
+    "what activities are there in Rajasthan",
+    "best family holiday in Ooty",
+    "package details PKG00012",
+    "vehicles for Darjeeling",
+]
+
+Call = Callable[[httpx.AsyncClient, random.Random], Awaitable[httpx.Response]]
+
+
+def _package_id(rng: random.Random) -> str:
+    return f"PKG{rng.randrange(CATALOG_SIZE):05d}"
+
+
+async def _packages(client: httpx.AsyncClient, rng: random.Random) -> httpx.Response:
+    if rng.random() < 0.3:
+        return await client.get("/packages")
+    return await client.get(f"/packages/{_package_id(rng)}")
+
+
+async def _pricing(client: httpx.AsyncClient, rng: random.Random) -> httpx.Response:
+    start = date.today() + timedelta(days=rng.randrange(1, 30))
+    return await client.get(
+        f"/packages/{_package_id(rng)}/quote", params={"startDate": start.isoformat(), "noAdult": 2}
+    )
+
+
+async def _query(client: httpx.AsyncClient, rng: random.Random) -> httpx.Response:
+    return await client.post("/query", json={"question": rng.choice(QUESTIONS)})
+
+
+async def _outage(client: httpx.AsyncClient, rng: random.Random) -> httpx.Response:
+    if rng.random() < 0.5:
+        return await client.get(f"/packages/PKG{rng.randrange(20):05d}/hotels")
+    return await _query(client, rng)
+
+
+SCENARIOS: Dict[str, Call] = {"packages": _packages, "pricing": _pricing, "query": _query, "outage": _outage}
+
+
+async def drive(call: Call, concurrency: int, duration: float, seed: int = 7) -> dict:
+    latencies: List[float] = []
+    errors = 0
+    deadline = time.perf_counter() + duration
+    limits = httpx.Limits(max_connections=concurrency)
+
+    async with httpx.AsyncClient(base_url=APP, limits=limits, timeout=60) as client:
+        async def worker(n: int):
+            nonlocal errors
+            rng = random.Random(seed * 1000 + n)
+            while time.perf_counter() < deadline:
+                start = time.perf_counter()
+                try:
+                    res = await call(client, rng)
+                    res.raise_for_status()
+                    latencies.append(time.perf_counter() - start)
+                except httpx.HTTPError:
+                    errors += 1
+
+        started = time.perf_counter()
+        await asyncio.gather(*(worker(n) for n in range(concurrency)))
+        elapsed = time.perf_counter() - started
+
+    cuts = statistics.quantiles(latencies, n=100) if len(latencies) > 1 else [latencies[0] if latencies else 0.0] * 99
+    return {
+        "requests": len(latencies),
+        "errors": errors,
+        "rps": round(len(latencies) / elapsed, 1),
+        "p50_ms": round(cuts[49] * 1000, 2),
+        "p95_ms": round(cuts[94] * 1000, 2),
+        "p99_ms": round(cuts[98] * 1000, 2),
+    }
+
+
+def _calls() -> Dict[str, int]:
+    return {
+        "tripxplo": sum(v for k, v in stub_tripxplo.calls.items() if k != "login"),
+        "llm": stub_openai.calls["completions"] + stub_openai.calls["streams"],
+    }
+
+
+def run_scenario(name: str, levels: List[int], duration: float) -> Dict[str, dict]:
+    from src.services.cache import catalog_cache
+
+    results = {}
+    saved = dict(catalog_cache.ttls), catalog_cache.stale_ttl
+    if name == "outage":
+        # Hotels expire at once, so every request goes upstream; warm them,
+        # then take TripXplo down and serve the last good copies.
+        catalog_cache.ttls["hotels"], catalog_cache.stale_ttl = 0.0, 0.0
+        for n in range(20):
+            httpx.get(f"{APP}/packages/PKG{n:05d}/hotels")
+        stub_tripxplo.config["error_rate"] = 1.0
+    try:
+        for level in levels:
+            before = _calls()
+            result = asyncio.run(drive(SCENARIOS[name], level, duration))
+            after = _calls()
+            result["upstream_calls"] = {k: after[k] - before[k] for k in after}
+            results[str(level)] = result
+            print(
+                f"{name:<9} c={level:<4} {result['rps']:8.1f} req/s  p50={result['p50_ms']:7.1f}ms  "
+                f"p95={result['p95_ms']:7.1f}ms  p99={result['p99_ms']:7.1f}ms  errors={result['errors']:<4} "
+                f"tripxplo={result['upstream_calls']['tripxplo']:<5} llm={result['upstream_calls']['llm']}"
+            )
+    finally:
+        stub_tripxplo.config["error_rate"] = 0.0
+        catalog_cache.ttls, catalog_cache.stale_ttl = saved
+    return results
+
+
+def compare(report: dict, baseline: dict, tolerance: float) -> List[str]:
+    """Regressions of ``report`` against ``baseline``: lower RPS or higher p95 beyond ``tolerance``."""
+    regressions = []
+    for scenario, levels in baseline.get("scenarios", {}).items():
+        for level, base in levels.items():
+            current = report["scenarios"].get(scenario, {}).get(level)
+            if current is None:
+                continue
+            if current["rps"] < base["rps"] * (1 - tolerance):
+                regressions.append(f"{scenario} c={level}: {current['rps']} req/s vs baseline {base['rps']}")
+            if current["p95_ms"] > base["p95_ms"] * (1 + tolerance):
+                regressions.append(f"{scenario} c={level}: p95 {current['p95_ms']}ms vs baseline {base['p95_ms']}ms")
+    return regressions
+
+
+def wait_for_catalog(timeout: float = 30.0) -> None:
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        if httpx.get(f"{APP}/catalog/stats").json().get("ready"):
+            return
+        time.sleep(0.1)
+    raise RuntimeError("Catalog sync did not finish; is the TripXplo stub reachable?")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--scenarios", default=",".join(SCENARIOS))
+    parser.add_argument("--levels", default="1,8,32", help="comma-separated client concurrency levels")
+    parser.add_argument("--duration", type=float, default=3.0, help="seconds per level")
+    parser.add_argument("--stub-latency", type=float, default=0.05)
+    parser.add_argument("--llm-latency", type=float, default=0.3)
+    parser.add_argument("--baseline", help="compare against this report and exit 1 on regression")
+    parser.add_argument("--tolerance", type=float, default=0.25)
+    parser.add_argument("--write-baseline", help="save this run's report to the given path")
+    args = parser.parse_args()
+
+    stub_tripxplo.config["latency"] = args.stub_latency
+    stub_openai.config["latency"] = args.llm_latency
+
+    # Per-request INFO lines would dominate the measurement.
+    logging.disable(logging.INFO)
+    from main import app
+
+    serve_in_thread(stub_tripxplo.app, STUB_PORT)
+    serve_in_thread(stub_openai.app, LLM_PORT)
+    serve_in_thread(app, APP_PORT)
+    wait_for_catalog()
+
+    levels = [int(level) for level in args.levels.split(",")]
+    report = {
+        "config": {"levels": levels, "duration": args.duration, "stub_latency": args.stub_latency,
+                   "llm_latency": args.llm_latency, "catalog_size": CATALOG_SIZE},
+        "scenarios": {},
+    }
+    for name in args.scenarios.split(","):
+        report["scenarios"][name] = run_scenario(name, levels, args.duration)
+    report["breakers"] = httpx.get(f"{APP}/upstream/stats").json()
+
+    if args.write_baseline:
+        with open(args.write_baseline, "w") as f:
+            json.dump(report, f, indent=2)
+            f.write("\n")
+        print(f"Wrote baseline to {args.write_baseline}")
+
+    if args.baseline:
+        with open(args.baseline) as f:
+            baseline = json.load(f)
+        regressions = compare(report, baseline, args.tolerance)
+        for line in regressions:
+            print(f"REGRESSION {line}")
+        if regressions:
+            sys.exit(1)
+        print(f"No regressions against {args.baseline} (tolerance {args.tolerance:.0%})")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,93 @@
+"""
+Micro-benchmark: compiled QueryMatcher vs. the original substring scans.
+
+Generates a fixed set of sample queries and reports queries/second for the
+legacy ``extract_search_terms`` + ``detect_intent`` pair and for one
+``QueryMatcher.match`` call that extracts destinations, intent, themes,
+duration, party size and budget together.
+
+    python -m benchmarks.bench_matcher --queries 5000
+"""
+import argparse
+import os
+import random
+import time
+
+os.environ.setdefault("TRIPXPLO_EMAIL", "bench@example.com")
+os.environ.setdefault("TRIPXPLO_PASSWORD", "bench")
+os.environ.setdefault("OPENROUTER_API_KEY", "bench")
+
+from src.core.matcher import QueryMatcher  # noqa: E402
+
+TEMPLATES = [
+    "show me {dest} packages under {price}k",
+    "hotels in {dest} for {n} adults",
+    "any cab or taxi available in {dest}?",
+    "things to do in {dest} for a family of {n}",
+    "{n} nights {dest} honeymoon trip",
+    "cheap {dest} tour {n} days",
+    "I want to plan a relaxing holiday somewhere with beaches and good food",
+    "what are the best resorts near {dest} for a couple",
+]
+DESTS = ["goa", "kerala", "manali", "Bali", "kodai", "ooty", "jaipur", "port blair", "keral", "shimla", "darjeling"]
+
+
+def legacy_extract_search_terms(query: str) -> str:
+    known_destinations = [
+        "goa", "kerala", "manali", "bali", "kodaikanal", "ooty",
+        "rajasthan", "andaman", "himachal", "shimla", "darjeeling"
+    ]
+    query_lower = query.lower()
+    found_terms = [dest for dest in known_destinations if dest in query_lower]
+    return " ".join(found_terms) if found_terms else query
+
+
+def legacy_detect_intent(query: str) -> str:
+    query_lower = query.lower()
+    if any(keyword in query_lower for keyword in ["hotel", "stay", "accommodation", "resort"]):
+        return "hotel"
+    if any(keyword in query_lower for keyword in ["vehicle", "car", "transport", "taxi"]):
+        return "vehicle"
+    if any(keyword in query_lower for keyword in ["activity", "tour", "things to do", "adventure", "experience"]):
+        return "activity"
+    return "package"
+
+
+def sample_queries(count: int, seed: int = 7) -> list:
+    rng = random.Random(seed)
+    return [
+        rng.choice(TEMPLATES).format(dest=rng.choice(DESTS), price=rng.randint(10, 80), n=rng.randint(2, 6))
+        for _ in range(count)
+    ]
+
+
+def measure(fn, queries) -> float:
+    start = time.perf_counter()
+    for q in queries:
+        fn(q)
+    return len(queries) / (time.perf_counter() - start)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--queries", type=int, default=5000)
+    args = parser.parse_args()
+
+    queries = sample_queries(args.queries)
+    start = time.perf_counter()
+    matcher = QueryMatcher()
+    build_ms = (time.perf_counter() - start) * 1000
+
+    legacy = measure(lambda q: (legacy_extract_search_terms(q), legacy_detect_intent(q)), queries)
+    compiled = measure(matcher.match, queries)
+    found_legacy = sum(1 for q in queries if legacy_extract_search_terms(q) != q)
+    found_compiled = sum(1 for q in queries if matcher.match(q).destinations)
+
+    print(f"queries={len(queries)} matcher build={build_ms:.1f}ms")
+    print(f"legacy substring scans  {legacy:10.0f} q/s  destinations found in {found_legacy} queries")
+    print(f"compiled QueryMatcher   {compiled:10.0f} q/s  destinations found in {found_compiled} queries "
+          f"(plus intent, themes, duration, party size, budget)")
+
+
+if __name__ == "__main__":
+    main()
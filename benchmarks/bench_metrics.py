@@ -0,0 +1,83 @@
+"""
+Micro-benchmark: cost of the instrumentation on the request path.
+
+Reports nanoseconds per call for a histogram observation, a timed ``span``
+with tracing off and on (OpenTelemetry API only, no exporter), and the
+per-request overhead of ``MetricsMiddleware`` around a trivial ASGI app.
+Compare the numbers with a TripXplo round trip (tens of ms) or an LLM call
+(seconds): the instrumentation should stay in the low microseconds.
+
+    python -m benchmarks.bench_metrics --calls 200000
+"""
+import argparse
+import asyncio
+import os
+import time
+
+os.environ.setdefault("TRIPXPLO_EMAIL", "bench@example.com")
+os.environ.setdefault("TRIPXPLO_PASSWORD", "bench")
+os.environ.setdefault("OPENROUTER_API_KEY", "bench")
+
+from src.config import settings  # noqa: E402
+from src.utils import metrics  # noqa: E402
+
+
+def per_call_ns(fn, calls: int) -> float:
+    start = time.perf_counter()
+    for _ in range(calls):
+        fn()
+    return (time.perf_counter() - start) / calls * 1e9
+
+
+def timed_span():
+    with metrics.span("bench", metrics.NODE_SECONDS, ("bench",), metrics.NODE_ERRORS):
+        pass
+
+
+async def app(scope, receive, send):
+    await send({"type": "http.response.start", "status": 200, "headers": []})
+    await send({"type": "http.response.body", "body": b"ok"})
+
+
+async def asgi_ns(handler, calls: int) -> float:
+    scope = {"type": "http", "method": "GET", "path": "/", "headers": []}
+
+    async def receive():
+        return {"type": "http.request", "body": b""}
+
+    async def send(message):
+        pass
+
+    start = time.perf_counter()
+    for _ in range(calls):
+        await handler(dict(scope), receive, send)
+    return (time.perf_counter() - start) / calls * 1e9
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--calls", type=int, default=200000)
+    args = parser.parse_args()
+
+    histogram = metrics.registry.histogram("bench_seconds", "Benchmark.", ("op",))
+    baseline = per_call_ns(lambda: None, args.calls)
+    observe = per_call_ns(lambda: histogram.observe(0.042, "op"), args.calls)
+    settings.TRACING_ENABLED = False
+    span_off = per_call_ns(timed_span, args.calls)
+    settings.TRACING_ENABLED = True
+    span_on = per_call_ns(timed_span, args.calls) if metrics.trace is not None else float("nan")
+    settings.TRACING_ENABLED = False
+
+    bare = asyncio.run(asgi_ns(app, args.calls // 4))
+    wrapped = asyncio.run(asgi_ns(metrics.MetricsMiddleware(app), args.calls // 4))
+
+    print(f"empty call                 {baseline:8.0f} ns")
+    print(f"histogram.observe          {observe:8.0f} ns")
+    print(f"span (tracing off)         {span_off:8.0f} ns")
+    print(f"span (OTel API, no export) {span_on:8.0f} ns")
+    print(f"middleware per request     {wrapped - bare:8.0f} ns  (bare app {bare:.0f} ns)")
+    print(f"render /metrics            {per_call_ns(metrics.registry.render, 1000) / 1000:8.1f} µs")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,87 @@
+"""
+Offline relevance and latency benchmark for package retrieval.
+
+Scores a fixed query set against a synthetic catalog whose relevant packages
+are known, comparing the old behaviour (first five packages of the listing)
+with BM25 and BM25 + hashed-trigram embeddings.
+
+    python -m benchmarks.bench_retrieval --catalog 500
+"""
+import argparse
+import os
+import statistics
+import time
+
+os.environ.setdefault("TRIPXPLO_EMAIL", "bench@example.com")
+os.environ.setdefault("TRIPXPLO_PASSWORD", "bench")
+os.environ.setdefault("OPENROUTER_API_KEY", "bench")
+
+from benchmarks.catalog_fixture import make_catalog  # noqa: E402
+from src.core.matcher import QueryMatcher  # noqa: E402
+from src.core.retrieval import HashingEmbedder, Retriever, np  # noqa: E402
+from src.services.catalog import make_record  # noqa: E402
+
+# (query, predicate over a package document that marks it relevant)
+QUERIES = [
+    ("goa honeymoon packages", lambda p: p["destinationName"] == "Goa" and p["theme"] == "honeymoon"),
+    ("kerala houseboat family trip", lambda p: p["destinationName"] == "Kerala" and p["theme"] == "family"),
+    ("adventure in manali with paragliding", lambda p: p["destinationName"] == "Manali" and p["theme"] == "adventure"),
+    ("shimla packages under 20000", lambda p: p["destinationName"] == "Shimla" and p["startFrom"] <= 20000),
+    ("andaman scuba diving 4 nights", lambda p: p["destinationName"] == "Andaman" and p["noOfNight"] == 4),
+    ("luxury rajasthan desert safari", lambda p: p["destinationName"] == "Rajasthan" and p["theme"] == "luxury"),
+    ("budget trip to ooty", lambda p: p["destinationName"] == "Ooty" and p["theme"] == "budget"),
+    ("darjeeling tea estate holiday 5 days", lambda p: p["destinationName"] == "Darjeeling" and p["noOfDays"] == 5),
+    ("romantic kodai getaway", lambda p: p["destinationName"] == "Kodaikanal" and p["theme"] == "honeymoon"),
+    ("bali for a couple under 40k", lambda p: p["destinationName"] == "Bali" and p["startFrom"] <= 40000),
+    ("keral backwaters", lambda p: p["destinationName"] == "Kerala"),
+    ("beach holiday with kids", lambda p: p["theme"] == "family"
+        and p["destinationName"] in ("Goa", "Andaman", "Kerala", "Bali")),
+]
+
+
+def evaluate(rank, queries, k: int):
+    precisions, reciprocal_ranks, latencies = [], [], []
+    for query, relevant in queries:
+        start = time.perf_counter()
+        results = rank(query)
+        latencies.append((time.perf_counter() - start) * 1000)
+        flags = [relevant(doc) for doc in results[:k]]
+        precisions.append(sum(flags) / k)
+        reciprocal_ranks.append(next((1 / (i + 1) for i, hit in enumerate(flags) if hit), 0.0))
+    return statistics.mean(precisions), statistics.mean(reciprocal_ranks), latencies
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--catalog", type=int, default=500)
+    parser.add_argument("--k", type=int, default=5)
+    args = parser.parse_args()
+
+    docs = make_catalog(args.catalog)
+    records = [make_record(doc) for doc in docs]
+    matcher = QueryMatcher(destinations=[d["destinationName"] for d in docs])
+
+    systems = {"first-k (before)": lambda q: docs[:args.k]}
+    start = time.perf_counter()
+    bm25 = Retriever(records)
+    build_bm25 = (time.perf_counter() - start) * 1000
+    systems["bm25"] = lambda q: [r.summary for r, _ in bm25.search(q, matcher.match(q), k=args.k)]
+    builds = {"bm25": build_bm25}
+    if np is not None:
+        start = time.perf_counter()
+        hybrid = Retriever(records, embedder=HashingEmbedder())
+        builds["bm25+embeddings"] = (time.perf_counter() - start) * 1000
+        systems["bm25+embeddings"] = lambda q: [r.summary for r, _ in hybrid.search(q, matcher.match(q), k=args.k)]
+
+    print(f"catalog={len(docs)} queries={len(QUERIES)} k={args.k}")
+    for name, rank in systems.items():
+        precision, mrr, latencies = evaluate(rank, QUERIES, args.k)
+        build = f"build={builds[name]:.0f}ms" if name in builds else ""
+        print(
+            f"{name:<18} P@{args.k}={precision:.2f}  MRR={mrr:.2f}  "
+            f"p50={statistics.median(latencies):.2f}ms  max={max(latencies):.2f}ms  {build}"
+        )
+
+
+if __name__ == "__main__":
+    main()
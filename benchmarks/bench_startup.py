@@ -0,0 +1,104 @@
+"""
+Startup benchmark: import time and time to first request.
+
+* import — ``import main`` in a fresh interpreter, median of ``--runs``
+* cold   — a uvicorn worker with ``WARMUP_ENABLED=False``: time until it
+  accepts connections, then the latency of the first ``/query``, which pays
+  for the token login, catalog fetch, graph build and SDK imports
+* warm   — the same with the startup warm-up: time until ``/ready`` passes,
+  then the latency of the first ``/query``
+
+TripXplo and OpenRouter are the local stubs from bench_load.
+
+    python -m benchmarks.bench_startup --runs 5
+"""
+import argparse
+import os
+import statistics
+import subprocess
+import sys
+import time
+
+import httpx
+
+from benchmarks import stub_openai, stub_tripxplo
+from benchmarks.stub_tripxplo import serve_in_thread
+
+STUB_PORT = 8785
+LLM_PORT = 8786
+APP_PORT = 8787
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+ENV = {
+    **os.environ,
+    "TRIPXPLO_API_BASE": f"http://127.0.0.1:{STUB_PORT}",
+    "OPENROUTER_API_BASE": f"http://127.0.0.1:{LLM_PORT}",
+    "TRIPXPLO_EMAIL": "bench@example.com",
+    "TRIPXPLO_PASSWORD": "bench",
+    "OPENROUTER_API_KEY": "bench",
+    "LOG_LEVEL": "WARNING",
+}
+
+
+def import_time(runs: int) -> float:
+    code = "import time; t = time.perf_counter(); import main; print(time.perf_counter() - t)"
+    samples = []
+    for _ in range(runs):
+        out = subprocess.run([sys.executable, "-c", code], cwd=ROOT, env=ENV, capture_output=True, text=True, check=True)
+        samples.append(float(out.stdout.strip().splitlines()[-1]))
+    return statistics.median(samples)
+
+
+def _wait(url: str, deadline: float) -> None:
+    while time.perf_counter() < deadline:
+        try:
+            if httpx.get(url, timeout=1).status_code == 200:
+                return
+        except httpx.HTTPError:
+            pass
+        time.sleep(0.01)
+    raise RuntimeError(f"{url} did not become available")
+
+
+def first_request(warmup: bool) -> dict:
+    env = {**ENV, "WARMUP_ENABLED": str(warmup)}
+    started = time.perf_counter()
+    proc = subprocess.Popen(
+        [sys.executable, "-m", "uvicorn", "main:app", "--port", str(APP_PORT), "--log-level", "warning"],
+        cwd=ROOT, env=env, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL,
+    )
+    try:
+        _wait(f"http://127.0.0.1:{APP_PORT}/health", started + 60)
+        listening = time.perf_counter() - started
+        _wait(f"http://127.0.0.1:{APP_PORT}/ready", started + 60)
+        ready = time.perf_counter() - started
+        t = time.perf_counter()
+        httpx.post(f"http://127.0.0.1:{APP_PORT}/query", json={"question": "suggest a Goa beach trip"}, timeout=60)
+        first = time.perf_counter() - t
+        return {"listening_s": listening, "ready_s": ready, "first_query_s": first, "total_s": ready + first}
+    finally:
+        proc.terminate()
+        proc.wait()
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--runs", type=int, default=5)
+    args = parser.parse_args()
+
+    stub_tripxplo.config["latency"] = 0.05
+    stub_openai.config["latency"] = 0.3
+    serve_in_thread(stub_tripxplo.app, STUB_PORT)
+    serve_in_thread(stub_openai.app, LLM_PORT)
+
+    print(f"import main: {import_time(args.runs) * 1000:7.1f}ms (median of {args.runs})")
+    for label, warm in (("cold (no warm-up)", False), ("warm-up", True)):
+        result = first_request(warm)
+        print(
+            f"{label:<18} listening={result['listening_s']:.2f}s  ready={result['ready_s']:.2f}s  "
+            f"first /query={result['first_query_s'] * 1000:.0f}ms  start-to-first-answer={result['total_s']:.2f}s"
+        )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,54 @@
+"""
+Deterministic synthetic TripXplo catalog shared by the benchmarks.
+
+Each package has a destination, a theme, a duration and a price, plus a
+description and itinerary written from those attributes, so queries have a
+known set of relevant packages.
+"""
+import random
+
+DESTINATIONS = {
+    "Goa": ["Baga beach", "Fort Aguada", "Dudhsagar falls", "Anjuna flea market"],
+    "Kerala": ["Munnar tea gardens", "Alleppey houseboat", "Periyar wildlife sanctuary", "Kovalam beach"],
+    "Manali": ["Solang valley", "Rohtang pass", "Hadimba temple", "Old Manali cafes"],
+    "Shimla": ["Mall Road", "Kufri snow point", "Jakhu temple", "toy train ride"],
+    "Andaman": ["Radhanagar beach", "Cellular jail", "Havelock scuba diving", "Neil island"],
+    "Rajasthan": ["Amber fort", "Jaisalmer desert safari", "Udaipur lake palace", "Jodhpur blue city"],
+    "Ooty": ["botanical garden", "Ooty lake boating", "Nilgiri mountain railway", "Doddabetta peak"],
+    "Darjeeling": ["Tiger hill sunrise", "tea estate walk", "Himalayan railway", "Batasia loop"],
+    "Kodaikanal": ["Kodai lake", "Coaker's walk", "Pillar rocks", "Bryant park"],
+    "Bali": ["Ubud rice terraces", "Tanah Lot temple", "Kuta beach", "Mount Batur trek"],
+}
+THEMES = {
+    "honeymoon": "a romantic honeymoon escape for couples with candlelight dinners",
+    "family": "a relaxed family holiday with kid friendly sightseeing",
+    "adventure": "an adventure trip with trekking, rafting and paragliding",
+    "luxury": "a luxury getaway with premium five star resorts",
+    "budget": "an affordable budget tour with comfortable stays",
+}
+
+
+def make_catalog(size: int = 500, seed: int = 42) -> list:
+    rng = random.Random(seed)
+    packages = []
+    for i in range(size):
+        destination = rng.choice(list(DESTINATIONS))
+        theme = rng.choice(list(THEMES))
+        nights = rng.randint(2, 7)
+        sights = rng.sample(DESTINATIONS[destination], 3)
+        packages.append({
+            "packageId": f"PKG{i:05d}",
+            "packageName": f"{destination} {theme.title()} {nights}N/{nights + 1}D",
+            "destinationName": destination,
+            "theme": theme,
+            "noOfDays": nights + 1,
+            "noOfNight": nights,
+            "startFrom": rng.randrange(8000, 90000, 500),
+            "description": f"{destination}: {THEMES[theme]}.",
+            "itinerary": [
+                {"day": d + 1, "title": f"Day {d + 1}", "description": f"Visit {sights[d % 3]}"}
+                for d in range(nights + 1)
+            ],
+            "updatedAt": "2026-01-01T00:00:00Z",
+        })
+    return packages
@@ -0,0 +1,85 @@
+"""
+Local stand-in for the OpenRouter (OpenAI-compatible) chat completions API.
+
+``POST /chat/completions`` waits ``STUB_LLM_LATENCY`` seconds before the
+first token, then produces ``STUB_LLM_TOKENS`` words at
+``STUB_LLM_TOKENS_PER_SEC``, streamed as SSE chunks when ``stream`` is set.
+A ``STUB_LLM_ERROR_RATE`` fraction of calls fails with a 503. Point the app
+at it with ``OPENROUTER_API_BASE=http://127.0.0.1:<port>``.
+"""
+import asyncio
+import json
+import os
+import random
+import time
+
+from fastapi import FastAPI, Request
+from fastapi.responses import JSONResponse, StreamingResponse
+
+config = {
+    "latency": float(os.getenv("STUB_LLM_LATENCY", "0.3")),
+    "tokens": int(os.getenv("STUB_LLM_TOKENS", "60")),
+    "tokens_per_sec": float(os.getenv("STUB_LLM_TOKENS_PER_SEC", "400")),
+    "error_rate": float(os.getenv("STUB_LLM_ERROR_RATE", "0")),
+}
+
+app = FastAPI()
+calls = {"completions": 0, "streams": 0, "errors": 0, "prompt_chars": 0}
+
+
+def _words(n: int) -> list:
+    return [f"word{i} " for i in range(n)]
+
+
+def _completion(model: str, text: str, prompt_tokens: int) -> dict:
+    return {
+        "id": "stub-completion",
+        "object": "chat.completion",
+        "created": int(time.time()),
+        "model": model,
+        "choices": [{"index": 0, "message": {"role": "assistant", "content": text}, "finish_reason": "stop"}],
+        "usage": {"prompt_tokens": prompt_tokens, "completion_tokens": config["tokens"],
+                  "total_tokens": prompt_tokens + config["tokens"]},
+    }
+
+
+def _chunk(model: str, text: str, finish: bool = False) -> str:
+    payload = {
+        "id": "stub-completion",
+        "object": "chat.completion.chunk",
+        "created": int(time.time()),
+        "model": model,
+        "choices": [{"index": 0, "delta": {} if finish else {"content": text},
+                     "finish_reason": "stop" if finish else None}],
+    }
+    return f"data: {json.dumps(payload)}\n\n"
+
+
+@app.post("/chat/completions")
+async def chat_completions(request: Request):
+    body = await request.json()
+    model = body.get("model", "stub")
+    prompt = "".join(str(m.get("content", "")) for m in body.get("messages", []))
+    calls["prompt_chars"] += len(prompt)
+    await asyncio.sleep(config["latency"])
+    if config["error_rate"] and random.random() < config["error_rate"]:
+        calls["errors"] += 1
+        return JSONResponse({"error": {"message": "stub overloaded"}}, status_code=503)
+    words = _words(config["tokens"])
+    per_token = 1.0 / config["tokens_per_sec"] if config["tokens_per_sec"] > 0 else 0.0
+
+    if not body.get("stream"):
+        calls["completions"] += 1
+        await asyncio.sleep(per_token * len(words))
+        return _completion(model, "".join(words), len(prompt) // 4)
+
+    calls["streams"] += 1
+
+    async def events():
+        for word in words:
+            await asyncio.sleep(per_token)
+            yield _chunk(model, word)
+        yield _chunk(model, "", finish=True)
+        yield "data: [DONE]\n\n"
+
+    return StreamingResponse(events(), media_type="text/event-stream")
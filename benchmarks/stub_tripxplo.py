@@ -0,0 +1,117 @@
+"""
+Local stand-in for the TripXplo admin API used by the benchmarks.
+
+Every route sleeps for ``STUB_LATENCY`` seconds (default 50ms, plus up to
+``STUB_JITTER``) to mimic the upstream round trip, fails with a 503 for a
+``STUB_ERROR_RATE`` fraction of calls, then serves a deterministic synthetic
+catalog of ``STUB_CATALOG_SIZE`` packages (benchmarks/catalog_fixture.py).
+The knobs live in ``config`` so a scenario can change them mid-run, e.g. to
+simulate an outage.
+"""
+import asyncio
+import os
+import random
+import threading
+import time
+
+import uvicorn
+from fastapi import FastAPI
+from fastapi.responses import JSONResponse
+
+from benchmarks.catalog_fixture import make_catalog
+
+config = {
+    "latency": float(os.getenv("STUB_LATENCY", "0.05")),
+    "jitter": float(os.getenv("STUB_JITTER", "0")),
+    "error_rate": float(os.getenv("STUB_ERROR_RATE", "0")),
+}
+CATALOG_SIZE = int(os.getenv("STUB_CATALOG_SIZE", "50"))
+
+app = FastAPI()
+calls = {"login": 0, "packages": 0, "details": 0, "pricing": 0, "hotels": 0, "vehicles": 0, "activities": 0}
+errors = {"injected": 0}
+
+_catalog = make_catalog(CATALOG_SIZE)
+_by_id = {p["packageId"]: p for p in _catalog}
+
+
+def set_catalog(size: int) -> None:
+    global _catalog, _by_id
+    _catalog = make_catalog(size)
+    _by_id = {p["packageId"]: p for p in _catalog}
+
+
+def _summary(package: dict) -> dict:
+    return {k: v for k, v in package.items() if k != "itinerary"}
+
+
+async def _upstream(kind: str):
+    """Count the call, wait out the simulated latency; a JSONResponse means an injected failure."""
+    calls[kind] = calls.get(kind, 0) + 1
+    await asyncio.sleep(config["latency"] + random.random() * config["jitter"])
+    if config["error_rate"] and random.random() < config["error_rate"]:
+        errors["injected"] += 1
+        return JSONResponse({"message": "stub outage"}, status_code=503)
+    return None
+
+
+@app.put("/admin/auth/login")
+async def login():
+    calls["login"] += 1
+    await asyncio.sleep(config["latency"])
+    return {"accessToken": "stub-token"}
+
+
+@app.get("/admin/package")
+async def packages(limit: int = 50, offset: int = 0, search: str = ""):
+    failed = await _upstream("packages")
+    if failed is not None:
+        return failed
+    docs = _catalog
+    if search:
+        docs = [p for p in docs if search.lower() in p["packageName"].lower()]
+    return {"result": {"docs": [_summary(p) for p in docs[offset:offset + limit]], "totalDocs": len(docs)}}
+
+
+@app.get("/admin/package/{package_id}")
+async def details(package_id: str):
+    failed = await _upstream("details")
+    if failed is not None:
+        return failed
+    package = _by_id.get(package_id)
+    if package is None:
+        return JSONResponse({"message": "not found"}, status_code=404)
+    return {"result": package}
+
+
+@app.post("/admin/package/{package_id}/pricing")
+async def pricing(package_id: str):
+    failed = await _upstream("pricing")
+    if failed is not None:
+        return failed
+    package = _by_id.get(package_id, {"startFrom": 25000})
+    return {"result": {"totalPrice": package["startFrom"] * 2}}
+
+
+@app.get("/admin/package/{package_id}/{kind}")
+async def available(package_id: str, kind: str):
+    failed = await _upstream(kind)
+    if failed is not None:
+        return failed
+    package = _by_id.get(package_id, {"destinationName": "Goa"})
+    singular = kind.rstrip("s").replace("activitie", "activity")
+    return {"result": [
+        {f"{singular}Id": f"{package_id}-{kind[0].upper()}{i}", "name": f"{package['destinationName']} {singular} {i}",
+         "price": 1500 * (i + 1)}
+        for i in range(3)
+    ]}
+
+
+def serve_in_thread(asgi_app, port: int) -> uvicorn.Server:
+    """Run an ASGI app under uvicorn on a daemon thread and wait until it is up."""
+    server = uvicorn.Server(uvicorn.Config(asgi_app, host="127.0.0.1", port=port, log_level="warning"))
+    thread = threading.Thread(target=server.run, daemon=True)
+    thread.start()
+    while not server.started:
+        time.sleep(0.01)
+    return server
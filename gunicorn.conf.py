@@ -0,0 +1,23 @@
+"""
+Multi-worker serving with a preloaded app:
+
+    gunicorn -c gunicorn.conf.py main:app
+
+The master imports the app and the heavy third-party modules once, then
+forks; workers share those pages copy-on-write and each runs its own
+lifespan (connection pools, warm-up, catalog sync) after the fork.
+"""
+import os
+
+bind = f"0.0.0.0:{os.getenv('PORT', '8000')}"
+workers = int(os.getenv("WEB_CONCURRENCY", "2"))
+worker_class = "uvicorn.workers.UvicornWorker"
+preload_app = True
+timeout = 120
+graceful_timeout = 30
+
+
+def on_starting(server):
+    from src.services.warmup import preload_modules
+
+    preload_modules()
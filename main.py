@@ -1,18 +1,63 @@
-import logging
-from fastapi import FastAPI
+import asyncio
+import json
+import time
+from contextlib import asynccontextmanager
+from fastapi import FastAPI, HTTPException, Request
 from fastapi.middleware.cors import CORSMiddleware
-from pydantic import BaseModel
-from src.core.agent import build_graph
-from src.services.tripxplo_api import (
+from fastapi.responses import JSONResponse, PlainTextResponse, Response, StreamingResponse
+from datetime import date
+from typing import Optional
+from pydantic import BaseModel, Field
+from src.core.agent import answer_question, prepare_answer, stream_deepseek
+from src.core.fast_path import path_stats
+from src.services.cache import StaleDataMiddleware, catalog_cache, mark_stale, stale_sources
+from src.services.admission import AdmissionMiddleware, Overloaded, admission
+from src.services.circuit_breaker import breakers
+from src.services.http_cache import representations
+from src.services.jobs import jobs
+from src.services.catalog import CatalogIndex, catalog, make_record
+from src.services.export import InvalidCursor, decode_cursor, ndjson_chunks, next_cursor, page, parse_fields, project
+from src.services.price_calendar import price_calendars
+from src.services.sessions import sessions
+from src.services.pricing import BatchTooLarge, collect_items, price_batch
+from src.models.schemas import PricingBatchRequest
+from src.services.llm_gateway import llm, llm_flight
+from src.services.response_cache import response_cache
+from src.config import settings
+from src.utils.logger import logging_stats, redact, setup_logger
+from src.utils.metrics import MetricsMiddleware, registry
+from src.services.warmup import warmup
+from src.services.tripxplo_client import (
+    open_client, close_client, upstream_flight,
     get_packages, get_package_details, get_package_pricing,
     get_available_hotels, get_available_vehicles, get_available_activities
 )
 
-logging.basicConfig(level=logging.INFO, format='%(levelname)s: %(message)s')
-logger = logging.getLogger(__name__)
+logger = setup_logger("main")
 
-app = FastAPI()
-graph = build_graph()
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    # Fail here, not on import, so tools and tests can import the app freely
+    settings.require()
+    # One pooled TripXplo connection for the lifetime of the worker
+    await open_client()
+    # Token, catalog, graph and LLM client are readied in the background; /ready waits for them
+    warmup.start()
+    if settings.CATALOG_SYNC_ENABLED and not settings.WARMUP_ENABLED:
+        catalog.start()
+    if settings.PRICE_CALENDAR_ENABLED:
+        price_calendars.start()
+    jobs.start()
+    yield
+    await jobs.stop()
+    await warmup.stop()
+    await price_calendars.stop()
+    await catalog.stop()
+    await llm.aclose()
+    await sessions.aclose()
+    await close_client()
+
+app = FastAPI(lifespan=lifespan)
 
 # CORS settings for dev - open to all origins
 app.add_middleware(
@@ -21,49 +66,312 @@ app.add_middleware(
     allow_credentials=True,
     allow_methods=["*"],
     allow_headers=["*"],
+    expose_headers=["X-Next-Cursor", "X-Data-Stale"],
 )
+# Rate limits and queues /packages and /query; 429/503 with Retry-After under overload
+app.add_middleware(AdmissionMiddleware)
+# Adds X-Data-Stale when a response was served from last-good data
+app.add_middleware(StaleDataMiddleware)
+# Outermost, so its timings and request ID cover everything below it
+app.add_middleware(MetricsMiddleware)
+
+# Existing component counters, read when /metrics is scraped
+registry.collect("catalog_cache_events_total", "Catalog cache lookups by namespace and outcome.", "counter",
+                 ("namespace", "event"),
+                 lambda: {(ns, event): n for ns, counters in catalog_cache.metrics.items() for event, n in counters.items()})
+registry.collect("response_cache_events_total", "LLM response cache hits, misses, stores and invalidations.", "counter",
+                 ("event",), lambda: {(event,): n for event, n in response_cache.counters.items()})
+registry.collect("single_flight_calls_total", "Calls through single-flight groups, and how many were coalesced.", "counter",
+                 ("flight", "event"),
+                 lambda: {(f.name, event): n for f in (upstream_flight, llm_flight) for event, n in f.totals.items()})
+registry.collect("llm_in_flight", "LLM generations holding a concurrency slot.", "gauge", (),
+                 lambda: {(): llm.in_flight})
+registry.collect("llm_queue_depth", "LLM generations waiting for a concurrency slot.", "gauge", (),
+                 lambda: {(): llm.waiting})
+registry.collect("llm_tokens_total", "Tokens reported by the LLM provider.", "counter", ("kind",),
+                 lambda: {("prompt",): llm.counters["prompt_tokens"], ("completion",): llm.counters["completion_tokens"]})
+registry.collect("agent_queries_total", "Answered queries by path (fast, llm, canned).", "counter", ("path",),
+                 lambda: {(path,): n for path, n in path_stats.counts.items()})
+registry.collect("log_records_dropped_total", "Log records dropped by sampling or a full log queue.", "counter",
+                 ("reason",), lambda: {(k[len("dropped_"):],): v for k, v in logging_stats().items() if k.startswith("dropped_")})
+registry.collect("catalog_packages", "Packages in the local catalog index.", "gauge", (),
+                 lambda: {(): len(catalog.index.by_id)})
+registry.collect("catalog_stale", "1 while the catalog index is a last-good snapshot after a failed sync.", "gauge", (),
+                 lambda: {(): int(catalog.stale)})
+registry.collect("circuit_breaker_open", "1 while a TripXplo endpoint's circuit is open or half-open.", "gauge",
+                 ("endpoint",), lambda: {(name,): int(b.state != "closed") for name, b in breakers.breakers.items()})
+registry.collect("circuit_breaker_calls_total", "TripXplo calls seen by each circuit breaker, by outcome.", "counter",
+                 ("endpoint", "outcome"),
+                 lambda: {(name, outcome): n for name, b in breakers.breakers.items() for outcome, n in b.counters.items()})
+registry.collect("admission_in_flight", "Requests holding an admission slot, per pool.", "gauge", ("pool",),
+                 lambda: {(name,): pool.active for name, pool in admission.pools.items()})
+registry.collect("admission_queue_depth", "Requests waiting for an admission slot, per pool.", "gauge", ("pool",),
+                 lambda: {(name,): pool.waiting for name, pool in admission.pools.items()})
+registry.collect("admission_rejected_total", "Requests refused by admission control, by pool and reason.", "counter",
+                 ("pool", "reason"),
+                 lambda: {(name, reason): pool.counters[reason] for name, pool in admission.pools.items()
+                          for reason in ("rate_limited", "queue_full", "timed_out")})
+registry.collect("query_jobs", "Async query jobs queued or running.", "gauge", ("status",),
+                 lambda: {("queued",): jobs.queued, ("running",): jobs.running})
+registry.collect("query_jobs_total", "Async query jobs by outcome.", "counter", ("event",),
+                 lambda: {(event,): n for event, n in jobs.counters.items()})
+registry.collect("http_representations_total", "Catalog responses by outcome (not_modified, compressed, identity).", "counter",
+                 ("outcome",), lambda: {(k,): representations.counters[k] for k in ("not_modified", "compressed", "identity")})
+registry.collect("http_bytes_saved_total", "Response bytes saved by 304s and compression.", "counter", (),
+                 lambda: {(): representations.counters["bytes_saved"]})
 
 class QueryRequest(BaseModel):
     question: str
+    # Omit to start a new conversation; the response carries the ID to send next time.
+    session_id: Optional[str] = Field(None, max_length=64, pattern=r"^[A-Za-z0-9_-]+$")
 
 @app.get("/")
 async def root():
     return {"message": "TripXplo AI API — POST /query with {'question': 'your query'}"}
 
+@app.get("/health")
+async def health():
+    """Liveness: the worker is up and serving."""
+    return {"status": "ok"}
+
+@app.get("/ready")
+async def ready():
+    """Readiness: 503 until the startup warm-up has finished (or timed out)."""
+    return JSONResponse(warmup.stats(), status_code=200 if warmup.ready else 503)
+
+class ClientDisconnected(Exception):
+    pass
+
+async def cancel_on_disconnect(http_request: Request, coro):
+    """
+    Run ``coro`` but cancel it as soon as the client disconnects, so that an
+    abandoned chat does not keep holding an LLM slot. Raises
+    ``ClientDisconnected`` in that case.
+    """
+    async def wait_for_disconnect():
+        while True:
+            message = await http_request.receive()
+            if message["type"] == "http.disconnect":
+                return
+
+    work = asyncio.ensure_future(coro)
+    watcher = asyncio.ensure_future(wait_for_disconnect())
+    try:
+        await asyncio.wait({work, watcher}, return_when=asyncio.FIRST_COMPLETED)
+    except asyncio.CancelledError:
+        work.cancel()
+        watcher.cancel()
+        raise
+    watcher.cancel()
+    if not work.done():
+        work.cancel()
+        # Let the cancellation unwind (closing upstream requests) first.
+        await asyncio.wait({work})
+        raise ClientDisconnected()
+    return work.result()
+
 @app.post("/query")
-async def run_agent(request: QueryRequest):
+async def run_agent(request: QueryRequest, http_request: Request):
     user_input = request.question
-    logger.info(f"Received query: {user_input}")
+    logger.info("Received query: %s", redact(user_input))
 
-    state = {"messages": [{"role": "user", "content": user_input}]}
     logger.info("Invoking AI graph with user input")
-
     try:
-        result = graph.invoke(state)
+        result = await cancel_on_disconnect(http_request, answer_question(user_input, request.session_id))
         logger.info("AI graph invocation successful")
+        return result
+    except Overloaded as e:
+        # Prepared, but the LLM queue is full: shed the generation
+        return e.response()
+    except ClientDisconnected:
+        logger.info("Client disconnected; cancelled AI invocation")
+        # 499: client closed request (nginx convention); nobody reads it.
+        return Response(status_code=499)
+    except Exception as e:
+        logger.error("Error during AI invocation: %s", e)
+        return {"error": "Something went wrong while processing your query."}
 
-        response_text = result["messages"][-1]["content"]
-        logger.info(f"AI response generated: {response_text}")
+def sse_event(event: str, data) -> str:
+    return f"event: {event}\ndata: {json.dumps(data, default=str)}\n\n"
 
-        return {"response": response_text}
+@app.post("/query/stream")
+async def stream_agent(request: QueryRequest):
+    """
+    Server-Sent Events variant of /query.
 
-    except Exception as e:
-        logger.error(f"Error during AI invocation: {e}")
-        return {"error": "Something went wrong while processing your query."}
+    Emits ``items`` (intent plus the retrieved packages/hotels/...) before
+    generation starts, then one ``token`` event per completion chunk, then
+    ``done`` with the full text, or ``error``.
+    """
+    user_input = request.question
+    logger.info("Received streaming query: %s", redact(user_input))
+
+    async def events():
+        # Flush headers immediately so the client sees the first byte right away.
+        yield ": stream open\n\n"
+        started = time.perf_counter()
+        try:
+            session = await sessions.load(request.session_id)
+            answer = await prepare_answer(user_input.strip(), session.messages, session.summary, session.context)
+            yield sse_event("items", {
+                "intent": answer.intent, "items": answer.items,
+                "session_id": session.session_id, "prompt_tokens": answer.prompt_tokens, "timings": answer.timings,
+                "stale": sorted(stale_sources()),
+            })
+            if answer.prompt is None:
+                response_text = answer.text
+                yield sse_event("token", {"text": response_text})
+            else:
+                chunks = []
+                async for chunk in stream_deepseek(answer.prompt, answer.cache_key):
+                    chunks.append(chunk)
+                    yield sse_event("token", {"text": chunk})
+                response_text = "".join(chunks)
+            await sessions.record(session, user_input, response_text, answer.context)
+            path_stats.observe(answer.path, time.perf_counter() - started, answer.prompt_tokens)
+            yield sse_event("done", {"response": response_text, "session_id": session.session_id, "path": answer.path})
+        except Overloaded as e:
+            yield sse_event("error", {"error": "Server busy", "retry_after": e.retry_after})
+        except Exception as e:
+            logger.error("Error during streaming AI invocation: %s", e)
+            yield sse_event("error", {"error": "Something went wrong while processing your query."})
+
+    return StreamingResponse(
+        events(),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"},
+    )
+
+@app.post("/query/jobs", status_code=202)
+async def submit_job(request: QueryRequest):
+    """Queue a query; poll, long-poll or stream the job for its result."""
+    logger.info("Received job query: %s", redact(request.question))
+    try:
+        job = jobs.submit(request.question, request.session_id)
+    except Overloaded as e:
+        return e.response()
+    return JSONResponse(job.view(), status_code=202, headers={"Location": f"/query/jobs/{job.job_id}"})
+
+def _job(job_id: str):
+    job = jobs.store.get(job_id)
+    if job is None:
+        raise HTTPException(status_code=404, detail=f"No job {job_id}")
+    job.touch()
+    return job
+
+@app.get("/query/jobs/{job_id}")
+async def get_job(job_id: str, wait: float = 0):
+    """Job status and result; ``wait`` long-polls up to that many seconds for it to finish."""
+    job = _job(job_id)
+    if wait > 0:
+        await job.wait_finished(min(wait, settings.JOB_MAX_WAIT))
+        job.touch()
+    return job.view()
+
+@app.get("/query/jobs/{job_id}/events")
+async def stream_job(job_id: str):
+    """Server-Sent Events: one ``status`` event per change, ending with the finished job."""
+    job = _job(job_id)
+
+    async def events():
+        version = None
+        while True:
+            job.touch()
+            if job.version != version:
+                version = job.version
+                yield sse_event("status", job.view())
+                if job.finished:
+                    return
+            elif not await job.wait(version, 15):
+                yield ": keep-alive\n\n"
+
+    return StreamingResponse(
+        events(),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"},
+    )
+
+@app.delete("/query/jobs/{job_id}")
+async def cancel_job(job_id: str):
+    job = _job(job_id)
+    jobs.cancel(job)
+    return job.view()
 
 @app.get("/packages")
-async def fetch_packages():
-    logger.info("API call: get_packages()")
-    packages = get_packages()
-    logger.info(f"get_packages() returned {len(packages)} packages")
-    return {"packages": packages}
+async def fetch_packages(
+    request: Request,
+    fields: Optional[str] = None,
+    cursor: Optional[str] = None,
+    limit: Optional[int] = None,
+    format: str = "json"
+):
+    """Package listing; ``fields`` projects, ``cursor``/``limit`` paginate, ``format=ndjson`` streams."""
+    if format not in ("json", "ndjson"):
+        raise HTTPException(status_code=422, detail="format must be json or ndjson")
+    if limit is not None and not 1 <= limit <= settings.PACKAGES_MAX_PAGE_SIZE:
+        raise HTTPException(status_code=422, detail=f"limit must be between 1 and {settings.PACKAGES_MAX_PAGE_SIZE}")
+    try:
+        after = decode_cursor(cursor) if cursor else None
+    except InvalidCursor as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    projection = parse_fields(fields)
+    paginated = cursor is not None or limit is not None
+
+    if catalog.ready:
+        index, stale = catalog.index, catalog.stale
+        if stale:
+            mark_stale("catalog")
+    else:
+        logger.info("API call: get_packages()")
+        packages = await get_packages()
+        logger.info("get_packages() returned %s packages", len(packages))
+        stale = bool(stale_sources())
+        if format == "json" and not paginated and projection is None:
+            return representations.respond(request, await representations.for_value({"packages": packages, "stale": stale}))
+        # Page and project the upstream listing the same way as the local catalog
+        index = CatalogIndex(make_record(doc) for doc in packages)
+
+    if format == "ndjson":
+        # Generator iterated in the threadpool: constant memory, the loop stays free.
+        # Lines are packages only; the cursor goes in a header and staleness in X-Data-Stale.
+        headers = {}
+        if limit is not None:
+            following = next_cursor(index, after, limit)
+            if following is not None:
+                headers["X-Next-Cursor"] = following
+        return StreamingResponse(
+            ndjson_chunks(index, projection, after, limit),
+            media_type="application/x-ndjson",
+            headers=headers,
+        )
+
+    def build():
+        if paginated:
+            body = page(index, projection, after, limit or settings.PACKAGES_PAGE_SIZE)
+        else:
+            body = {"packages": [project(doc, projection) for doc in index.packages()]}
+        return {**body, "stale": stale}
+
+    if catalog.ready:
+        # Serialized and compressed once per catalog version and query
+        rep = await representations.for_key(("packages", index.version, stale, projection, after, limit), build)
+    else:
+        rep = await representations.for_value(build())
+    return representations.respond(request, rep)
 
 @app.get("/packages/{package_id}")
-async def fetch_package_details(package_id: str):
-    logger.info(f"API call: get_package_details({package_id})")
-    details = get_package_details(package_id)
-    logger.info(f"get_package_details({package_id}) returned data")
-    return details
+async def fetch_package_details(package_id: str, request: Request):
+    index = catalog.index
+    record = index.get(package_id)
+    if record is not None and record.details:
+        if catalog.stale:
+            mark_stale("catalog")
+        rep = await representations.for_key(("package", package_id, index.version), lambda: record.details)
+        return representations.respond(request, rep)
+    logger.info("API call: get_package_details(%s)", package_id)
+    details = await get_package_details(package_id)
+    logger.info("get_package_details(%s) returned data", package_id)
+    return representations.respond(request, await representations.for_value(details))
 
 @app.get("/packages/{package_id}/pricing")
 async def fetch_package_pricing(
@@ -74,34 +382,155 @@ async def fetch_package_pricing(
     noRoomCount: int,
     noExtraAdult: int = 0
 ):
-    logger.info(f"API call: get_package_pricing({package_id}, startDate={startDate}, noAdult={noAdult}, noChild={noChild}, noRoomCount={noRoomCount}, noExtraAdult={noExtraAdult})")
-    pricing = get_package_pricing(package_id, {
+    logger.info("API call: get_package_pricing(%s, startDate=%s, noAdult=%s, noChild=%s, noRoomCount=%s, noExtraAdult=%s)", package_id, startDate, noAdult, noChild, noRoomCount, noExtraAdult)
+    pricing = await get_package_pricing(package_id, {
         "startDate": startDate,
         "noAdult": noAdult,
         "noChild": noChild,
         "noRoomCount": noRoomCount,
         "noExtraAdult": noExtraAdult
     })
-    logger.info(f"get_package_pricing({package_id}) returned pricing data")
+    logger.info("get_package_pricing(%s) returned pricing data", package_id)
     return pricing
 
+@app.get("/packages/{package_id}/quote")
+async def fetch_package_quote(
+    package_id: str,
+    startDate: str,
+    noAdult: int,
+    noChild: int = 0,
+    noRoomCount: int = 1,
+    noExtraAdult: int = 0
+):
+    """Price from the precomputed calendar, or a live (TTL-cached) call for other party shapes."""
+    try:
+        day = date.fromisoformat(startDate)
+    except ValueError:
+        raise HTTPException(status_code=422, detail="startDate must be YYYY-MM-DD")
+    try:
+        return await price_calendars.quote(package_id, day, (noAdult, noChild, noRoomCount, noExtraAdult))
+    except Exception as e:
+        logger.error("Quote for %s failed: %s", package_id, e)
+        raise HTTPException(status_code=502, detail="Pricing is temporarily unavailable")
+
+@app.get("/packages/{package_id}/calendar")
+async def fetch_price_calendar(
+    package_id: str,
+    noAdult: int = 2,
+    noChild: int = 0,
+    noRoomCount: int = 1,
+    noExtraAdult: int = 0,
+    fromDate: Optional[str] = None,
+    toDate: Optional[str] = None
+):
+    """Precomputed price by start date for one party shape, plus the cheapest date in range."""
+    party = (noAdult, noChild, noRoomCount, noExtraAdult)
+    if party not in price_calendars.parties:
+        raise HTTPException(status_code=404, detail=f"No calendar for party shape; use /packages/{package_id}/quote")
+    # A build costs days x parties upstream calls: only for real packages, and only when enabled
+    if catalog.index.get(package_id) is None:
+        raise HTTPException(status_code=404, detail=f"Unknown package {package_id}")
+    calendar = price_calendars.calendars.get(package_id)
+    if calendar is None:
+        price_calendars.warm_if_stale(package_id)
+        if not price_calendars.warm_on_demand:
+            raise HTTPException(status_code=404, detail=f"Price calendars are disabled; use /packages/{package_id}/quote")
+        return JSONResponse({"status": "building"}, status_code=202)
+    try:
+        start = date.fromisoformat(fromDate) if fromDate else calendar.start
+        end = date.fromisoformat(toDate) if toDate else date.fromordinal(calendar.start.toordinal() + calendar.days - 1)
+    except ValueError:
+        raise HTTPException(status_code=422, detail="fromDate/toDate must be YYYY-MM-DD")
+    prices = []
+    for offset in range(max((start - calendar.start).days, 0), min((end - calendar.start).days + 1, calendar.days)):
+        day = date.fromordinal(calendar.start.toordinal() + offset)
+        prices.append({"date": day.isoformat(), "totalPrice": calendar.price(day, party)})
+    cheapest = calendar.cheapest(party, start, end)
+    return {
+        "packageId": package_id,
+        "builtAt": calendar.built_at,
+        "prices": prices,
+        "cheapest": None if cheapest is None else {"date": cheapest[0].isoformat(), "totalPrice": cheapest[1]},
+    }
+
+@app.post("/pricing/batch")
+async def fetch_pricing_batch(request: PricingBatchRequest):
+    """
+    Price many (packageId, startDate, party) tuples, or every date in a range.
+
+    Streams newline-delimited JSON: one ``result`` line per unique tuple as
+    it completes (``status`` ``ok`` or ``error``), then a ``summary`` line.
+    """
+    try:
+        items = collect_items(request, settings.PRICING_BATCH_MAX_ITEMS)
+    except BatchTooLarge as e:
+        raise HTTPException(status_code=413, detail=str(e))
+    except ValueError as e:
+        raise HTTPException(status_code=422, detail=str(e))
+    if not items:
+        raise HTTPException(status_code=422, detail="Provide items or a date range to price")
+    logger.info("API call: batch pricing for %s tuples", len(items))
+
+    async def lines():
+        async for result in price_batch(items):
+            yield json.dumps(result, default=str) + "\n"
+
+    return StreamingResponse(lines(), media_type="application/x-ndjson")
+
 @app.get("/packages/{package_id}/hotels")
 async def fetch_hotels(package_id: str):
-    logger.info(f"API call: get_available_hotels({package_id})")
-    hotels = get_available_hotels(package_id)
-    logger.info(f"get_available_hotels({package_id}) returned {len(hotels)} hotels")
+    logger.info("API call: get_available_hotels(%s)", package_id)
+    hotels = await get_available_hotels(package_id)
+    logger.info("get_available_hotels(%s) returned %s hotels", package_id, len(hotels))
     return {"hotels": hotels}
 
 @app.get("/packages/{package_id}/vehicles")
 async def fetch_vehicles(package_id: str):
-    logger.info(f"API call: get_available_vehicles({package_id})")
-    vehicles = get_available_vehicles(package_id)
-    logger.info(f"get_available_vehicles({package_id}) returned {len(vehicles)} vehicles")
+    logger.info("API call: get_available_vehicles(%s)", package_id)
+    vehicles = await get_available_vehicles(package_id)
+    logger.info("get_available_vehicles(%s) returned %s vehicles", package_id, len(vehicles))
     return {"vehicles": vehicles}
 
 @app.get("/packages/{package_id}/activities")
 async def fetch_activities(package_id: str):
-    logger.info(f"API call: get_available_activities({package_id})")
-    activities = get_available_activities(package_id)
-    logger.info(f"get_available_activities({package_id}) returned {len(activities)} activities")
+    logger.info("API call: get_available_activities(%s)", package_id)
+    activities = await get_available_activities(package_id)
+    logger.info("get_available_activities(%s) returned %s activities", package_id, len(activities))
     return {"activities": activities}
+
+@app.get("/cache/stats")
+async def cache_stats():
+    return {**catalog_cache.stats(), "single_flight": upstream_flight.stats(), "http": representations.stats()}
+
+@app.get("/admission/stats")
+async def admission_stats():
+    """Slots in use, queue depth and rejections per admission pool."""
+    return admission.stats()
+
+@app.get("/jobs/stats")
+async def job_stats():
+    """Async query jobs: queue depth, running jobs and outcomes."""
+    return jobs.stats()
+
+@app.get("/upstream/stats")
+async def upstream_stats():
+    """Circuit breaker state per TripXplo endpoint."""
+    return breakers.stats()
+
+@app.get("/catalog/stats")
+async def catalog_stats():
+    return {**catalog.stats(), "price_calendars": price_calendars.stats()}
+
+@app.get("/metrics", response_class=PlainTextResponse)
+async def metrics():
+    """Prometheus text exposition of route, node, upstream and LLM latency plus cache counters."""
+    return PlainTextResponse(registry.render(), media_type="text/plain; version=0.0.4")
+
+@app.get("/agent/stats")
+async def agent_stats():
+    """Queries served per path (fast templates, LLM, canned replies) with share and latency."""
+    return path_stats.stats()
+
+@app.get("/llm/stats")
+async def llm_stats():
+    return {**llm.stats(), "response_cache": response_cache.stats(), "single_flight": llm_flight.stats()}
@@ -11,7 +11,7 @@ env_loaded = False
 
 for env_file in env_files:
     if load_dotenv(env_file):
-        logger.info(f"Loaded environment variables from {env_file}")
+        logger.info("Loaded environment variables from %s", env_file)
         env_loaded = True
         break
 
@@ -20,14 +20,106 @@ if not env_loaded:
 
 class Settings:
     # API Configuration
-    TRIPXPLO_API_BASE = "https://api.tripxplo.com/v1/api"
+    TRIPXPLO_API_BASE = os.getenv("TRIPXPLO_API_BASE", "https://api.tripxplo.com/v1/api")
     TRIPXPLO_EMAIL = os.getenv("TRIPXPLO_EMAIL")
     TRIPXPLO_PASSWORD = os.getenv("TRIPXPLO_PASSWORD")
+
+    # HTTP Client Configuration (shared TripXplo connection pool)
+    HTTP_TIMEOUT = float(os.getenv("HTTP_TIMEOUT", "10"))
+    HTTP_CONNECT_TIMEOUT = float(os.getenv("HTTP_CONNECT_TIMEOUT", "3"))
+    HTTP_MAX_CONNECTIONS = int(os.getenv("HTTP_MAX_CONNECTIONS", "100"))
+    HTTP_MAX_KEEPALIVE = int(os.getenv("HTTP_MAX_KEEPALIVE", "20"))
+    HTTP_KEEPALIVE_EXPIRY = float(os.getenv("HTTP_KEEPALIVE_EXPIRY", "30"))
+    HTTP2_ENABLED = os.getenv("HTTP2_ENABLED", "True").lower() == "true"
+
+    # Circuit breakers per TripXplo endpoint; open circuits fail fast and the
+    # last good catalog data is served, marked stale
+    BREAKER_ENABLED = os.getenv("BREAKER_ENABLED", "True").lower() == "true"
+    BREAKER_WINDOW = int(os.getenv("BREAKER_WINDOW", "20"))
+    BREAKER_MIN_CALLS = int(os.getenv("BREAKER_MIN_CALLS", "5"))
+    BREAKER_FAILURE_RATE = float(os.getenv("BREAKER_FAILURE_RATE", "0.5"))
+    BREAKER_SLOW_CALL_SECONDS = float(os.getenv("BREAKER_SLOW_CALL_SECONDS", "3"))
+    BREAKER_SLOW_CALL_RATE = float(os.getenv("BREAKER_SLOW_CALL_RATE", "0.8"))
+    BREAKER_OPEN_SECONDS = float(os.getenv("BREAKER_OPEN_SECONDS", "30"))
+    BREAKER_HALF_OPEN_CALLS = int(os.getenv("BREAKER_HALF_OPEN_CALLS", "2"))
+
+    # Token Manager Configuration (seconds)
+    TOKEN_REFRESH_MARGIN = float(os.getenv("TOKEN_REFRESH_MARGIN", "120"))
+    TOKEN_DEFAULT_TTL = float(os.getenv("TOKEN_DEFAULT_TTL", "3600"))
+
+    # Catalog Cache Configuration
+    CACHE_BACKEND = os.getenv("CACHE_BACKEND", "memory").lower()  # "memory" or "sqlite"
+    CACHE_SQLITE_PATH = os.getenv("CACHE_SQLITE_PATH", ".cache/tripxplo_cache.sqlite3")
+    CACHE_MAX_ENTRIES = int(os.getenv("CACHE_MAX_ENTRIES", "2048"))
+    CACHE_MAX_BYTES = int(os.getenv("CACHE_MAX_BYTES", str(64 * 1024 * 1024)))
+    CACHE_STALE_TTL = float(os.getenv("CACHE_STALE_TTL", "3600"))
+    CACHE_TTLS = {
+        "packages": float(os.getenv("CACHE_TTL_PACKAGES", "300")),
+        "package_details": float(os.getenv("CACHE_TTL_PACKAGE_DETAILS", "600")),
+        "hotels": float(os.getenv("CACHE_TTL_HOTELS", "300")),
+        "vehicles": float(os.getenv("CACHE_TTL_VEHICLES", "300")),
+        "activities": float(os.getenv("CACHE_TTL_ACTIVITIES", "300")),
+        "pricing": float(os.getenv("CACHE_TTL_PRICING", "300")),
+    }
+
+    # Batch Pricing Configuration
+    PRICING_BATCH_CONCURRENCY = int(os.getenv("PRICING_BATCH_CONCURRENCY", "8"))
+    PRICING_BATCH_MAX_ITEMS = int(os.getenv("PRICING_BATCH_MAX_ITEMS", "500"))
+
+    # Conversation Session Configuration
+    SESSION_BACKEND = os.getenv("SESSION_BACKEND", "memory").lower()  # "memory" or "sqlite"
+    SESSION_SQLITE_PATH = os.getenv("SESSION_SQLITE_PATH", ".cache/sessions.sqlite3")
+    SESSION_TTL = float(os.getenv("SESSION_TTL", "3600"))
+    SESSION_MAX_SESSIONS = int(os.getenv("SESSION_MAX_SESSIONS", "10000"))
+    SESSION_MAX_MESSAGES = int(os.getenv("SESSION_MAX_MESSAGES", "6"))
+    SESSION_MESSAGE_CHARS = int(os.getenv("SESSION_MESSAGE_CHARS", "600"))
+    SESSION_SUMMARY_CHARS = int(os.getenv("SESSION_SUMMARY_CHARS", "800"))
+
+    # Price Calendar Configuration (party shapes are adults-children-rooms-extraAdults)
+    PRICE_CALENDAR_ENABLED = os.getenv("PRICE_CALENDAR_ENABLED", "False").lower() == "true"
+    PRICE_CALENDAR_PARTIES = os.getenv("PRICE_CALENDAR_PARTIES", "2-0-1-0,2-1-1-0,2-2-1-0")
+    PRICE_CALENDAR_DAYS = int(os.getenv("PRICE_CALENDAR_DAYS", "60"))
+    PRICE_CALENDAR_TTL = float(os.getenv("PRICE_CALENDAR_TTL", "21600"))
+    PRICE_CALENDAR_INTERVAL = float(os.getenv("PRICE_CALENDAR_INTERVAL", "3600"))
+    PRICE_CALENDAR_CONCURRENCY = int(os.getenv("PRICE_CALENDAR_CONCURRENCY", "4"))
+
+    # Catalog Sync Configuration
+    CATALOG_SYNC_ENABLED = os.getenv("CATALOG_SYNC_ENABLED", "True").lower() == "true"
+    CATALOG_SYNC_INTERVAL = float(os.getenv("CATALOG_SYNC_INTERVAL", "900"))
+    CATALOG_PAGE_SIZE = int(os.getenv("CATALOG_PAGE_SIZE", "50"))
+    CATALOG_SYNC_CONCURRENCY = int(os.getenv("CATALOG_SYNC_CONCURRENCY", "8"))
+
+    # Retrieval Configuration
+    RETRIEVAL_TOP_K = int(os.getenv("RETRIEVAL_TOP_K", "5"))
+    RETRIEVAL_EMBEDDINGS = os.getenv("RETRIEVAL_EMBEDDINGS", "False").lower() == "true"
+    # Prompt size: items are added by relevance until the token budget is spent
+    PROMPT_TOKEN_BUDGET = int(os.getenv("PROMPT_TOKEN_BUDGET", "1200"))
+    PROMPT_MAX_ITEMS = int(os.getenv("PROMPT_MAX_ITEMS", "10"))
+    # Answer structured package queries from templates instead of the LLM
+    FAST_PATH_ENABLED = os.getenv("FAST_PATH_ENABLED", "True").lower() == "true"
+    # Packages whose hotels/vehicles/activities are fetched for a destination query
+    RESOLVER_MAX_CANDIDATES = int(os.getenv("RESOLVER_MAX_CANDIDATES", "3"))
     
     # OpenRouter/OpenAI Configuration
     OPENROUTER_API_KEY = os.getenv("OPENROUTER_API_KEY")
     OPENROUTER_BASE_URL = "https://openrouter.ai/api/v1/chat/completions"
-    DEFAULT_MODEL = "deepseek/deepseek-chat-v3-0324"
+    OPENROUTER_API_BASE = os.getenv("OPENROUTER_API_BASE", "https://openrouter.ai/api/v1")
+    DEFAULT_MODEL = os.getenv("DEFAULT_MODEL", "deepseek/deepseek-chat-v3-0324")
+
+    # LLM Gateway Configuration
+    LLM_CONNECT_TIMEOUT = float(os.getenv("LLM_CONNECT_TIMEOUT", "5"))
+    LLM_READ_TIMEOUT = float(os.getenv("LLM_READ_TIMEOUT", "60"))
+    LLM_MAX_RETRIES = int(os.getenv("LLM_MAX_RETRIES", "2"))
+    LLM_RETRY_BASE_DELAY = float(os.getenv("LLM_RETRY_BASE_DELAY", "0.5"))
+    LLM_MAX_CONCURRENCY = int(os.getenv("LLM_MAX_CONCURRENCY", "16"))
+    LLM_FALLBACK_MODEL = os.getenv("LLM_FALLBACK_MODEL", "")  # empty disables hedging
+    LLM_HEDGE_AFTER = float(os.getenv("LLM_HEDGE_AFTER", "8"))
+
+    # LLM Response Cache Configuration
+    RESPONSE_CACHE_MODE = os.getenv("RESPONSE_CACHE_MODE", "semantic").lower()  # "off", "exact" or "semantic"
+    RESPONSE_CACHE_TTL = float(os.getenv("RESPONSE_CACHE_TTL", "1800"))
+    RESPONSE_CACHE_MAX_ENTRIES = int(os.getenv("RESPONSE_CACHE_MAX_ENTRIES", "1000"))
+    RESPONSE_CACHE_MAX_BYTES = int(os.getenv("RESPONSE_CACHE_MAX_BYTES", str(16 * 1024 * 1024)))
     
     # FastAPI Configuration
     APP_NAME = "TripXplo AI"
@@ -39,12 +131,63 @@ class Settings:
     
     # Logging Configuration
     LOG_LEVEL = os.getenv("LOG_LEVEL", "INFO")
+    LOG_FORMAT = os.getenv("LOG_FORMAT", "json")  # json or text
+    # Fraction of INFO/DEBUG lines kept per logger, e.g. "src.services.tripxplo_client=0.1"
+    LOG_SAMPLING = os.getenv("LOG_SAMPLING", "")
+    # Longest user query / response text written to the logs
+    LOG_BODY_CHARS = int(os.getenv("LOG_BODY_CHARS", "200"))
+    LOG_QUEUE_SIZE = int(os.getenv("LOG_QUEUE_SIZE", "10000"))
 
-settings = Settings()
+    # OpenTelemetry spans around routes, graph nodes and upstream calls (needs opentelemetry-api)
+    TRACING_ENABLED = os.getenv("TRACING_ENABLED", "False").lower() == "true"
+
+    # Startup warm-up: token, catalog index, graph and pools are readied before /ready passes
+    WARMUP_ENABLED = os.getenv("WARMUP_ENABLED", "True").lower() == "true"
+    WARMUP_TIMEOUT = float(os.getenv("WARMUP_TIMEOUT", "20"))
+
+    # /packages responses: ETags, 304s and precompressed gzip/br bodies
+    COMPRESSION_MIN_BYTES = int(os.getenv("COMPRESSION_MIN_BYTES", "1024"))
+    COMPRESSION_GZIP_LEVEL = int(os.getenv("COMPRESSION_GZIP_LEVEL", "6"))
+    COMPRESSION_BROTLI_QUALITY = int(os.getenv("COMPRESSION_BROTLI_QUALITY", "5"))
+    REPRESENTATION_CACHE_ENTRIES = int(os.getenv("REPRESENTATION_CACHE_ENTRIES", "256"))
+
+    # Admission control: per-client token bucket, per-pool concurrency limits
+    # with a bounded priority queue; excess load gets 429/503 + Retry-After
+    ADMISSION_ENABLED = os.getenv("ADMISSION_ENABLED", "True").lower() == "true"
+    # Requests/second per client; 0 (default) disables. Without ADMISSION_TRUST_PROXY every client
+    # behind a proxy or load balancer shares its address, and so a single bucket
+    ADMISSION_RATE = float(os.getenv("ADMISSION_RATE", "0"))
+    ADMISSION_BURST = float(os.getenv("ADMISSION_BURST", "50"))
+    ADMISSION_CATALOG_LIMIT = int(os.getenv("ADMISSION_CATALOG_LIMIT", "256"))
+    ADMISSION_AGENT_LIMIT = int(os.getenv("ADMISSION_AGENT_LIMIT", "32"))
+    ADMISSION_QUEUE_SIZE = int(os.getenv("ADMISSION_QUEUE_SIZE", "64"))
+    ADMISSION_QUEUE_TIMEOUT = float(os.getenv("ADMISSION_QUEUE_TIMEOUT", "2"))
+    ADMISSION_LLM_TIMEOUT = float(os.getenv("ADMISSION_LLM_TIMEOUT", "10"))
+    # Key clients by the first X-Forwarded-For hop (only behind a trusted proxy)
+    ADMISSION_TRUST_PROXY = os.getenv("ADMISSION_TRUST_PROXY", "False").lower() == "true"
 
-# Validate required environment variables
-if not settings.TRIPXPLO_EMAIL or not settings.TRIPXPLO_PASSWORD:
-    raise ValueError("TRIPXPLO_EMAIL and TRIPXPLO_PASSWORD must be set in environment variables")
+    # Async query jobs (POST /query/jobs): worker pool, queue and local job store
+    JOB_WORKERS = int(os.getenv("JOB_WORKERS", "4"))
+    JOB_QUEUE_SIZE = int(os.getenv("JOB_QUEUE_SIZE", "100"))
+    JOB_TTL = float(os.getenv("JOB_TTL", "600"))  # finished jobs are kept this long
+    JOB_MAX_STORED = int(os.getenv("JOB_MAX_STORED", "1000"))
+    # Cancel a job nobody has polled or streamed for this long
+    JOB_ABANDON_AFTER = float(os.getenv("JOB_ABANDON_AFTER", "60"))
+    JOB_MAX_WAIT = float(os.getenv("JOB_MAX_WAIT", "30"))  # longest long-poll
 
-if not settings.OPENROUTER_API_KEY:
-    raise ValueError("OPENROUTER_API_KEY must be set in environment variables")
\ No newline at end of file
+    # /packages cursor pagination (?cursor=&limit=)
+    PACKAGES_PAGE_SIZE = int(os.getenv("PACKAGES_PAGE_SIZE", "100"))
+    PACKAGES_MAX_PAGE_SIZE = int(os.getenv("PACKAGES_MAX_PAGE_SIZE", "1000"))
+
+    REQUIRED = ("TRIPXPLO_EMAIL", "TRIPXPLO_PASSWORD", "OPENROUTER_API_KEY")
+
+    def missing(self) -> list:
+        return [name for name in self.REQUIRED if not getattr(self, name)]
+
+    def require(self) -> None:
+        """Raise if credentials are missing; called at app startup rather than on import."""
+        missing = self.missing()
+        if missing:
+            raise ValueError(f"{', '.join(missing)} must be set in environment variables")
+
+settings = Settings()
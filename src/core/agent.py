@@ -1,211 +1,569 @@
-import os
-import logging
-from openai import OpenAI
-from dotenv import load_dotenv
-from langgraph.graph import StateGraph
+import re
+import asyncio
+import json
+import time
+import hashlib
 from pydantic import BaseModel
-from typing import List
-from ..services.tripxplo_api import get_packages, get_available_hotels, get_available_vehicles, get_available_activities
-
-# Load environment variables from .env.local
-load_dotenv(os.path.join(os.path.dirname(os.path.dirname(os.path.dirname(__file__))), '.env.local'))
-
-OPENROUTER_API_KEY = os.getenv("OPENROUTER_API_KEY")
-if not OPENROUTER_API_KEY:
-    raise ValueError("Missing OpenRouter API key")
+from dataclasses import dataclass, field
+from functools import wraps
+from calendar import monthrange
+from datetime import date
+from typing import Annotated, Any, AsyncIterator, Dict, List, Optional, Sequence, Tuple
+from ..services.tripxplo_client import get_packages, get_package_details, get_available_hotels, get_available_vehicles, get_available_activities
+from ..services.admission import admission
+from ..services.cache import mark_stale, stale_sources
+from ..services.catalog import catalog, make_record
+from ..services.llm_gateway import llm, llm_flight
+from ..services.price_calendar import Party, party_for, price_calendars
+from ..services.response_cache import replay_chunks, response_cache
+from ..services.sessions import sessions
+from ..config import settings
+from ..utils.logger import redact, setup_logger
+from ..utils.metrics import NODE_ERRORS, NODE_SECONDS, span
+from .matcher import PRIMARY_INTENTS, QueryEntities, get_matcher
+from .fast_path import fast_answer, path_stats
+from .prompts import Prompt, prompt_builder
+from .resolver import get_resolver, mentions_package_id
+from .retrieval import Retriever, get_retriever
 
 # Logger setup
-logging.basicConfig(level=logging.INFO, format='%(levelname)s: %(message)s')
-logger = logging.getLogger(__name__)
-
-client = OpenAI(base_url="https://openrouter.ai/api/v1", api_key=OPENROUTER_API_KEY)
-
-class AgentState(BaseModel):
-    messages: List[dict]
-
-def call_deepseek(prompt: str) -> str:
-    logger.info("Calling DeepSeek API")
-    try:
-        res = client.chat.completions.create(
-            model="deepseek/deepseek-chat",
-            messages=[{"role": "user", "content": prompt}]
-        )
-        logger.info("Received response from DeepSeek")
-        content = res.choices[0].message.content
-        return content if content is not None else ""
-    except Exception as e:
-        logger.error(f"DeepSeek API error: {e}")
-        return f"DeepSeek error: {e}"
+logger = setup_logger(__name__)
+
+@dataclass
+class PreparedAnswer:
+    """Everything the agent knows before generation: the retrieved items and
+    either the prompt to send to the LLM or a final text that needs none."""
+    intent: str
+    items: List[dict] = field(default_factory=list)
+    prompt: Optional[str] = None
+    text: str = ""
+    cache_key: Optional[str] = None
+    # Prompt inputs beyond the items themselves (e.g. price hints); part of the semantic cache key.
+    facets: List[str] = field(default_factory=list)
+    # Resolved entities to carry into the next turn of the session.
+    context: Dict[str, Any] = field(default_factory=dict)
+    # Per-node wall time in ms, filled in by the graph.
+    timings: Dict[str, float] = field(default_factory=dict)
+    # Size of ``prompt`` as counted by the prompt builder.
+    prompt_tokens: int = 0
+    # "fast" (templated from catalog/pricing data), "llm", or "canned" (clarifications, not found).
+    path: str = ""
+
+def flight_key(prompt: str, cache_key: Optional[str]) -> str:
+    if cache_key:
+        return cache_key
+    return "prompt:" + hashlib.blake2b(f"{llm.model}\x1f{prompt}".encode(), digest_size=16).hexdigest()
+
+async def _generate(prompt: str, cache_key: Optional[str]) -> str:
+    logger.info("Calling %s via the LLM gateway", llm.model)
+    content = await llm.complete(prompt)
+    logger.info("Received response from DeepSeek")
+    response_cache.set(cache_key, content)
+    return content
+
+async def _generate_stream(prompt: str, cache_key: Optional[str]) -> AsyncIterator[str]:
+    logger.info("Streaming from %s via the LLM gateway", llm.model)
+    chunks = []
+    async for chunk in llm.stream(prompt):
+        chunks.append(chunk)
+        yield chunk
+    # Only complete streams are cached; a disconnect mid-answer raises out of the loop.
+    response_cache.set(cache_key, "".join(chunks))
+    logger.info("DeepSeek stream finished")
+
+async def call_deepseek(prompt: str, cache_key: Optional[str] = None) -> str:
+    cached = response_cache.get(cache_key)
+    if cached is not None:
+        logger.info("Serving answer from the response cache")
+        return cached
+    # Queues behind fast-path answers; raises Overloaded when the queue is full
+    async with admission.generation():
+        try:
+            # Identical concurrent questions share one generation.
+            return await llm_flight.do(flight_key(prompt, cache_key), lambda: _generate(prompt, cache_key))
+        except Exception as e:
+            logger.error("DeepSeek API error: %s", e)
+            return f"DeepSeek error: {e}"
+
+async def stream_deepseek(prompt: str, cache_key: Optional[str] = None) -> AsyncIterator[str]:
+    """Yield completion text chunks as OpenRouter produces them (or replay a cached answer)."""
+    cached = response_cache.get(cache_key)
+    if cached is not None:
+        logger.info("Replaying answer from the response cache")
+        for chunk in replay_chunks(cached):
+            yield chunk
+        return
+    key = flight_key(prompt, cache_key)
+    async with admission.generation():
+        async for chunk in llm_flight.stream(key, lambda: _generate_stream(prompt, cache_key)):
+            yield chunk
+
+def item_id(item: dict) -> str:
+    for key in ("packageId", "hotelId", "vehicleId", "activityId", "id", "_id"):
+        if item.get(key):
+            return str(item[key])
+    return ""
 
 def extract_search_terms(query: str) -> str:
-    known_destinations = [
-        "goa", "kerala", "manali", "bali", "kodaikanal", "ooty",
-        "rajasthan", "andaman", "himachal", "shimla", "darjeeling"
-    ]
-    query_lower = query.lower()
-    found_terms = [dest for dest in known_destinations if dest in query_lower]
-    if found_terms:
-        logger.info(f"Extracted search terms: {found_terms}")
-        return " ".join(found_terms)
+    entities = get_matcher().match(query)
+    if entities.destinations:
+        logger.info("Extracted search terms: %s", entities.destinations)
+        return " ".join(entities.destinations)
     logger.info("No known destinations found in query; using full query as search term")
     return query
 
 def detect_intent(query: str) -> str:
-    query_lower = query.lower()
-    if any(keyword in query_lower for keyword in ["hotel", "stay", "accommodation", "resort"]):
-        return "hotel"
-    if any(keyword in query_lower for keyword in ["vehicle", "car", "transport", "taxi"]):
-        return "vehicle"
-    if any(keyword in query_lower for keyword in ["activity", "tour", "things to do", "adventure", "experience"]):
-        return "activity"
-    return "package"
-
-def format_packages(packages: list) -> str:
-    return "\n".join([
-        f"{i+1}. {p.get('packageName', 'N/A')} (ID: {p.get('packageId', p.get('id', 'N/A'))})"
-        for i, p in enumerate(packages[:5])
-    ])
-
-def query_node(state: AgentState) -> AgentState:
-    user_query = state.messages[-1]["content"].strip()
-    logger.info(f"Received user query (length {len(user_query)} chars)")
+    return get_matcher().match(query).intent
+
+async def package_retriever() -> Retriever:
+    """Retriever over the synced catalog, or over the first page until the sync is ready."""
+    if catalog.ready:
+        if catalog.stale:
+            mark_stale("catalog")
+        return get_retriever()
+    return Retriever([make_record(doc) for doc in await get_packages()])
+
+def travel_window(month: Optional[int], today: Optional[date] = None) -> Tuple[date, date]:
+    """Start dates to consider: the next occurrence of ``month``, or the whole calendar horizon."""
+    today = today or date.today()
+    if month is None:
+        return today, date.fromordinal(today.toordinal() + price_calendars.days - 1)
+    year = today.year if month >= today.month else today.year + 1
+    start = today if (year, month) == (today.year, today.month) else date(year, month, 1)
+    return start, date(year, month, monthrange(year, month)[1])
+
+def price_hints(packages: list, entities: QueryEntities) -> Dict[str, str]:
+    """
+    Cheapest known start date per package for the user's party and month,
+    read from the precomputed price calendars. Never waits on upstream:
+    packages without a calendar yet are warmed in the background and skipped.
+    """
+    asked = entities.adults is not None or entities.children is not None or entities.month is not None
+    if not asked and "pricing" not in entities.intents:
+        return {}
+    party = party_for(entities.adults, entities.children)
+    start, end = travel_window(entities.month)
+    hints = {}
+    for p in packages[:5]:
+        cheapest = price_calendars.cheapest_nowait(item_id(p), party, start, end)
+        if cheapest is not None:
+            day, price = cheapest
+            hints[item_id(p)] = _hint(party, day.isoformat(), price)
+    return hints
+
+def _hint(party: Party, start_date: str, price: float) -> str:
+    return f"from ₹{price:,.0f} for {party[0]} adult(s), {party[1]} child(ren) starting {start_date}"
+
+_ORDINALS = {
+    "first": 0, "1st": 0, "second": 1, "2nd": 1, "third": 2, "3rd": 2,
+    "fourth": 3, "4th": 3, "fifth": 4, "5th": 4, "last": -1,
+}
+# A count followed by one of these ("no 5 star hotels", "number 3 nights") is not a reference.
+_COUNTED = r"(?:stars?|days?|nights?|adults?|kids?|child(?:ren)?|people|persons?|pax|rooms?|hours?)\b"
+_REFERENCE = re.compile(
+    r"\b(?:(?P<ord>" + "|".join(_ORDINALS) + r")\s+(?:one|package|option)\b"
+    r"|(?:option|number|no\.?)\s*#?(?P<num>[1-5])\b(?![\s-]*" + _COUNTED + r")"
+    r"|(?P<this>that one|this one|that package|this package|the same one)\b)"
+)
+_CARRIED = ("days", "nights", "adults", "children", "month")
+
+def referenced_package(query: str, context: Dict[str, Any]) -> Optional[str]:
+    """Package ID a follow-up points at ("the second one", "that package"), if any."""
+    shown = context.get("package_ids") or []
+    m = _REFERENCE.search(query.lower())
+    if m is None or not shown:
+        return None
+    if m.group("this"):
+        return context.get("selected_package") or shown[0]
+    index = _ORDINALS[m.group("ord")] if m.group("ord") else int(m.group("num")) - 1
+    return shown[index] if -len(shown) <= index < len(shown) else None
+
+def carry_over(entities: QueryEntities, context: Dict[str, Any]) -> None:
+    """Fill entities the follow-up left out from what earlier turns resolved."""
+    if not entities.destinations and context.get("destinations"):
+        entities.destinations = list(context["destinations"])
+    for name in _CARRIED:
+        if getattr(entities, name) is None and context.get(name) is not None:
+            setattr(entities, name, context[name])
+
+def conversation_block(history: Sequence[dict], summary: str) -> str:
+    if not history and not summary:
+        return ""
+    lines = ["Conversation so far (for context; answer the latest question):"]
+    if summary:
+        lines.append("Earlier in this conversation the user:\n" + summary)
+    for message in history:
+        lines.append(f"{'User' if message['role'] == 'user' else 'Assistant'}: {message['content']}")
+    return "\n".join(lines) + "\n"
+
+# -- graph ---------------------------------------------------------------
+# understand -> [retrieve_packages | fetch_hotels | fetch_vehicles |
+#                fetch_activities | fetch_pricing] (in parallel) -> compose
+#            -> generate (skipped for lookup answers and when streaming)
+
+def _merge(left: Dict[str, Any], right: Dict[str, Any]) -> Dict[str, Any]:
+    return {**left, **right}
 
+class AgentState(BaseModel):
+    messages: List[dict]
+    # Compact memory of a multi-turn session (see src/services/sessions.py)
+    summary: str = ""
+    context: Dict[str, Any] = {}
+    # False when the caller streams the answer itself (see prepare_answer)
+    generate: bool = True
+    entities: Optional[Any] = None
+    package_id: Optional[str] = None
+    # Packages whose hotels/vehicles/activities to fetch, best first
+    candidates: List[str] = []
+    plan: List[str] = []
+    # Written concurrently by the fetch nodes, hence the merging reducers
+    results: Annotated[Dict[str, Any], _merge] = {}
+    timings: Annotated[Dict[str, float], _merge] = {}
+    answer: Optional[Any] = None
+
+FETCH_NODES = {
+    "package": "retrieve_packages",
+    "hotel": "fetch_hotels",
+    "vehicle": "fetch_vehicles",
+    "activity": "fetch_activities",
+    "pricing": "fetch_pricing",
+}
+
+def timed(name: str):
+    """Record the node's wall time (ms) in ``state.timings`` and the ``graph_node_seconds`` histogram."""
+    def decorate(node):
+        @wraps(node)
+        async def run(state: AgentState) -> Dict[str, Any]:
+            started = time.perf_counter()
+            with span(f"graph.{name}", NODE_SECONDS, (name,), NODE_ERRORS):
+                update = await node(state) or {}
+            update["timings"] = {name: round((time.perf_counter() - started) * 1000, 2)}
+            return update
+        return run
+    return decorate
+
+def _clarification() -> str:
+    return (
+        "Hi! Your query seems a bit short. Could you please provide more details? "
+        "For example, mention the destination, type of package, or any preferences."
+    )
+
+@timed("understand")
+async def understand(state: AgentState) -> Dict[str, Any]:
+    """Intent/entity node: match the query, resolve references and plan the fetches."""
+    user_query = state.messages[-1]["content"].strip()
+    logger.info("Received user query (length %s chars)", len(user_query))
     if len(user_query) < 5:
-        clarification = (
-            "Hi! Your query seems a bit short. Could you please provide more details? "
-            "For example, mention the destination, type of package, or any preferences."
-        )
-        state.messages.append({"role": "assistant", "content": clarification})
-        return state
-
-    intent = detect_intent(user_query)
-    logger.info(f"Detected intent: {intent}")
-
-    search_term = extract_search_terms(user_query)
-
-    if intent == "hotel":
-        logger.info(f"Fetching hotels with search term '{search_term}'")
-        hotels = get_available_hotels(search_term)
-        if hotels:
-            formatted_list = "\n".join([
-                f"{i+1}. {h.get('hotelName', 'N/A')} (ID: {h.get('hotelId', 'N/A')})"
-                for i, h in enumerate(hotels[:5])
-            ])
-            prompt = f"""
-You are a helpful travel assistant.
-
-The user asked about hotels: "{user_query}"
-
-Here are some hotel options matching your request:
-
-{formatted_list}
-
-Please provide a warm, clear, and friendly summary for these hotel options including name, highlights, price (if available), and Hotel ID.
-
-End with a call to action encouraging booking or further questions.
-"""
-            response = call_deepseek(prompt)
-        else:
-            response = "Sorry, I couldn't find hotels matching your request. Would you like me to suggest popular hotels instead?"
-
-    elif intent == "vehicle":
-        logger.info(f"Fetching vehicles with search term '{search_term}'")
-        vehicles = get_available_vehicles(search_term)
-        if vehicles:
-            formatted_list = "\n".join([
-                f"{i+1}. {v.get('vehicleName', 'N/A')} (ID: {v.get('vehicleId', 'N/A')})"
-                for i, v in enumerate(vehicles[:5])
-            ])
-            prompt = f"""
-You are a helpful travel assistant.
-
-The user asked about vehicles: "{user_query}"
-
-Here are some vehicle options matching your request:
-
-{formatted_list}
-
-Please provide a friendly summary for these vehicles including name, type, price (if available), and Vehicle ID.
-
-End with a call to action encouraging booking or further questions.
-"""
-            response = call_deepseek(prompt)
+        return {"plan": [], "answer": PreparedAnswer("clarification", text=_clarification(),
+                                                     context=dict(state.context), path="canned")}
+
+    context = state.context
+    entities = get_matcher().match(user_query)
+    new_destinations = bool(entities.destinations)
+    # "the second one" refers to the last listing only while the user stays on its destinations
+    moved_on = {d.lower() for d in entities.destinations} - {d.lower() for d in context.get("destinations") or []}
+    referenced = None if moved_on else referenced_package(user_query, context)
+    if referenced is None and mentions_package_id(user_query):
+        referenced = get_resolver(await package_retriever()).mentioned_package(user_query)
+    carry_over(entities, context)
+
+    # Hotels/vehicles/activities belong to a package: use the one under
+    # discussion unless the user moved on to a new destination.
+    package_id = referenced
+    if package_id is None and not new_destinations and set(entities.intents) - {"package"}:
+        package_id = context.get("selected_package")
+
+    kinds = [kind for kind in PRIMARY_INTENTS if kind in entities.intents]
+    wants_price = "pricing" in entities.intents and package_id is not None
+    if wants_price:
+        kinds.append("pricing")
+    if not kinds:
+        kinds = ["package"]
+
+    candidates: List[str] = []
+    if package_id is not None:
+        candidates = [package_id]
+    elif set(kinds) & set(PRIMARY_INTENTS):
+        resolver = get_resolver(await package_retriever())
+        candidates = resolver.resolve(user_query, entities, limit=settings.RESOLVER_MAX_CANDIDATES)
+
+    plan = [FETCH_NODES[kind] for kind in kinds]
+    logger.info("Detected intents: %s; entities: %s; referenced package: %s; candidates: %s; plan: %s",
+                entities.intents or ["package"], entities, referenced, candidates, plan)
+    return {"entities": entities, "package_id": package_id, "candidates": candidates, "plan": plan}
+
+def route_fetches(state: AgentState) -> List[str]:
+    return state.plan or ["compose"]
+
+@timed("retrieve_packages")
+async def retrieve_packages(state: AgentState) -> Dict[str, Any]:
+    """Retrieval node: BM25 top-k, or the single package a follow-up refers to."""
+    user_query = state.messages[-1]["content"].strip()
+    entities = state.entities
+    if state.package_id is not None:
+        # Follow-up about a package shown earlier: no need to retrieve again.
+        record = catalog.index.get(state.package_id)
+        details = {**record.summary, **record.details} if record is not None else await get_package_details(state.package_id)
+        if details:
+            return {"results": {"package": {"mode": "followup", "items": [details]}}}
+        logger.info("Referenced package %s is unavailable; searching instead", state.package_id)
+
+    logger.info("Retrieving packages for '%s'", " ".join(entities.destinations) or redact(user_query))
+    retriever = await package_retriever()
+    hits = retriever.search(user_query, entities, k=settings.RETRIEVAL_TOP_K)
+    packages = [{**record.summary, **record.details} for record, _ in hits]
+    logger.info("Retrieved %s of %s packages", len(packages), len(retriever.records))
+    if packages:
+        return {"results": {"package": {"mode": "search", "items": packages}}}
+    logger.info("No packages matched; providing popular packages")
+    popular = retriever.filter_only(entities, k=settings.RETRIEVAL_TOP_K) or retriever.filter_only(None)
+    return {"results": {"package": {"mode": "popular", "items": [record.summary for record in popular]}}}
+
+async def fetch_for_candidates(kind: str, fetch, package_ids: List[str]) -> List[dict]:
+    """Fetch ``kind`` for every candidate package concurrently; merge, dedupe and cap the list."""
+    if not package_ids:
+        logger.info("No package matches the query; skipping %s lookup", kind)
+        return []
+    logger.info("Fetching %s for packages %s", kind, package_ids)
+    merged: Dict[str, dict] = {}
+    for items in await asyncio.gather(*(fetch(package_id) for package_id in package_ids)):
+        for item in items:
+            merged.setdefault(item_id(item) or json.dumps(item, sort_keys=True, default=str), item)
+    return list(merged.values())[:settings.PROMPT_MAX_ITEMS]
+
+@timed("fetch_hotels")
+async def fetch_hotels(state: AgentState) -> Dict[str, Any]:
+    return {"results": {"hotel": await fetch_for_candidates("hotels", get_available_hotels, state.candidates)}}
+
+@timed("fetch_vehicles")
+async def fetch_vehicles(state: AgentState) -> Dict[str, Any]:
+    return {"results": {"vehicle": await fetch_for_candidates("vehicles", get_available_vehicles, state.candidates)}}
+
+@timed("fetch_activities")
+async def fetch_activities(state: AgentState) -> Dict[str, Any]:
+    return {"results": {"activity": await fetch_for_candidates("activities", get_available_activities, state.candidates)}}
+
+@timed("fetch_pricing")
+async def fetch_pricing(state: AgentState) -> Dict[str, Any]:
+    """Cheapest start date for the party in the requested month, calendar first."""
+    entities, package_id = state.entities, state.package_id
+    party = party_for(entities.adults, entities.children)
+    start, end = travel_window(entities.month)
+    quote: Optional[Dict[str, Any]] = None
+    cheapest = price_calendars.cheapest_nowait(package_id, party, start, end)
+    if cheapest is not None:
+        quote = {"startDate": cheapest[0].isoformat(), "totalPrice": cheapest[1], "source": "calendar"}
+    else:
+        try:
+            quote = await price_calendars.quote(package_id, start, party)
+        except Exception as e:
+            logger.warning("Live quote for %s failed: %s", package_id, e)
+    if quote is not None and quote.get("totalPrice") is None:  # no price for that date
+        quote = None
+    return {"results": {"pricing": {"packageId": package_id, "party": party, "quote": quote}}}
+
+_ITEM_LABELS = {"hotel": "Hotel", "vehicle": "Vehicle", "activity": "Activity"}
+
+def _package_name(package_id: str) -> str:
+    record = catalog.index.get(package_id)
+    return record.name if record is not None and record.name else f"Package {package_id}"
+
+def _pricing_text(pricing: Dict[str, Any]) -> str:
+    party, quote = pricing["party"], pricing["quote"]
+    who = f"{party[0]} adult(s)" + (f" and {party[1]} child(ren)" if party[1] else "")
+    name = f"{_package_name(pricing['packageId'])} (ID: {pricing['packageId']})"
+    if quote is None:
+        return f"I couldn't get a price for {name} for {who} right now. Please try again in a moment."
+    return f"{name} for {who}, starting {quote['startDate']}: ₹{quote['totalPrice']:,.0f} in total."
+
+_NOT_FOUND = {
+    "hotel": "Sorry, I couldn't find hotels matching your request. Would you like me to suggest popular hotels instead?",
+    "vehicle": "Sorry, I couldn't find vehicles matching your request. Would you like me to suggest popular vehicles instead?",
+    "activity": "Sorry, I couldn't find activities matching your request. Would you like me to suggest popular activities instead?",
+}
+
+def _prompted(intent: str, items: list, prompt: Prompt, facets: Optional[List[str]] = None) -> PreparedAnswer:
+    logger.info("Built %s prompt: %s tokens, %s item(s), %s dropped", intent, prompt.tokens, prompt.items, prompt.dropped)
+    return PreparedAnswer(intent, items, prompt=prompt.text, facets=facets or [], prompt_tokens=prompt.tokens)
+
+def _package_answer(
+    user_query: str,
+    entities: QueryEntities,
+    found: Dict[str, Any],
+    history: str = "",
+    pricing: Optional[Dict[str, Any]] = None,
+) -> PreparedAnswer:
+    packages = found["items"]
+    hints = price_hints(packages, entities)
+    if pricing is not None and pricing["quote"] is not None:
+        # A live quote for the selected package beats the calendar's answer, or fills in its absence.
+        quote = pricing["quote"]
+        hints[pricing["packageId"]] = _hint(pricing["party"], quote["startDate"], quote["totalPrice"])
+    text = fast_answer(user_query, entities, found, hints) if settings.FAST_PATH_ENABLED else None
+    if text is not None:
+        return PreparedAnswer("package", packages, text=text, path="fast")
+    if found["mode"] == "followup":
+        details = packages[0]
+        days = [day for day in details.get("itinerary") or [] if isinstance(day, dict)]
+        sections = [("Package:", "package", [details]), ("Day by day:", "itinerary", days)]
+    else:
+        sections = [("", "package", packages)]
+    prompt = prompt_builder.build(f"package_{found['mode']}", sections, hints, query=user_query, history=history)
+    return _prompted("package", packages, prompt, sorted(hints.values()))
+
+def _combined_answer(user_query: str, results: Dict[str, Any], kinds: List[str], history: str = "") -> PreparedAnswer:
+    """One prompt covering several kinds fetched in parallel ("hotels and activities in Goa")."""
+    sections, items, missing = [], [], []
+    for kind in kinds:
+        found = results.get(kind) or []
+        if found:
+            sections.append((f"{_ITEM_LABELS[kind]} options:", kind, found))
+            items.extend(found)
         else:
-            response = "Sorry, I couldn't find vehicles matching your request. Would you like me to suggest popular vehicles instead?"
-
-    elif intent == "activity":
-        logger.info(f"Fetching activities with search term '{search_term}'")
-        activities = get_available_activities(search_term)
-        if activities:
-            formatted_list = "\n".join([
-                f"{i+1}. {a.get('activityName', 'N/A')} (ID: {a.get('activityId', 'N/A')})"
-                for i, a in enumerate(activities[:5])
-            ])
-            prompt = f"""
-                        You are a helpful travel assistant.
-
-                        The user asked about activities: "{user_query}"
-
-                        Here are some activity options matching your request:
-
-                        {formatted_list}
-
-                        Please provide a warm, engaging summary for these activities including name, highlights, price (if available), and Activity ID.
-
-                        End with a call to action encouraging booking or further questions.
-                        """
-            response = call_deepseek(prompt)
+            missing.append(_ITEM_LABELS[kind].lower())
+    pricing = results.get("pricing")
+    if not sections and pricing is None:
+        return PreparedAnswer(kinds[0], text="Sorry, I couldn't find anything matching your request. Could you tell me a bit more about your trip?")
+    notes = []
+    if pricing is not None:
+        notes.append(f"Price quote: {_pricing_text(pricing)}")
+    if missing:
+        notes.append(f"No {', '.join(missing)} options were found; say so briefly.")
+    prompt = prompt_builder.build("combined", sections, query=user_query, history=history, note="\n".join(notes))
+    return _prompted("+".join(kinds), items, prompt)
+
+@timed("compose")
+async def compose(state: AgentState) -> Dict[str, Any]:
+    """Enrichment node: price hints, prompt (or lookup text), session context and cache key."""
+    if state.answer is not None:  # clarification
+        answer = state.answer
+    else:
+        user_query = state.messages[-1]["content"].strip()
+        entities, results = state.entities, state.results
+        kinds = [kind for kind in PRIMARY_INTENTS if kind in results]
+        history = conversation_block(state.messages[:-1], state.summary)
+        if "package" in results:
+            answer = _package_answer(user_query, entities, results["package"], history, results.get("pricing"))
+        elif "pricing" in results and not kinds:
+            # Pure lookup: the quote is the answer, no LLM needed.
+            answer = PreparedAnswer("pricing", text=_pricing_text(results["pricing"]), path="fast")
+        elif len(kinds) == 1 and "pricing" not in results:
+            kind = kinds[0]
+            found = results[kind]
+            if found:
+                prompt = prompt_builder.build(kind, [("", kind, found)], query=user_query, history=history)
+                answer = _prompted(kind, found, prompt)
+            else:
+                answer = PreparedAnswer(kind, text=_NOT_FOUND[kind])
         else:
-            response = "Sorry, I couldn't find activities matching your request. Would you like me to suggest popular activities instead?"
-
-    else:  # Default to package search
-        logger.info(f"Fetching packages with search term '{search_term}'")
-        packages = get_packages()
-        logger.info(f"Number of packages fetched: {len(packages)}")
-        if packages:
-            formatted_list = format_packages(packages)
-            prompt = f"""
-                        You are a helpful travel assistant.
-
-                        The user asked about packages: "{user_query}"
-
-                        Step-by-step:
-
-                        1. Identify the main destination or theme.
-                        2. Find the best matches from the packages below.
-                        3. Summarize each package with name, duration, highlights, price, and Package ID.
-                        4. Present warmly and clearly, grouped by destination if applicable.
-                        5. End with a friendly call to action.
-
-                        Here are the matching packages ({len(packages)} found):
-
-                        {formatted_list}
-                        """
-            response = call_deepseek(prompt)
-        else:
-            logger.info("No packages matched; providing popular packages")
-            general_packages = get_packages()
-            formatted_list = format_packages(general_packages)
-            prompt = f"""
-                        You are a helpful travel assistant.
-
-                        The user asked: "{user_query}"
-
-                        We couldn't find exact matches, but here are some popular travel packages:
-
-                        {formatted_list}
-
-                        Please format this as a friendly, inviting travel recommendation showing duration, price, and Package ID clearly.
-                        """
-            response = call_deepseek(prompt)
-
-    state.messages.append({"role": "assistant", "content": response})
-    return state
+            answer = _combined_answer(user_query, results, kinds, history)
+
+        context = dict(state.context)
+        context.update({name: getattr(entities, name) for name in _CARRIED})
+        context["destinations"] = entities.destinations
+        package = results.get("package")
+        if package is not None and package["mode"] != "followup" and answer.items:
+            context["package_ids"] = [item_id(item) for item in answer.items]
+            context["selected_package"] = context["package_ids"][0]
+        elif state.package_id is not None:
+            context["selected_package"] = state.package_id
+        answer.context = context
+
+        if answer.prompt is not None:
+            if history:
+                answer.facets.append("history:" + hashlib.blake2b(history.encode(), digest_size=8).hexdigest())
+            answer.cache_key = response_cache.key(
+                llm.model, answer.prompt, answer.intent, entities.destinations,
+                [item_id(item) for item in answer.items], answer.facets,
+                listing=package is not None and package["mode"] != "followup",
+            )
+        if not answer.path:
+            answer.path = "llm" if answer.prompt is not None else "canned"
+
+    update: Dict[str, Any] = {"answer": answer, "context": answer.context}
+    if answer.prompt is None:
+        update["messages"] = state.messages + [{"role": "assistant", "content": answer.text}]
+    return update
+
+def route_generation(state: AgentState) -> str:
+    from langgraph.graph import END
+
+    return "generate" if state.generate and state.answer.prompt is not None else END
+
+@timed("generate")
+async def generate(state: AgentState) -> Dict[str, Any]:
+    answer = state.answer
+    response = await call_deepseek(answer.prompt, answer.cache_key)
+    return {"messages": state.messages + [{"role": "assistant", "content": response}]}
 
 def build_graph():
+    # langgraph is imported here rather than at module load: it is the
+    # slowest import in the app and only the compiled graph needs it.
+    from langgraph.graph import END, StateGraph
+
     builder = StateGraph(AgentState)
-    builder.add_node("query_node", query_node)
-    builder.set_entry_point("query_node")
-    builder.set_finish_point("query_node")
+    builder.add_node("understand", understand)
+    for node in FETCH_NODES.values():
+        builder.add_node(node, globals()[node])
+        builder.add_edge(node, "compose")
+    builder.add_node("compose", compose)
+    builder.add_node("generate", generate)
+    builder.set_entry_point("understand")
+    builder.add_conditional_edges("understand", route_fetches, list(FETCH_NODES.values()) + ["compose"])
+    builder.add_conditional_edges("compose", route_generation, ["generate", END])
+    builder.set_finish_point("generate")
     logger.info("Graph built successfully")
-    return builder.compile()
\ No newline at end of file
+    return builder.compile()
+
+_graph = None
+
+def get_graph():
+    global _graph
+    if _graph is None:
+        _graph = build_graph()
+    return _graph
+
+async def prepare_answer(
+    user_query: str,
+    history: Sequence[dict] = (),
+    summary: str = "",
+    context: Optional[Dict[str, Any]] = None,
+) -> PreparedAnswer:
+    """
+    Run the graph up to (not including) generation, for callers that stream.
+
+    ``history``, ``summary`` and ``context`` come from the user's session;
+    a follow-up that refers to a package shown earlier reuses it instead of
+    running retrieval again.
+    """
+    result = await get_graph().ainvoke({
+        "messages": list(history) + [{"role": "user", "content": user_query}],
+        "summary": summary,
+        "context": dict(context or {}),
+        "generate": False,
+    })
+    answer = result["answer"]
+    answer.timings = result["timings"]
+    return answer
+
+async def answer_question(question: str, session_id: Optional[str] = None) -> Dict[str, Any]:
+    """One full turn through the graph: load the session, answer, record the exchange."""
+    session = await sessions.load(session_id)
+    state = {
+        "messages": session.messages + [{"role": "user", "content": question}],
+        "summary": session.summary,
+        "context": session.context,
+    }
+    started = time.perf_counter()
+    result = await get_graph().ainvoke(state)
+    response_text = result["messages"][-1]["content"]
+    logger.debug("AI response generated (%s chars)", len(response_text))
+    logger.info("Graph node timings (ms): %s", result["timings"])
+
+    await sessions.record(session, question, response_text, result["context"])
+    answer = result["answer"]
+    path_stats.observe(answer.path, time.perf_counter() - started, answer.prompt_tokens)
+    return {
+        "response": response_text, "session_id": session.session_id, "path": answer.path,
+        "prompt_tokens": answer.prompt_tokens, "timings": result["timings"], "stale": bool(stale_sources()),
+    }
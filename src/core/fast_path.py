@@ -0,0 +1,171 @@
+"""
+Deterministic answers for structured questions.
+
+A large share of queries needs no generation: "list Kerala packages under
+20000", "package ID X details", "how many nights is Goa Beach Escape".
+Once retrieval has run, ``fast_answer`` recognises these from the matched
+entities and the wording and renders the reply from catalog data with a
+template. Anything open-ended ("suggest", "best", "plan my trip") returns
+None and goes to the LLM as before.
+
+``path_stats`` counts how many queries each path served and their latency.
+"""
+import re
+import statistics
+from collections import deque
+from typing import Any, Deque, Dict, List, Optional
+
+from ..services.catalog import PackageRecord, make_record
+from .matcher import QueryEntities
+
+_OPEN_ENDED = re.compile(
+    r"\b(?:recommend\w*|suggest\w*|best|better|ideal|compare|comparison|vs|versus|why|should|"
+    r"plan|planning|itinerary|tips?|advice|worth|things to do|what to do|tell me (?:more )?about)\b"
+)
+_DURATION = re.compile(r"\b(?:how many (?:nights|days)|how long|duration)\b")
+_DETAILS = re.compile(r"\b(?:details?|info|information|overview)\b")
+_LIST = re.compile(r"\b(?:list|show|packages?|trips?|tours?|options)\b")
+_WORD = re.compile(r"[a-z0-9]+")
+
+
+def _money(value: float) -> str:
+    return f"₹{value:,.0f}" if value != float("inf") else "price on request"
+
+
+def _duration(record: PackageRecord) -> str:
+    return f"{record.days} days / {record.nights} nights" if record.days or record.nights else "duration on request"
+
+
+def _title(record: PackageRecord) -> str:
+    return f"{record.name or 'Package'} (ID: {record.package_id})"
+
+
+def _named_package(query: str, records: List[PackageRecord]) -> Optional[PackageRecord]:
+    """The retrieved package the query names outright ("how long is Goa Beach Escape")."""
+    words = set(_WORD.findall(query))
+    for record in records:
+        name = [w for w in _WORD.findall(record.name.lower()) if len(w) > 2]
+        if name and set(name) <= words:
+            return record
+    return None
+
+
+def _fact(record: PackageRecord, query: str, entities: QueryEntities, hints: Dict[str, str]) -> Optional[str]:
+    if _DURATION.search(query):
+        return f"{_title(record)} is {_duration(record)}, starting from {_money(record.price)} per package."
+    if _DETAILS.search(query):
+        lines = [
+            f"{_title(record)}",
+            f"- Destinations: {', '.join(record.destinations) or 'N/A'}",
+            f"- Duration: {_duration(record)}",
+            f"- Starting from: {_money(record.price)}",
+        ]
+        description = str(record.summary.get("description") or record.details.get("description") or "").strip()
+        if description:
+            lines.append(f"- About: {description[:300]}")
+        lines.append("\nAsk me for its hotels, activities or a price for your party.")
+        return "\n".join(lines)
+    if "pricing" in entities.intents:
+        if hints.get(record.package_id):
+            return f"{_title(record)} costs {hints[record.package_id]} ({_duration(record)})."
+        if entities.adults is not None or entities.children is not None or entities.month is not None:
+            return None  # the catalog price is not for this party or month; let the pricing path answer
+        return f"{_title(record)} starts from {_money(record.price)} ({_duration(record)})."
+    return None
+
+
+def _matches(record: PackageRecord, entities: QueryEntities) -> bool:
+    if entities.destinations:
+        wanted = {d.lower() for d in entities.destinations}
+        if not wanted & {d.lower() for d in record.destinations}:
+            return False
+    if entities.max_price is not None and record.price > entities.max_price:
+        return False
+    return entities.min_price is None or record.price >= entities.min_price
+
+
+def _listing(records: List[PackageRecord], entities: QueryEntities, hints: Dict[str, str]) -> str:
+    scope = " / ".join(d.title() for d in entities.destinations)
+    filters = []
+    if entities.max_price is not None:
+        filters.append(f"under {_money(entities.max_price)}")
+    if entities.min_price is not None:
+        filters.append(f"over {_money(entities.min_price)}")
+    if entities.nights is not None:
+        filters.append(f"{entities.nights} nights")
+    elif entities.days is not None:
+        filters.append(f"{entities.days} days")
+    header = f"Here {'is' if len(records) == 1 else 'are'} {len(records)} {scope + ' ' if scope else ''}" \
+             f"package{'' if len(records) == 1 else 's'}{' ' + ', '.join(filters) if filters else ''}:"
+    lines = [header, ""]
+    for i, record in enumerate(records, 1):
+        line = f"{i}. {_title(record)} — {_duration(record)}, from {_money(record.price)}"
+        if hints.get(record.package_id):
+            line += f" ({hints[record.package_id]})"
+        lines.append(line)
+    lines.append("\nReply with a package number for details, hotels or a price for your party.")
+    return "\n".join(lines)
+
+
+def fast_answer(
+    query: str,
+    entities: QueryEntities,
+    found: Dict[str, Any],
+    hints: Optional[Dict[str, str]] = None,
+) -> Optional[str]:
+    """Templated reply for a structured package query, or None if it needs the LLM."""
+    query = query.lower()
+    hints = hints or {}
+    if _OPEN_ENDED.search(query) or not found["items"]:
+        return None
+    records = [make_record(item) for item in found["items"][:5]]
+    if found["mode"] == "followup":
+        return _fact(records[0], query, entities, hints)
+    if found["mode"] != "search":
+        return None
+    named = _named_package(query, records)
+    if named is not None:
+        return _fact(named, query, entities, hints)
+    filtered = entities.max_price is not None or entities.min_price is not None \
+        or entities.days is not None or entities.nights is not None
+    if _LIST.search(query) and (entities.destinations or filtered) and not _DURATION.search(query) \
+            and not _DETAILS.search(query):
+        # The header names the destinations and price range, so list only records that match them;
+        # retrieval ranks by similarity and may mix in others.
+        records = [record for record in records if _matches(record, entities)]
+        return _listing(records, entities, hints) if records else None
+    return None
+
+
+class PathStats:
+    """Share of queries answered per path ("fast" templates vs. "llm") and their latency."""
+
+    def __init__(self, window: int = 1000):
+        self.counts: Dict[str, int] = {}
+        self.prompt_tokens: Dict[str, int] = {}
+        self._latencies: Dict[str, Deque[float]] = {}
+        self.window = window
+
+    def observe(self, path: str, seconds: float, prompt_tokens: int = 0) -> None:
+        self.counts[path] = self.counts.get(path, 0) + 1
+        self.prompt_tokens[path] = self.prompt_tokens.get(path, 0) + prompt_tokens
+        self._latencies.setdefault(path, deque(maxlen=self.window)).append(seconds)
+
+    def stats(self) -> dict:
+        total = sum(self.counts.values())
+        paths = {}
+        for path, count in self.counts.items():
+            latencies = sorted(self._latencies[path])
+            cuts = statistics.quantiles(latencies, n=100) if len(latencies) > 1 else latencies * 99
+            paths[path] = {
+                "queries": count,
+                "share": round(count / total, 4),
+                "p50_ms": round(cuts[49] * 1000, 2),
+                "p95_ms": round(cuts[94] * 1000, 2),
+                "mean_ms": round(statistics.fmean(latencies) * 1000, 2),
+                "avg_prompt_tokens": round(self.prompt_tokens[path] / count, 1),
+            }
+        return {"queries": total, "paths": paths}
+
+
+path_stats = PathStats()
@@ -0,0 +1,303 @@
+"""
+Compiled query matcher for destinations, intents, themes and trip hints.
+
+A token trie built once holds every destination, alias and keyword; one walk
+over the query's tokens finds all of them at word boundaries. A single regex
+pass picks up trip hints (days, nights, party size, budget, month), and words left
+unmatched are checked against a one-edit deletion index so that typos like
+"keral" or "manalli" still resolve.
+"""
+import re
+from dataclasses import dataclass, field
+from typing import Dict, Iterable, List, Optional, Set, Tuple
+
+from ..services.catalog import catalog
+from ..utils.logger import setup_logger
+
+logger = setup_logger(__name__)
+
+DESTINATIONS = [
+    "goa", "kerala", "manali", "bali", "kodaikanal", "ooty",
+    "rajasthan", "andaman", "himachal", "shimla", "darjeeling",
+]
+
+DESTINATION_ALIASES = {
+    "kodai": "kodaikanal",
+    "udhagamandalam": "ooty",
+    "ooty hills": "ooty",
+    "port blair": "andaman",
+    "havelock": "andaman",
+    "andaman and nicobar": "andaman",
+    "andamans": "andaman",
+    "simla": "shimla",
+    "himachal pradesh": "himachal",
+    "jaipur": "rajasthan",
+    "udaipur": "rajasthan",
+    "munnar": "kerala",
+    "alleppey": "kerala",
+    "alappuzha": "kerala",
+}
+
+# Checked in this order, so "hotel" wins over "vehicle" wins over "activity".
+# "pricing" never becomes the primary intent; it asks for quotes on top of it.
+INTENT_KEYWORDS = {
+    "hotel": ["hotel", "hotels", "stay", "stays", "accommodation", "resort", "resorts"],
+    "vehicle": ["vehicle", "vehicles", "car", "cars", "transport", "taxi", "taxis", "cab", "cabs"],
+    "activity": [
+        "activity", "activities", "tour", "tours", "things to do",
+        "adventure", "adventures", "experience", "experiences", "sightseeing",
+    ],
+    "pricing": ["price", "prices", "pricing", "cost", "costs", "how much", "quote", "fare", "rates"],
+}
+PRIMARY_INTENTS = ("hotel", "vehicle", "activity")
+
+THEMES = {
+    "honeymoon": ["honeymoon", "romantic", "couple getaway"],
+    "family": ["family", "kids friendly", "family friendly"],
+    "adventure": ["adventure", "trek", "trekking", "rafting", "paragliding"],
+    "beach": ["beach", "beaches", "island", "islands"],
+    "hills": ["hill station", "hills", "mountains", "snow"],
+    "pilgrimage": ["pilgrimage", "temple", "temples", "spiritual"],
+    "wildlife": ["wildlife", "safari", "jungle"],
+    "luxury": ["luxury", "premium", "5 star", "five star"],
+    "budget": ["budget", "cheap", "affordable", "low cost"],
+}
+
+_NUMBER_WORDS = {
+    "one": 1, "two": 2, "three": 3, "four": 4, "five": 5,
+    "six": 6, "seven": 7, "eight": 8, "nine": 9, "ten": 10,
+}
+_NUM = r"(\d+|" + "|".join(_NUMBER_WORDS) + r")"
+
+_MONTHS = {
+    "jan": 1, "feb": 2, "mar": 3, "apr": 4, "may": 5, "jun": 6,
+    "jul": 7, "aug": 8, "sep": 9, "oct": 10, "nov": 11, "dec": 12,
+}
+
+# The lookahead lists every alternative's first character so the engine can
+# skip most word starts without trying the whole alternation (~3x faster).
+_HINTS = re.compile(
+    r"\b(?=[\dotfsenchajwublmdi])(?:"
+    r"(?P<nd>\b(?P<nd_n>\d+)\s*n\s*/?\s*(?P<nd_d>\d+)\s*d\b)"
+    r"|(?P<days>\b" + _NUM.replace("(", "(?P<days_n>", 1) + r"[\s-]*days?\b)"
+    r"|(?P<nights>\b" + _NUM.replace("(", "(?P<nights_n>", 1) + r"[\s-]*nights?\b)"
+    r"|(?P<adults>\b" + _NUM.replace("(", "(?P<adults_n>", 1)
+    + r"\s*(?:adults?|people|persons?|pax|travell?ers|guests|friends)\b)"
+    r"|(?P<children>\b" + _NUM.replace("(", "(?P<children_n>", 1) + r"\s*(?:kids?|child(?:ren)?|infants?)\b)"
+    r"|(?P<family>\bfamily of\s+" + _NUM.replace("(", "(?P<family_n>", 1) + r"\b)"
+    r"|(?P<couple>\b(?:couple|honeymoon(?:ers)?|two of us)\b)"
+    r"|(?P<solo>\b(?:solo|alone|just me)\b)"
+    r"|(?P<weekend>\bweekend\b)"
+    r"|(?P<month>\b(?:in|during|for|this|next|early|late|mid)\s+(?P<month_n>jan|feb|mar|apr|may|jun|jul|aug|sept?|oct|nov|dec)"
+    r"(?:uary|ruary|ch|il|e|y|ust|ember|ober)?\b)"
+    r"|(?P<max_price>\b(?:under|below|less than|within|upto|up to|max(?:imum)?|budget of)\s*"
+    r"(?:rs\.?|inr|₹)?\s*(?P<max_price_n>\d[\d,]*(?:\.\d+)?)\s*(?P<max_price_k>k|lakh|lac)?\b)"
+    r"|(?P<min_price>\b(?:above|over|more than|at least|starting)\s*"
+    r"(?:rs\.?|inr|₹)?\s*(?P<min_price_n>\d[\d,]*(?:\.\d+)?)\s*(?P<min_price_k>k|lakh|lac)?\b)"
+    r")"
+)
+
+_TOKEN = re.compile(r"[a-z0-9]+")
+# Shorter words give too many false corrections ("ball" -> "bali").
+_MIN_FUZZY_LENGTH = 5
+
+
+@dataclass
+class QueryEntities:
+    destinations: List[str] = field(default_factory=list)
+    intents: List[str] = field(default_factory=list)
+    themes: List[str] = field(default_factory=list)
+    days: Optional[int] = None
+    nights: Optional[int] = None
+    adults: Optional[int] = None
+    children: Optional[int] = None
+    min_price: Optional[float] = None
+    max_price: Optional[float] = None
+    month: Optional[int] = None
+    corrections: Dict[str, str] = field(default_factory=dict)
+
+    @property
+    def intent(self) -> str:
+        for name in PRIMARY_INTENTS:
+            if name in self.intents:
+                return name
+        return "package"
+
+
+class PhraseTrie:
+    """
+    Token-level trie over every keyword phrase.
+
+    Matching walks whole tokens rather than characters, so word boundaries
+    come for free and a query costs one dict lookup per token in the common
+    case. Each phrase maps to one or more ``(kind, value)`` payloads.
+    """
+
+    _END = ""
+
+    def __init__(self, phrases: Iterable[Tuple[str, Tuple[str, str]]]):
+        self._root: dict = {}
+        for phrase, payload in phrases:
+            node = self._root
+            for token in _TOKEN.findall(phrase):
+                node = node.setdefault(token, {})
+            node.setdefault(self._END, []).append(payload)
+
+    def finditer(self, tokens: List[str]):
+        """Yield ``(start, end, payload)`` token spans for every phrase match."""
+        root, end_key = self._root, self._END
+        for i, token in enumerate(tokens):
+            node = root.get(token)
+            j = i + 1
+            while node is not None:
+                for payload in node.get(end_key, ()):
+                    yield i, j, payload
+                if j == len(tokens):
+                    break
+                node = node.get(tokens[j])
+                j += 1
+
+
+def _deletes(word: str) -> Set[str]:
+    return {word[:i] + word[i + 1:] for i in range(len(word))}
+
+
+def _within_one_edit(a: str, b: str) -> bool:
+    """Optimal string alignment distance <= 1 (adjacent swaps count as one)."""
+    if a == b:
+        return True
+    if abs(len(a) - len(b)) > 1:
+        return False
+    if len(a) == len(b):
+        diffs = [i for i in range(len(a)) if a[i] != b[i]]
+        if len(diffs) == 1:
+            return True
+        return len(diffs) == 2 and diffs[1] == diffs[0] + 1 and a[diffs[0]] == b[diffs[1]] and a[diffs[1]] == b[diffs[0]]
+    short, long_ = (a, b) if len(a) < len(b) else (b, a)
+    return any(long_[:i] + long_[i + 1:] == short for i in range(len(long_)))
+
+
+class QueryMatcher:
+    def __init__(self, destinations: Iterable[str] = (), aliases: Optional[Dict[str, str]] = None):
+        aliases = {**DESTINATION_ALIASES, **(aliases or {})}
+        canonical = {d.lower().strip() for d in list(DESTINATIONS) + list(destinations) if d and d.strip()}
+
+        patterns: List[Tuple[str, Tuple[str, str]]] = []
+        for name in canonical:
+            patterns.append((name, ("destination", name)))
+        for alias, target in aliases.items():
+            patterns.append((alias, ("destination", target)))
+        for intent, keywords in INTENT_KEYWORDS.items():
+            patterns.extend((k, ("intent", intent)) for k in keywords)
+        for theme, keywords in THEMES.items():
+            patterns.extend((k, ("theme", theme)) for k in keywords)
+        self.trie = PhraseTrie(patterns)
+
+        # One-edit deletion index over single-word destinations and aliases.
+        self._fuzzy: Dict[str, Set[str]] = {}
+        self._fuzzy_targets: Dict[str, str] = {}
+        self._corrections: Dict[str, Optional[str]] = {}
+        for word, target in [(n, n) for n in canonical] + list(aliases.items()):
+            if " " in word or len(word) < _MIN_FUZZY_LENGTH:
+                continue
+            self._fuzzy_targets[word] = target
+            for key in _deletes(word) | {word}:
+                self._fuzzy.setdefault(key, set()).add(word)
+
+    def _correct(self, token: str) -> Optional[str]:
+        cached = self._corrections.get(token, False)
+        if cached is not False:
+            return cached
+        candidates: Set[str] = set()
+        for key in _deletes(token) | {token}:
+            candidates |= self._fuzzy.get(key, set())
+        matches = sorted(w for w in candidates if _within_one_edit(token, w))
+        result = matches[0] if matches else None
+        if len(self._corrections) < 10000:
+            self._corrections[token] = result
+        return result
+
+    def match(self, query: str) -> QueryEntities:
+        text = query.lower()
+        tokens = _TOKEN.findall(text)
+        entities = QueryEntities()
+        buckets = {"destination": entities.destinations, "intent": entities.intents, "theme": entities.themes}
+        covered: Set[int] = set()
+
+        for start, end, (kind, value) in self.trie.finditer(tokens):
+            covered.update(range(start, end))
+            bucket = buckets[kind]
+            if value not in bucket:
+                bucket.append(value)
+
+        for m in _HINTS.finditer(text):
+            self._apply_hint(m, entities)
+
+        for i, token in enumerate(tokens):
+            if i in covered or len(token) < _MIN_FUZZY_LENGTH or token.isdigit():
+                continue
+            word = self._correct(token)
+            if word is not None:
+                target = self._fuzzy_targets[word]
+                entities.corrections[token] = target
+                if target not in entities.destinations:
+                    entities.destinations.append(target)
+        return entities
+
+    @staticmethod
+    def _apply_hint(m: "re.Match[str]", entities: QueryEntities) -> None:
+        def num(group: str) -> int:
+            raw = m.group(group)
+            return _NUMBER_WORDS.get(raw, None) or int(raw)
+
+        def price(group: str) -> float:
+            value = float(m.group(group + "_n").replace(",", ""))
+            unit = m.group(group + "_k")
+            if unit == "k":
+                value *= 1_000
+            elif unit in ("lakh", "lac"):
+                value *= 100_000
+            return value
+
+        # Named sub-groups are nested, so the outer alternative closes last.
+        kind = m.lastgroup
+        if kind == "nd":
+            entities.nights, entities.days = int(m.group("nd_n")), int(m.group("nd_d"))
+        elif kind == "days":
+            entities.days = num("days_n")
+        elif kind == "nights":
+            entities.nights = num("nights_n")
+        elif kind == "adults":
+            entities.adults = num("adults_n")
+        elif kind == "children":
+            entities.children = num("children_n")
+        elif kind == "family":
+            entities.adults = entities.adults or 2
+            entities.children = max(num("family_n") - entities.adults, 0)
+        elif kind == "couple":
+            entities.adults = entities.adults or 2
+        elif kind == "solo":
+            entities.adults = 1
+        elif kind == "weekend":
+            entities.nights = entities.nights or 2
+        elif kind == "month":
+            entities.month = _MONTHS[m.group("month_n")[:3]]
+        elif kind == "max_price":
+            entities.max_price = price("max_price")
+        elif kind == "min_price":
+            entities.min_price = price("min_price")
+
+
+_matcher: Optional[QueryMatcher] = None
+_matcher_version = -1
+
+
+def get_matcher() -> QueryMatcher:
+    """Matcher built from the synced catalog, rebuilt when the index changes."""
+    global _matcher, _matcher_version
+    index = catalog.index
+    if _matcher is None or _matcher_version != index.version:
+        _matcher = QueryMatcher(destinations=index.by_destination.keys())
+        _matcher_version = index.version
+        logger.info("Built query matcher for catalog version %s", index.version)
+    return _matcher
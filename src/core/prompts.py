@@ -0,0 +1,304 @@
+"""
+Prompt assembly: templates, compact item lines and a token budget.
+
+Every prompt the agent sends is defined once in ``TEMPLATES`` and
+whitespace-normalised, so the model is billed for words, not indentation.
+Retrieved items become one compact line each carrying only what an answer
+needs (name, ID, duration, price, highlights) and are added in relevance
+order until ``PROMPT_TOKEN_BUDGET`` is spent; lower-ranked items are dropped.
+Token counts come from tiktoken when it is installed and from a word-piece
+estimate otherwise.
+"""
+import re
+from dataclasses import dataclass
+from typing import Any, Callable, Dict, List, Optional, Sequence, Tuple
+
+from ..config import settings
+from ..services.catalog import extract_destinations
+from ..utils.logger import setup_logger
+
+try:
+    import tiktoken
+except ImportError:  # exact token counts are optional
+    tiktoken = None
+
+logger = setup_logger(__name__)
+
+# Roughly one token per short word or 5-character word piece, and per symbol.
+_PIECE = re.compile(r"\w{1,5}|[^\w\s]")
+
+
+def normalize(text: str) -> str:
+    """Strip indentation and runs of spaces; keep at most one blank line."""
+    lines = [" ".join(line.split()) for line in text.strip().splitlines()]
+    return re.sub(r"\n{3,}", "\n\n", "\n".join(lines))
+
+
+class TokenCounter:
+    def __init__(self, encoding: str = "cl100k_base"):
+        self._encoding = None
+        if tiktoken is not None:
+            try:
+                self._encoding = tiktoken.get_encoding(encoding)
+            except Exception as e:  # the encoding file may not be downloadable
+                logger.warning("tiktoken encoding %s unavailable, estimating tokens: %s", encoding, e)
+
+    @property
+    def exact(self) -> bool:
+        return self._encoding is not None
+
+    def __call__(self, text: str) -> int:
+        if self._encoding is not None:
+            return len(self._encoding.encode(text))
+        return len(_PIECE.findall(text))
+
+
+TEMPLATES = {name: normalize(text) for name, text in {
+    "package_search": """
+        {history}
+        You are a helpful travel assistant.
+        The user asked about packages: "{query}"
+
+        Matching packages, most relevant first:
+        {items}
+
+        Summarize each package with name, duration, highlights, price and Package ID, grouped by destination if applicable. Be warm and clear, and end with a friendly call to action.
+        """,
+    "package_popular": """
+        {history}
+        You are a helpful travel assistant.
+        The user asked: "{query}"
+
+        There were no exact matches, but these popular packages may interest them:
+        {items}
+
+        Present them as a friendly, inviting recommendation showing duration, price and Package ID clearly.
+        """,
+    "package_followup": """
+        {history}
+        You are a helpful travel assistant.
+        The user asked a follow-up about this package: "{query}"
+
+        {items}
+
+        Answer the question using these details, and mention the Package ID.
+        """,
+    "hotel": """
+        {history}
+        You are a helpful travel assistant.
+        The user asked about hotels: "{query}"
+
+        Hotel options matching the request, best first:
+        {items}
+
+        Give a warm, clear and friendly summary of these hotels including name, highlights, price (if available) and Hotel ID. End with a call to action encouraging booking or further questions.
+        """,
+    "vehicle": """
+        {history}
+        You are a helpful travel assistant.
+        The user asked about vehicles: "{query}"
+
+        Vehicle options matching the request, best first:
+        {items}
+
+        Give a friendly summary of these vehicles including name, type, price (if available) and Vehicle ID.
+        End with a call to action encouraging booking or further questions.
+        """,
+    "activity": """
+        {history}
+        You are a helpful travel assistant.
+        The user asked about activities: "{query}"
+
+        Activity options matching the request, best first:
+        {items}
+
+        Give a warm, engaging summary of these activities including name, highlights, price (if available) and Activity ID. End with a call to action encouraging booking or further questions.
+        """,
+    "combined": """
+        {history}
+        You are a helpful travel assistant.
+        The user asked: "{query}"
+
+        Here is what matches their request:
+        {items}
+        {note}
+
+        Summarize each group warmly and clearly, including names, highlights, prices (if available) and IDs.
+        End with a call to action encouraging booking or further questions.
+        """,
+}.items()}
+
+
+# -- compact item lines ------------------------------------------------------
+
+def _first(item: Dict[str, Any], *keys: str) -> Any:
+    for key in keys:
+        value = item.get(key)
+        if value not in (None, "", [], {}):
+            return value
+    return None
+
+
+def _price(value: Any) -> Optional[str]:
+    try:
+        return f"₹{float(value):,.0f}"
+    except (TypeError, ValueError):
+        return None
+
+
+def _clip(text: Any, limit: int) -> str:
+    text = " ".join(str(text).split())
+    return text if len(text) <= limit else text[:limit - 1].rstrip() + "…"
+
+
+def _join(parts: Sequence[Optional[str]]) -> str:
+    return " | ".join(part for part in parts if part)
+
+
+def _highlights(item: Dict[str, Any], limit: int = 3) -> Optional[str]:
+    values = _first(item, "highlights", "amenities", "inclusions", "features")
+    if isinstance(values, list):
+        names = [v.get("name") or v.get("title") if isinstance(v, dict) else v for v in values]
+        return ", ".join(_clip(n, 40) for n in names[:limit] if n) or None
+    return _clip(values, 120) if values else None
+
+
+def _itinerary(item: Dict[str, Any], limit: int = 3) -> Optional[str]:
+    days = item.get("itinerary")
+    if not isinstance(days, list):
+        return None
+    sights = []
+    for day in days:
+        if isinstance(day, dict):
+            text = day.get("description") or day.get("title")
+            if text and text not in sights:
+                sights.append(_clip(text, 50))
+        if len(sights) == limit:
+            break
+    return "; ".join(sights) or None
+
+
+def package_line(item: Dict[str, Any]) -> str:
+    days, nights = _first(item, "noOfDays"), _first(item, "noOfNight")
+    price = _price(_first(item, "startFrom", "price", "totalPrice"))
+    description = _first(item, "description")
+    return _join([
+        f"{_first(item, 'packageName') or 'N/A'} (ID: {_first(item, 'packageId', 'id', '_id') or 'N/A'})",
+        f"{days}D/{nights}N" if days or nights else None,
+        f"from {price}" if price else None,
+        ", ".join(extract_destinations(item)) or None,
+        _clip(description, 120) if description else None,
+        _itinerary(item),
+    ])
+
+
+def hotel_line(item: Dict[str, Any]) -> str:
+    stars = _first(item, "hotelStar", "starRating", "rating")
+    price = _price(_first(item, "price", "amount", "startFrom"))
+    return _join([
+        f"{_first(item, 'hotelName', 'name') or 'N/A'} (ID: {_first(item, 'hotelId', 'id') or 'N/A'})",
+        f"{stars}★" if stars else None,
+        _clip(_first(item, "location", "city", "address") or "", 60) or None,
+        price,
+        _highlights(item),
+    ])
+
+
+def vehicle_line(item: Dict[str, Any]) -> str:
+    seats = _first(item, "seatCapacity", "capacity", "seats")
+    return _join([
+        f"{_first(item, 'vehicleName', 'name') or 'N/A'} (ID: {_first(item, 'vehicleId', 'id') or 'N/A'})",
+        _clip(_first(item, "vehicleType", "type") or "", 40) or None,
+        f"{seats} seats" if seats else None,
+        _price(_first(item, "price", "amount")),
+    ])
+
+
+def activity_line(item: Dict[str, Any]) -> str:
+    description = _first(item, "description")
+    return _join([
+        f"{_first(item, 'activityName', 'name') or 'N/A'} (ID: {_first(item, 'activityId', 'id') or 'N/A'})",
+        _clip(_first(item, "duration") or "", 40) or None,
+        _price(_first(item, "price", "amount")),
+        _clip(description, 100) if description else None,
+    ])
+
+
+def itinerary_line(day: Dict[str, Any]) -> str:
+    label = f"Day {day.get('day')}" if day.get("day") is not None else "Day"
+    return _join([label, _clip(day.get("title") or "", 60) or None, _clip(day.get("description") or "", 160) or None])
+
+
+SERIALIZERS: Dict[str, Callable[[Dict[str, Any]], str]] = {
+    "package": package_line,
+    "hotel": hotel_line,
+    "vehicle": vehicle_line,
+    "activity": activity_line,
+    "itinerary": itinerary_line,
+}
+
+# (heading or "", kind, items in relevance order)
+Section = Tuple[str, str, Sequence[Dict[str, Any]]]
+
+
+@dataclass
+class Prompt:
+    text: str
+    tokens: int
+    items: int
+    dropped: int
+
+
+class PromptBuilder:
+    def __init__(self, budget: int, counter: Optional[TokenCounter] = None):
+        self.budget = budget
+        self.count = counter or TokenCounter()
+
+    def build(
+        self,
+        template: str,
+        sections: Sequence[Section],
+        annotations: Optional[Dict[str, str]] = None,
+        **fields: str,
+    ) -> Prompt:
+        """
+        Render ``TEMPLATES[template]`` with the sections' items as compact lines.
+
+        Items are taken rank by rank across sections (every section's first
+        item, then every second item, ...) while the prompt stays within the
+        budget; the top item of each section is always kept, and a section
+        stops at its first item that does not fit. ``annotations``
+        maps an item ID to extra text for its line (e.g. a price hint).
+        """
+        annotations = annotations or {}
+        fields.setdefault("history", "")
+        fields.setdefault("note", "")
+        lines: List[List[str]] = [[] for _ in sections]
+        used = self.count(TEMPLATES[template].format(items="", **fields))
+        total = sum(len(items) for _, _, items in sections)
+        included = 0
+        full = [False] * len(sections)
+        for rank in range(max((len(items) for _, _, items in sections), default=0)):
+            for position, (_, kind, items) in enumerate(sections):
+                if rank >= len(items) or full[position]:
+                    continue
+                line = f"{rank + 1}. {SERIALIZERS[kind](items[rank])}"
+                note = annotations.get(str(_first(items[rank], "packageId", "id") or ""))
+                if note:
+                    line += f" — {note}"
+                cost = self.count(line) + 1
+                if rank > 0 and used + cost > self.budget:
+                    full[position] = True
+                    continue
+                lines[position].append(line)
+                used += cost
+                included += 1
+        blocks = []
+        for (heading, _, _), section_lines in zip(sections, lines):
+            if section_lines:
+                blocks.append("\n".join(([heading] if heading else []) + section_lines))
+        text = normalize(TEMPLATES[template].format(items="\n\n".join(blocks), **fields))
+        return Prompt(text, self.count(text), included, total - included)
+
+
+prompt_builder = PromptBuilder(settings.PROMPT_TOKEN_BUDGET)
@@ -0,0 +1,84 @@
+"""
+Resolve free-text destinations and package names to candidate packageIds.
+
+Hotels, vehicles and activities are per package upstream, so "hotels in
+Goa" has to become a handful of Goa packageIds before any lookup. The
+resolver maps destination names (exact, then partial: "andaman" matches
+"Andaman & Nicobar") to packages held in the local index, applies the
+duration and budget filters from the query, and ranks the candidates by
+BM25 relevance so a named package ("Goa Beach Escape") comes first.
+"""
+import re
+from typing import Dict, List, Optional
+
+from ..utils.logger import setup_logger
+from .matcher import QueryEntities
+from .retrieval import Retriever
+
+logger = setup_logger(__name__)
+
+# "package ID GOA123", "id: GOA123", "package #GOA123"
+_ID_MENTION = re.compile(r"\b(?:package\s*id|id|package)\s*[:#]?\s*#?([A-Za-z0-9_-]*\d[A-Za-z0-9_-]*)", re.IGNORECASE)
+
+
+def mentions_package_id(query: str) -> bool:
+    return _ID_MENTION.search(query) is not None
+
+
+class EntityResolver:
+    def __init__(self, retriever: Retriever):
+        self.retriever = retriever
+        self._by_destination: Dict[str, List[int]] = {}
+        self._by_id: Dict[str, str] = {record.package_id.lower(): record.package_id for record in retriever.records}
+        for position, record in enumerate(retriever.records):
+            for name in record.destinations:
+                self._by_destination.setdefault(name.lower(), []).append(position)
+
+    def _destination_matches(self, destination: str) -> List[int]:
+        destination = destination.lower()
+        exact = self._by_destination.get(destination)
+        if exact:
+            return exact
+        return [
+            position
+            for name, positions in self._by_destination.items()
+            if destination in name or name in destination
+            for position in positions
+        ]
+
+    def mentioned_package(self, query: str) -> Optional[str]:
+        """packageId the query spells out ("package ID GOA123 details"), if it is in the index."""
+        for match in _ID_MENTION.finditer(query):
+            package_id = self._by_id.get(match.group(1).lower())
+            if package_id is not None:
+                return package_id
+        return None
+
+    def resolve(self, query: str, entities: Optional[QueryEntities], limit: int = 3) -> List[str]:
+        """Up to ``limit`` packageIds for the query, best first; empty if nothing fits."""
+        records = self.retriever.records
+        candidates: List[int] = []
+        for destination in entities.destinations if entities is not None else []:
+            candidates.extend(self._destination_matches(destination))
+        candidates = [p for p in dict.fromkeys(candidates) if self.retriever.passes(records[p], entities)]
+
+        ranked = self.retriever.search(query, entities, k=max(limit * 10, 50))
+        if candidates:
+            allowed = {records[p].package_id for p in candidates}
+            scores = {record.package_id: score for record, score in ranked if record.package_id in allowed}
+            ordered = sorted(candidates, key=lambda p: (-scores.get(records[p].package_id, 0.0), records[p].price))
+            return [records[p].package_id for p in ordered[:limit]]
+        # No destination: fall back to packages whose name/description match the query.
+        return [record.package_id for record, _ in ranked[:limit]]
+
+
+_resolver: Optional[EntityResolver] = None
+
+
+def get_resolver(retriever: Retriever) -> EntityResolver:
+    """Resolver over ``retriever``'s records, rebuilt only when the retriever changes."""
+    global _resolver
+    if _resolver is None or _resolver.retriever is not retriever:
+        _resolver = EntityResolver(retriever)
+        logger.info("Built entity resolver over %s packages", len(retriever.records))
+    return _resolver
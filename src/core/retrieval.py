@@ -0,0 +1,189 @@
+"""
+Local ranked retrieval over the package catalog.
+
+``Retriever`` scores every package against the query with BM25 over name,
+destinations, description and itinerary text, applies the price and duration
+filters extracted by the matcher, and optionally blends in cosine similarity
+from a NumPy embedding matrix. The prompt then carries a real top-k instead
+of whatever happened to be on the first page.
+"""
+import math
+import re
+import zlib
+from typing import Any, Callable, Dict, Iterable, List, Optional, Sequence, Tuple
+
+from ..config import settings
+from ..services.catalog import PackageRecord, catalog
+from ..utils.logger import setup_logger
+from .matcher import QueryEntities
+
+try:
+    import numpy as np
+except ImportError:  # embeddings are optional
+    np = None
+
+logger = setup_logger(__name__)
+
+_TOKEN = re.compile(r"[a-z0-9]+")
+STOPWORDS = frozenset(
+    "a an and are at best can for from give i in is it me my of on or package packages "
+    "please show some the to trip tour want what with".split()
+)
+
+# Field weights: a match in the package name counts more than one in the itinerary.
+FIELD_WEIGHTS = {"name": 3.0, "destinations": 3.0, "description": 1.0, "itinerary": 0.5}
+
+
+def tokenize(text: str) -> List[str]:
+    return [t for t in _TOKEN.findall(text.lower()) if t not in STOPWORDS]
+
+
+def _flatten(value: Any) -> Iterable[str]:
+    if isinstance(value, str):
+        yield value
+    elif isinstance(value, dict):
+        for item in value.values():
+            yield from _flatten(item)
+    elif isinstance(value, list):
+        for item in value:
+            yield from _flatten(item)
+
+
+def record_fields(record: PackageRecord) -> Dict[str, str]:
+    merged = {**record.summary, **record.details}
+    return {
+        "name": record.name,
+        "destinations": " ".join(record.destinations),
+        "description": str(merged.get("description") or ""),
+        "itinerary": " ".join(_flatten(merged.get("itinerary") or [])),
+    }
+
+
+class HashingEmbedder:
+    """Dependency-free local embedding: hashed character trigrams, L2-normalised."""
+
+    def __init__(self, dims: int = 512):
+        self.dims = dims
+
+    def __call__(self, text: str):
+        vector = np.zeros(self.dims, dtype=np.float32)
+        for token in tokenize(text):
+            padded = f"#{token}#"
+            for i in range(len(padded) - 2):
+                vector[zlib.crc32(padded[i:i + 3].encode()) % self.dims] += 1.0
+        norm = np.linalg.norm(vector)
+        return vector / norm if norm else vector
+
+
+class Retriever:
+    def __init__(
+        self,
+        records: Sequence[PackageRecord],
+        k1: float = 1.2,
+        b: float = 0.75,
+        embedder: Optional[Callable[[str], Any]] = None,
+        embedding_weight: float = 0.3,
+    ):
+        self.records = list(records)
+        self.k1 = k1
+        self.b = b
+        self.embedding_weight = embedding_weight
+
+        # Field-weighted term frequencies folded into one BM25 document per package.
+        self._postings: Dict[str, List[Tuple[int, float]]] = {}
+        self._lengths: List[float] = []
+        for doc_id, record in enumerate(self.records):
+            tf: Dict[str, float] = {}
+            for name, text in record_fields(record).items():
+                for token in tokenize(text):
+                    tf[token] = tf.get(token, 0.0) + FIELD_WEIGHTS[name]
+            self._lengths.append(sum(tf.values()))
+            for token, weight in tf.items():
+                self._postings.setdefault(token, []).append((doc_id, weight))
+        self._avg_length = (sum(self._lengths) / len(self._lengths)) if self._lengths else 0.0
+        avg = self._avg_length or 1.0
+        self._norms = [k1 * (1 - b + b * length / avg) for length in self._lengths]
+        count = len(self.records)
+        self._idf = {
+            term: math.log(1 + (count - len(p) + 0.5) / (len(p) + 0.5))
+            for term, p in self._postings.items()
+        }
+
+        self.embedder = embedder if np is not None else None
+        self._matrix = None
+        if self.embedder is not None and self.records:
+            self._matrix = np.vstack([
+                self.embedder(" ".join(record_fields(r).values())) for r in self.records
+            ])
+
+    def _bm25(self, terms: List[str]) -> Dict[int, float]:
+        scores: Dict[int, float] = {}
+        norms, k1 = self._norms, self.k1 + 1
+        for term in set(terms):
+            idf = self._idf.get(term)
+            if idf is None:
+                continue
+            for doc_id, tf in self._postings[term]:
+                scores[doc_id] = scores.get(doc_id, 0.0) + idf * tf * k1 / (tf + norms[doc_id])
+        return scores
+
+    @staticmethod
+    def passes(record: PackageRecord, entities: Optional[QueryEntities]) -> bool:
+        if entities is None:
+            return True
+        if entities.max_price is not None and record.price > entities.max_price:
+            return False
+        if entities.min_price is not None and record.price < entities.min_price:
+            return False
+        if entities.days is not None and record.days and record.days != entities.days:
+            return False
+        if entities.nights is not None and record.nights and record.nights != entities.nights:
+            return False
+        return True
+
+    def search(
+        self, query: str, entities: Optional[QueryEntities] = None, k: int = 5
+    ) -> List[Tuple[PackageRecord, float]]:
+        """Top-``k`` packages for ``query`` that satisfy the entity filters."""
+        terms = tokenize(query)
+        if entities is not None:
+            # Canonical destinations from aliases/typo correction ("kodai" -> "kodaikanal").
+            terms += [t for d in entities.destinations for t in tokenize(d)]
+        scores = self._bm25(terms)
+
+        if self._matrix is not None and terms:
+            similarity = self._matrix @ self.embedder(" ".join(terms))
+            top = max(scores.values(), default=1.0) or 1.0
+            for doc_id in np.flatnonzero(similarity > 0.1):
+                scores[int(doc_id)] = scores.get(int(doc_id), 0.0) + self.embedding_weight * top * float(similarity[doc_id])
+
+        ranked = sorted(scores.items(), key=lambda item: (-item[1], self.records[item[0]].price))
+        results = []
+        for doc_id, score in ranked:
+            record = self.records[doc_id]
+            if self.passes(record, entities):
+                results.append((record, score))
+                if len(results) == k:
+                    break
+        return results
+
+    def filter_only(self, entities: Optional[QueryEntities], k: int = 5) -> List[PackageRecord]:
+        """Cheapest packages that satisfy the filters, for queries with no scoring terms."""
+        matching = [r for r in self.records if self.passes(r, entities)]
+        return sorted(matching, key=lambda r: r.price)[:k]
+
+
+_retriever: Optional[Retriever] = None
+_retriever_version = -1
+
+
+def get_retriever() -> Retriever:
+    """Retriever over the synced catalog, rebuilt when the index version changes."""
+    global _retriever, _retriever_version
+    index = catalog.index
+    if _retriever is None or _retriever_version != index.version:
+        embedder = HashingEmbedder() if settings.RETRIEVAL_EMBEDDINGS and np is not None else None
+        _retriever = Retriever(index.records(), embedder=embedder)
+        _retriever_version = index.version
+        logger.info("Built retriever over %s packages (catalog version %s)", len(index), index.version)
+    return _retriever
@@ -4,9 +4,11 @@ from datetime import datetime
 
 class QueryRequest(BaseModel):
     question: str
+    session_id: Optional[str] = None
 
 class QueryResponse(BaseModel):
     response: str
+    session_id: Optional[str] = None
     error: Optional[str] = None
 
 class PackageBase(BaseModel):
@@ -30,6 +32,23 @@ class PricingRequest(BaseModel):
     noRoomCount: int
     noExtraAdult: int = 0
 
+class PricingItem(PricingRequest):
+    packageId: str
+
+class PricingDateRange(BaseModel):
+    """Every start date from ``fromDate`` to ``toDate`` (inclusive, YYYY-MM-DD) for each package."""
+    packageIds: List[str]
+    fromDate: str
+    toDate: str
+    noAdult: int
+    noChild: int
+    noRoomCount: int
+    noExtraAdult: int = 0
+
+class PricingBatchRequest(BaseModel):
+    items: List[PricingItem] = []
+    range: Optional[PricingDateRange] = None
+
 class PricingResponse(BaseModel):
     totalPrice: float
     breakdown: Optional[Dict[str, Any]] = None
@@ -0,0 +1,312 @@
+"""
+Admission control and load shedding in front of the routes.
+
+``AdmissionMiddleware`` classifies each request by method and path prefix
+into a pool and a priority class, then:
+
+1. charges the client's token bucket (``ADMISSION_RATE`` requests/second,
+   bursts of ``ADMISSION_BURST``) and answers 429 when it is empty;
+2. takes a slot in the pool (per-route concurrency limit). When the pool is
+   full the request waits in a bounded queue, highest priority first, and is
+   answered 503 when the queue is full or its deadline passes.
+
+Both rejections carry ``Retry-After``, so callers back off instead of piling
+onto a saturated worker.
+
+Priority classes, best first: ``catalog`` (``/packages`` reads, their own
+pool, so they never queue behind chats), ``fast`` (the retrieval and
+templating part of ``/query``) and ``llm`` (full generations). A query holds
+its ``agent`` slot only while it is prepared; if it then needs the LLM,
+``generation()`` gives the slot up and queues again at ``llm`` priority.
+Fast-path answers therefore finish without waiting for generations, and
+waiting generations never hold a slot.
+"""
+import asyncio
+import contextvars
+import heapq
+import itertools
+import math
+import time
+from collections import OrderedDict
+from contextlib import asynccontextmanager
+from typing import AsyncIterator, Dict, List, Optional, Sequence, Tuple
+
+from fastapi.responses import JSONResponse
+
+from ..config import settings
+from ..utils.logger import setup_logger
+
+logger = setup_logger(__name__)
+
+CATALOG, FAST, LLM = 0, 1, 2
+
+
+class Overloaded(Exception):
+    """A request refused by admission control (429 rate limited, 503 shed)."""
+
+    def __init__(self, status_code: int, reason: str, retry_after: float):
+        super().__init__(reason)
+        self.status_code = status_code
+        self.reason = reason
+        self.retry_after = max(1, math.ceil(retry_after))
+
+    def response(self) -> JSONResponse:
+        return JSONResponse(
+            {"error": "Too many requests" if self.status_code == 429 else "Server busy", "reason": self.reason,
+             "retry_after": self.retry_after},
+            status_code=self.status_code,
+            headers={"Retry-After": str(self.retry_after)},
+        )
+
+
+class TokenBucket:
+    __slots__ = ("rate", "burst", "tokens", "updated")
+
+    def __init__(self, rate: float, burst: float, now: float):
+        self.rate = rate
+        self.burst = burst
+        self.tokens = burst
+        self.updated = now
+
+    def take(self, now: float, cost: float = 1.0) -> float:
+        """Take ``cost`` tokens; returns 0, or the seconds until they would be available."""
+        self.tokens = min(self.burst, self.tokens + (now - self.updated) * self.rate)
+        self.updated = now
+        if self.tokens >= cost:
+            self.tokens -= cost
+            return 0.0
+        return (cost - self.tokens) / self.rate
+
+
+class ClientRateLimiter:
+    """One token bucket per client, keeping the ``max_clients`` most recently seen."""
+
+    def __init__(self, rate: float, burst: float, max_clients: int = 10000):
+        self.rate = rate
+        self.burst = burst
+        self.max_clients = max_clients
+        self._buckets: "OrderedDict[str, TokenBucket]" = OrderedDict()
+
+    @property
+    def enabled(self) -> bool:
+        return self.rate > 0
+
+    def check(self, client: str, now: Optional[float] = None) -> float:
+        if not self.enabled:
+            return 0.0
+        now = time.monotonic() if now is None else now
+        bucket = self._buckets.get(client)
+        if bucket is None:
+            bucket = self._buckets[client] = TokenBucket(self.rate, self.burst, now)
+            if len(self._buckets) > self.max_clients:
+                self._buckets.popitem(last=False)
+        else:
+            self._buckets.move_to_end(client)
+        return bucket.take(now)
+
+
+class PriorityLimiter:
+    """
+    A concurrency limit with a bounded, priority-ordered wait queue.
+
+    A released slot is handed straight to the best waiter (lowest priority
+    number, then arrival order), so late high-priority arrivals overtake
+    queued low-priority work but never a request already running.
+    """
+
+    def __init__(self, name: str, limit: int, max_queue: int = 64, timeout: float = 2.0):
+        self.name = name
+        self.limit = limit
+        self.max_queue = max_queue
+        self.timeout = timeout
+        self.active = 0
+        self.waiting = 0
+        self._waiters: List[Tuple[int, int, asyncio.Future]] = []
+        self._seq = itertools.count()
+        # Moving average of how long a slot is held, for Retry-After estimates.
+        self.hold_seconds = 0.0
+        self.counters = {
+            "admitted": 0, "queued": 0, "queue_full": 0, "timed_out": 0, "rate_limited": 0, "max_waiting": 0,
+        }
+
+    def retry_after(self) -> float:
+        if self.limit <= 0:
+            return 1.0
+        return (self.waiting / self.limit + 1) * max(self.hold_seconds, 0.1)
+
+    async def acquire(self, priority: int, timeout: Optional[float] = None) -> None:
+        if self.limit <= 0 or self.active < self.limit:
+            self.active += 1
+            self.counters["admitted"] += 1
+            return
+        if self.waiting >= self.max_queue:
+            self.counters["queue_full"] += 1
+            raise Overloaded(503, f"{self.name} queue full", self.retry_after())
+        future = asyncio.get_running_loop().create_future()
+        heapq.heappush(self._waiters, (priority, next(self._seq), future))
+        self.waiting += 1
+        self.counters["queued"] += 1
+        self.counters["max_waiting"] = max(self.counters["max_waiting"], self.waiting)
+        try:
+            await asyncio.wait_for(future, self.timeout if timeout is None else timeout)
+        except (asyncio.TimeoutError, asyncio.CancelledError) as e:
+            if future.done() and not future.cancelled():
+                # Granted just as we gave up: pass the slot on.
+                self.release()
+            else:
+                future.cancel()
+                self.waiting -= 1
+            if isinstance(e, asyncio.TimeoutError):
+                self.counters["timed_out"] += 1
+                raise Overloaded(503, f"{self.name} queue timeout", self.retry_after()) from None
+            raise
+        self.counters["admitted"] += 1
+
+    def release(self, held: float = 0.0) -> None:
+        if held:
+            self.hold_seconds = held if not self.hold_seconds else 0.9 * self.hold_seconds + 0.1 * held
+        while self._waiters:
+            _, _, future = heapq.heappop(self._waiters)
+            if not future.done():
+                self.waiting -= 1
+                future.set_result(None)  # the slot moves to the waiter; active is unchanged
+                return
+        self.active -= 1
+
+    def stats(self) -> dict:
+        return {
+            "limit": self.limit, "active": self.active, "waiting": self.waiting,
+            "hold_seconds": round(self.hold_seconds, 3), **self.counters,
+        }
+
+
+class Ticket:
+    """A request's hold on a pool slot; ``generation()`` may move it to the llm class."""
+
+    __slots__ = ("pool", "priority", "held", "since")
+
+    def __init__(self, pool: str, priority: int):
+        self.pool = pool
+        self.priority = priority
+        self.held = True
+        self.since = time.perf_counter()
+
+
+_ticket: contextvars.ContextVar = contextvars.ContextVar("admission_ticket", default=None)
+
+# (method, path prefix, pool, priority); first match wins, unmatched routes are not limited
+Route = Tuple[str, str, str, int]
+
+DEFAULT_ROUTES: Sequence[Route] = (
+    ("GET", "/packages", "catalog", CATALOG),
+    ("POST", "/query", "agent", FAST),
+)
+
+
+class AdmissionController:
+    def __init__(
+        self,
+        pools: Dict[str, PriorityLimiter],
+        routes: Sequence[Route] = DEFAULT_ROUTES,
+        rate_limiter: Optional[ClientRateLimiter] = None,
+        enabled: bool = True,
+        llm_timeout: float = 10.0,
+        trust_proxy: bool = False,
+    ):
+        self.pools = pools
+        self.routes = routes
+        self.rate_limiter = rate_limiter or ClientRateLimiter(0, 0)
+        self.enabled = enabled
+        self.llm_timeout = llm_timeout
+        self.trust_proxy = trust_proxy
+
+    def classify(self, method: str, path: str) -> Optional[Tuple[str, int]]:
+        for route_method, prefix, pool, priority in self.routes:
+            if method == route_method and (path == prefix or path.startswith(prefix + "/")):
+                return pool, priority
+        return None
+
+    def client_id(self, scope) -> str:
+        if self.trust_proxy:
+            for name, value in scope.get("headers") or ():
+                if name == b"x-forwarded-for":
+                    return value.decode("latin-1").split(",")[0].strip()
+        client = scope.get("client")
+        return client[0] if client else "unknown"
+
+    async def admit(self, client: str, pool: str, priority: int) -> Ticket:
+        wait = self.rate_limiter.check(client)
+        if wait:
+            self.pools[pool].counters["rate_limited"] += 1
+            raise Overloaded(429, "rate limited", wait)
+        await self.pools[pool].acquire(priority)
+        return Ticket(pool, priority)
+
+    def done(self, ticket: Ticket) -> None:
+        if ticket.held:
+            ticket.held = False
+            self.pools[ticket.pool].release(time.perf_counter() - ticket.since)
+
+    @asynccontextmanager
+    async def generation(self) -> AsyncIterator[None]:
+        """Around an LLM generation: requeue the request's slot at llm priority (raises ``Overloaded``)."""
+        ticket = _ticket.get()
+        if ticket is None or not ticket.held or ticket.priority == LLM:
+            yield
+            return
+        self.done(ticket)
+        await self.pools[ticket.pool].acquire(LLM, timeout=self.llm_timeout)
+        ticket.priority, ticket.held, ticket.since = LLM, True, time.perf_counter()
+        try:
+            yield
+        finally:
+            self.done(ticket)
+
+    def stats(self) -> dict:
+        return {
+            "enabled": self.enabled,
+            "rate_limit": {"rate": self.rate_limiter.rate, "burst": self.rate_limiter.burst,
+                           "clients": len(self.rate_limiter._buckets)},
+            "pools": {name: pool.stats() for name, pool in self.pools.items()},
+        }
+
+
+class AdmissionMiddleware:
+    """ASGI middleware: rate limit and queue classified routes; 429/503 with Retry-After."""
+
+    def __init__(self, app, controller: Optional[AdmissionController] = None):
+        self.app = app
+        self.controller = controller or admission
+
+    async def __call__(self, scope, receive, send):
+        controller = self.controller
+        route = controller.classify(scope["method"], scope["path"]) if scope["type"] == "http" else None
+        if route is None or not controller.enabled:
+            await self.app(scope, receive, send)
+            return
+        try:
+            ticket = await controller.admit(controller.client_id(scope), *route)
+        except Overloaded as e:
+            logger.info("Rejected %s %s: %s", scope["method"], scope["path"], e.reason)
+            await e.response()(scope, receive, send)
+            return
+        token = _ticket.set(ticket)
+        try:
+            await self.app(scope, receive, send)
+        finally:
+            controller.done(ticket)
+            _ticket.reset(token)
+
+
+admission = AdmissionController(
+    pools={
+        "catalog": PriorityLimiter("catalog", settings.ADMISSION_CATALOG_LIMIT,
+                                   settings.ADMISSION_QUEUE_SIZE, settings.ADMISSION_QUEUE_TIMEOUT),
+        "agent": PriorityLimiter("agent", settings.ADMISSION_AGENT_LIMIT,
+                                 settings.ADMISSION_QUEUE_SIZE, settings.ADMISSION_QUEUE_TIMEOUT),
+    },
+    rate_limiter=ClientRateLimiter(settings.ADMISSION_RATE, settings.ADMISSION_BURST),
+    enabled=settings.ADMISSION_ENABLED,
+    llm_timeout=settings.ADMISSION_LLM_TIMEOUT,
+    trust_proxy=settings.ADMISSION_TRUST_PROXY,
+)
@@ -0,0 +1,342 @@
+"""
+Tiered cache for TripXplo catalog data.
+
+L1 is an in-process LRU bounded by entry count and approximate memory; L2 is
+an optional SQLite file shared by every uvicorn worker on the host. Entries
+are fresh for the namespace TTL and then served stale for ``stale_ttl`` more
+seconds while a single background task revalidates them.
+
+When TripXplo is down (the fetch raises ``UpstreamUnavailable``, e.g. because
+its circuit is open) the last good entry is served whatever its age, and the
+namespace is recorded in the request's stale set so the response can say so
+(``X-Data-Stale``).
+"""
+import asyncio
+import json
+import os
+import sqlite3
+import threading
+import time
+from collections import OrderedDict
+from contextvars import ContextVar
+from dataclasses import dataclass
+from typing import Any, Awaitable, Callable, Dict, Optional, Set, Tuple
+
+from ..config import settings
+from ..utils.logger import setup_logger
+from .circuit_breaker import UpstreamUnavailable
+
+logger = setup_logger(__name__)
+
+Fetcher = Callable[[], Awaitable[Any]]
+
+# Data sources the current request was served from a last-good snapshot.
+_stale_sources: ContextVar[Optional[Set[str]]] = ContextVar("stale_sources", default=None)
+
+
+def track_stale() -> Set[str]:
+    """Start collecting stale sources for the current request and return the (live) set."""
+    sources: Set[str] = set()
+    _stale_sources.set(sources)
+    return sources
+
+
+def mark_stale(source: str) -> None:
+    sources = _stale_sources.get()
+    if sources is not None:
+        sources.add(source)
+
+
+def stale_sources() -> Set[str]:
+    return _stale_sources.get() or set()
+
+
+class StaleDataMiddleware:
+    """ASGI middleware: ``X-Data-Stale: packages,hotels`` when a response used last-good data."""
+
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+        sources = track_stale()
+
+        async def send_wrapper(message):
+            if message["type"] == "http.response.start" and sources:
+                message["headers"] = list(message.get("headers", [])) + [
+                    (b"x-data-stale", ",".join(sorted(sources)).encode("latin-1"))
+                ]
+            await send(message)
+
+        await self.app(scope, receive, send_wrapper)
+
+
+@dataclass
+class CacheEntry:
+    value: Any
+    size: int
+    fresh_until: float
+    stale_until: float
+
+    def is_fresh(self, now: float) -> bool:
+        return now < self.fresh_until
+
+    def is_usable(self, now: float) -> bool:
+        return now < self.stale_until
+
+
+class LRUCache:
+    """In-process LRU with an entry limit and an approximate byte budget."""
+
+    def __init__(self, max_entries: int = 1024, max_bytes: int = 64 * 1024 * 1024):
+        self.max_entries = max_entries
+        self.max_bytes = max_bytes
+        self.bytes = 0
+        self.evictions = 0
+        self._data: "OrderedDict[str, CacheEntry]" = OrderedDict()
+
+    def __len__(self) -> int:
+        return len(self._data)
+
+    def get(self, key: str) -> Optional[CacheEntry]:
+        entry = self._data.get(key)
+        if entry is not None:
+            self._data.move_to_end(key)
+        return entry
+
+    def set(self, key: str, entry: CacheEntry) -> None:
+        if entry.size > self.max_bytes:
+            return
+        self.delete(key)
+        self._data[key] = entry
+        self.bytes += entry.size
+        while len(self._data) > self.max_entries or self.bytes > self.max_bytes:
+            _, evicted = self._data.popitem(last=False)
+            self.bytes -= evicted.size
+            self.evictions += 1
+
+    def delete(self, key: str) -> None:
+        old = self._data.pop(key, None)
+        if old is not None:
+            self.bytes -= old.size
+
+    def clear(self) -> None:
+        self._data.clear()
+        self.bytes = 0
+
+
+class SQLiteBackend:
+    """Shared L2 store so that several workers reuse each other's warm entries."""
+
+    def __init__(self, path: str):
+        self.path = path
+        self._lock = threading.Lock()
+        self._conn: Optional[sqlite3.Connection] = None
+
+    def _connection(self) -> sqlite3.Connection:
+        # Connect lazily so a preloaded app never shares a handle across fork().
+        if self._conn is None:
+            directory = os.path.dirname(self.path)
+            if directory:
+                os.makedirs(directory, exist_ok=True)
+            conn = sqlite3.connect(self.path, check_same_thread=False, timeout=5)
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("PRAGMA synchronous=NORMAL")
+            conn.execute(
+                "CREATE TABLE IF NOT EXISTS cache ("
+                " key TEXT PRIMARY KEY, value TEXT NOT NULL,"
+                " fresh_until REAL NOT NULL, stale_until REAL NOT NULL)"
+            )
+            conn.commit()
+            self._conn = conn
+        return self._conn
+
+    def get(self, key: str) -> Optional[Tuple[str, float, float]]:
+        with self._lock:
+            row = self._connection().execute(
+                "SELECT value, fresh_until, stale_until FROM cache WHERE key = ?", (key,)
+            ).fetchone()
+        return row
+
+    def set(self, key: str, payload: str, fresh_until: float, stale_until: float) -> None:
+        with self._lock:
+            conn = self._connection()
+            conn.execute(
+                "INSERT OR REPLACE INTO cache (key, value, fresh_until, stale_until) VALUES (?, ?, ?, ?)",
+                (key, payload, fresh_until, stale_until),
+            )
+            conn.execute("DELETE FROM cache WHERE stale_until < ?", (time.time(),))
+            conn.commit()
+
+    def delete(self, key: str) -> None:
+        with self._lock:
+            conn = self._connection()
+            conn.execute("DELETE FROM cache WHERE key = ?", (key,))
+            conn.commit()
+
+    def close(self) -> None:
+        with self._lock:
+            if self._conn is not None:
+                self._conn.close()
+                self._conn = None
+
+
+class TieredCache:
+    def __init__(
+        self,
+        ttls: Dict[str, float],
+        stale_ttl: float = 3600.0,
+        max_entries: int = 1024,
+        max_bytes: int = 64 * 1024 * 1024,
+        backend: Optional[SQLiteBackend] = None,
+    ):
+        self.ttls = ttls
+        self.stale_ttl = stale_ttl
+        self.l1 = LRUCache(max_entries=max_entries, max_bytes=max_bytes)
+        self.backend = backend
+        self.metrics: Dict[str, Dict[str, int]] = {}
+        self._refreshing: Dict[str, asyncio.Task] = {}
+        # Keys whose last background refresh failed: their stale hits are degraded.
+        self._refresh_failed: Set[str] = set()
+
+    def _count(self, namespace: str, event: str) -> None:
+        counters = self.metrics.setdefault(namespace, {})
+        counters[event] = counters.get(event, 0) + 1
+
+    def _make_entry(self, namespace: str, value: Any, payload: str) -> CacheEntry:
+        now = time.time()
+        fresh_until = now + self.ttls.get(namespace, 300.0)
+        return CacheEntry(value, len(payload), fresh_until, fresh_until + self.stale_ttl)
+
+    async def _store(self, namespace: str, key: str, value: Any) -> None:
+        payload = json.dumps(value, separators=(",", ":"))
+        entry = self._make_entry(namespace, value, payload)
+        self.l1.set(key, entry)
+        self._refresh_failed.discard(key)
+        if self.backend is not None:
+            try:
+                await asyncio.to_thread(self.backend.set, key, payload, entry.fresh_until, entry.stale_until)
+            except sqlite3.Error as e:
+                logger.warning("Shared cache write failed for %s: %s", key, e)
+
+    async def _load_shared(self, key: str) -> Optional[CacheEntry]:
+        if self.backend is None:
+            return None
+        try:
+            row = await asyncio.to_thread(self.backend.get, key)
+        except sqlite3.Error as e:
+            logger.warning("Shared cache read failed for %s: %s", key, e)
+            return None
+        if row is None:
+            return None
+        payload, fresh_until, stale_until = row
+        entry = CacheEntry(json.loads(payload), len(payload), fresh_until, stale_until)
+        self.l1.set(key, entry)
+        return entry
+
+    def _revalidate(self, namespace: str, key: str, fetcher: Fetcher) -> None:
+        task = self._refreshing.get(key)
+        if task is not None and not task.done():
+            return
+
+        async def _refresh():
+            try:
+                value = await fetcher()
+                if value:
+                    await self._store(namespace, key, value)
+                    self._count(namespace, "refreshes")
+                else:
+                    self._count(namespace, "refresh_errors")
+            except Exception as e:
+                self._count(namespace, "refresh_errors")
+                self._refresh_failed.add(key)
+                logger.warning("Background refresh failed for %s: %s", key, e)
+            finally:
+                self._refreshing.pop(key, None)
+
+        self._refreshing[key] = asyncio.get_running_loop().create_task(_refresh())
+
+    async def get_or_fetch(self, namespace: str, key: str, fetcher: Fetcher) -> Any:
+        """
+        Return the cached value for ``key`` or fetch it.
+
+        Empty results (``[]``/``{}``) are never cached so they cannot mask
+        recovery. If the fetch raises ``UpstreamUnavailable`` the last good
+        entry is served (marked stale) however old it is, or the exception's
+        ``default`` when there is none; with no default either, it is re-raised.
+        """
+        key = f"{namespace}:{key}"
+        now = time.time()
+
+        entry = self.l1.get(key)
+        source = "hits"
+        if entry is None or not entry.is_fresh(now):
+            shared = await self._load_shared(key)
+            if shared is not None and (entry is None or shared.fresh_until > entry.fresh_until):
+                entry, source = shared, "shared_hits"
+
+        if entry is not None and entry.is_fresh(now):
+            self._count(namespace, source)
+            return entry.value
+        if entry is not None and entry.is_usable(now):
+            self._count(namespace, "stale_hits")
+            if key in self._refresh_failed:
+                mark_stale(namespace)
+            self._revalidate(namespace, key, fetcher)
+            return entry.value
+
+        self._count(namespace, "misses")
+        try:
+            value = await fetcher()
+        except UpstreamUnavailable as e:
+            if entry is None:
+                self._count(namespace, "upstream_errors")
+                if e.default is None:
+                    raise
+                return e.default
+            self._count(namespace, "degraded_hits")
+            mark_stale(namespace)
+            return entry.value
+        if value:
+            await self._store(namespace, key, value)
+        return value
+
+    async def invalidate(self, namespace: str, key: str) -> None:
+        key = f"{namespace}:{key}"
+        self.l1.delete(key)
+        if self.backend is not None:
+            await asyncio.to_thread(self.backend.delete, key)
+
+    def stats(self) -> dict:
+        return {
+            "entries": len(self.l1),
+            "bytes": self.l1.bytes,
+            "evictions": self.l1.evictions,
+            "shared_backend": self.backend.path if self.backend is not None else None,
+            "namespaces": {name: dict(counters) for name, counters in self.metrics.items()},
+        }
+
+    async def aclose(self) -> None:
+        for task in list(self._refreshing.values()):
+            task.cancel()
+        self._refreshing.clear()
+        if self.backend is not None:
+            self.backend.close()
+
+
+def _build_cache() -> TieredCache:
+    backend = None
+    if settings.CACHE_BACKEND == "sqlite":
+        backend = SQLiteBackend(settings.CACHE_SQLITE_PATH)
+    return TieredCache(
+        ttls=settings.CACHE_TTLS,
+        stale_ttl=settings.CACHE_STALE_TTL,
+        max_entries=settings.CACHE_MAX_ENTRIES,
+        max_bytes=settings.CACHE_MAX_BYTES,
+        backend=backend,
+    )
+
+
+catalog_cache = _build_cache()
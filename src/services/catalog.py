@@ -0,0 +1,307 @@
+"""
+Full-catalog sync into a local, in-memory package index.
+
+``CatalogSyncer`` walks every page of ``/admin/package`` with bounded
+parallelism, fetches details only for packages that are new or changed since
+the previous sync, and atomically swaps in a fresh ``CatalogIndex``. The
+agent and the ``/packages`` routes then answer from memory.
+"""
+import asyncio
+import hashlib
+import json
+import time
+from bisect import bisect_left, bisect_right
+from dataclasses import dataclass, field
+from typing import Any, Dict, Iterable, Iterator, List, Optional
+
+from ..config import settings
+from ..utils.logger import setup_logger
+from .tripxplo_client import fetch_package, fetch_package_page
+
+logger = setup_logger(__name__)
+
+
+@dataclass
+class PackageRecord:
+    package_id: str
+    name: str
+    destinations: List[str]
+    days: int
+    nights: int
+    price: float
+    fingerprint: str
+    summary: Dict[str, Any]
+    details: Dict[str, Any] = field(default_factory=dict)
+
+
+def _number(value: Any, default: float = 0.0) -> float:
+    try:
+        return float(value)
+    except (TypeError, ValueError):
+        return default
+
+
+def extract_destinations(doc: Dict[str, Any]) -> List[str]:
+    """Collect destination names from the shapes TripXplo uses for them."""
+    names: List[str] = []
+    for key in ("destinationName", "destination", "destinations", "location"):
+        value = doc.get(key)
+        items = value if isinstance(value, list) else [value]
+        for item in items:
+            if isinstance(item, dict):
+                item = item.get("destinationName") or item.get("name")
+            if isinstance(item, str) and item.strip():
+                names.append(item.strip())
+    return list(dict.fromkeys(names))
+
+
+def fingerprint(doc: Dict[str, Any]) -> str:
+    if doc.get("updatedAt"):
+        return str(doc["updatedAt"])
+    payload = json.dumps(doc, sort_keys=True, separators=(",", ":"), default=str)
+    return hashlib.blake2b(payload.encode(), digest_size=12).hexdigest()
+
+
+def make_record(doc: Dict[str, Any], details: Optional[Dict[str, Any]] = None) -> PackageRecord:
+    details = details or {}
+    merged = {**doc, **details}
+    return PackageRecord(
+        package_id=str(doc.get("packageId") or doc.get("id") or doc.get("_id")),
+        name=str(merged.get("packageName") or ""),
+        destinations=extract_destinations(merged),
+        days=int(_number(merged.get("noOfDays"))),
+        nights=int(_number(merged.get("noOfNight"))),
+        price=_number(merged.get("startFrom"), default=float("inf")),
+        fingerprint=fingerprint(doc),
+        summary=doc,
+        details=details,
+    )
+
+
+class CatalogIndex:
+    """Immutable snapshot of the catalog with secondary indexes."""
+
+    def __init__(self, records: Iterable[PackageRecord], version: int = 0):
+        self.version = version
+        self.built_at = time.time()
+        self.by_id: Dict[str, PackageRecord] = {}
+        self.by_destination: Dict[str, List[str]] = {}
+        self.by_days: Dict[int, List[str]] = {}
+        self.by_nights: Dict[int, List[str]] = {}
+        for record in records:
+            self.by_id[record.package_id] = record
+            for name in record.destinations:
+                self.by_destination.setdefault(name.lower(), []).append(record.package_id)
+            self.by_days.setdefault(record.days, []).append(record.package_id)
+            self.by_nights.setdefault(record.nights, []).append(record.package_id)
+        ranked = sorted((r.price, r.package_id) for r in self.by_id.values())
+        self._prices = [price for price, _ in ranked]
+        self._price_ids = [package_id for _, package_id in ranked]
+        # Stable order for cursor pagination: IDs survive resyncs, positions do not.
+        self._sorted_ids = sorted(self.by_id)
+
+    def __len__(self) -> int:
+        return len(self.by_id)
+
+    def get(self, package_id: str) -> Optional[PackageRecord]:
+        return self.by_id.get(package_id)
+
+    def records(self) -> List[PackageRecord]:
+        return list(self.by_id.values())
+
+    def packages(self) -> List[Dict[str, Any]]:
+        """Listing documents in upstream shape, as ``/packages`` returns them."""
+        return [record.summary for record in self.by_id.values()]
+
+    def iter_from(self, after: Optional[str] = None) -> Iterator[PackageRecord]:
+        """Records in package-ID order, starting after ``after`` (exclusive)."""
+        ids = self._sorted_ids
+        start = bisect_right(ids, after) if after is not None else 0
+        for i in range(start, len(ids)):
+            yield self.by_id[ids[i]]
+
+    def price_between(self, low: float = 0.0, high: float = float("inf")) -> List[str]:
+        start = bisect_left(self._prices, low)
+        end = bisect_right(self._prices, high)
+        return self._price_ids[start:end]
+
+    def search(
+        self,
+        destination: Optional[str] = None,
+        days: Optional[int] = None,
+        nights: Optional[int] = None,
+        min_price: float = 0.0,
+        max_price: float = float("inf"),
+    ) -> List[PackageRecord]:
+        """Intersect the secondary indexes; results are ordered by price."""
+        candidates: Optional[set] = None
+        if destination:
+            candidates = set(self.by_destination.get(destination.lower(), []))
+        if days is not None:
+            ids = set(self.by_days.get(days, []))
+            candidates = ids if candidates is None else candidates & ids
+        if nights is not None:
+            ids = set(self.by_nights.get(nights, []))
+            candidates = ids if candidates is None else candidates & ids
+        return [
+            self.by_id[package_id]
+            for package_id in self.price_between(min_price, max_price)
+            if candidates is None or package_id in candidates
+        ]
+
+
+@dataclass
+class SyncReport:
+    started_at: float
+    duration: float = 0.0
+    pages: int = 0
+    packages: int = 0
+    fetched: int = 0
+    unchanged: int = 0
+    removed: int = 0
+    errors: int = 0
+
+
+class CatalogSyncer:
+    def __init__(self, page_size: int = 50, concurrency: int = 8, interval: float = 900.0):
+        self.page_size = page_size
+        self.concurrency = concurrency
+        self.interval = interval
+        self.index = CatalogIndex([])
+        self.last_report: Optional[SyncReport] = None
+        # Set while the most recent sync attempt failed; the old index keeps serving.
+        self.last_error: Optional[str] = None
+        self._task: Optional[asyncio.Task] = None
+        self._sync_lock: Optional[asyncio.Lock] = None
+
+    @property
+    def ready(self) -> bool:
+        return self.last_report is not None and len(self.index) > 0
+
+    @property
+    def stale(self) -> bool:
+        """True when the index is the last good snapshot because the latest sync failed."""
+        return self.ready and self.last_error is not None
+
+    async def _walk_pages(self, semaphore: asyncio.Semaphore, report: SyncReport) -> List[Dict[str, Any]]:
+        async def page(offset: int) -> Dict[str, Any]:
+            async with semaphore:
+                report.pages += 1
+                return await fetch_package_page(self.page_size, offset)
+
+        first = await page(0)
+        docs = list(first.get("docs", []))
+        total = first.get("totalDocs")
+        if isinstance(total, int):
+            offsets = range(self.page_size, total, self.page_size)
+            for result in await asyncio.gather(*(page(o) for o in offsets)):
+                docs.extend(result.get("docs", []))
+            return docs
+
+        # No total in the response: fetch in waves until a short page.
+        offset = self.page_size
+        last = len(docs)
+        while last == self.page_size:
+            offsets = [offset + i * self.page_size for i in range(self.concurrency)]
+            results = await asyncio.gather(*(page(o) for o in offsets))
+            for result in results:
+                batch = result.get("docs", [])
+                docs.extend(batch)
+                last = len(batch)
+                if last < self.page_size:
+                    break
+            offset = offsets[-1] + self.page_size
+        return docs
+
+    async def sync(self) -> SyncReport:
+        """Run one incremental sync and swap in the new index."""
+        if self._sync_lock is None:
+            self._sync_lock = asyncio.Lock()
+        async with self._sync_lock:
+            report = SyncReport(started_at=time.time())
+            started = time.perf_counter()
+            semaphore = asyncio.Semaphore(self.concurrency)
+            previous = self.index
+
+            docs = await self._walk_pages(semaphore, report)
+
+            async def build(doc: Dict[str, Any]) -> Optional[PackageRecord]:
+                package_id = str(doc.get("packageId") or doc.get("id") or doc.get("_id") or "")
+                if not package_id:
+                    return None
+                old = previous.get(package_id)
+                if old is not None and old.fingerprint == fingerprint(doc) and old.details:
+                    report.unchanged += 1
+                    return old
+                async with semaphore:
+                    try:
+                        details = await fetch_package(package_id)
+                        report.fetched += 1
+                    except Exception as e:
+                        report.errors += 1
+                        logger.warning("Catalog sync: details for %s failed: %s", package_id, e)
+                        details = old.details if old is not None else {}
+                return make_record(doc, details)
+
+            records = [r for r in await asyncio.gather(*(build(doc) for doc in docs)) if r is not None]
+            report.packages = len(records)
+            report.removed = len(set(previous.by_id) - {r.package_id for r in records})
+            report.duration = time.perf_counter() - started
+
+            # Matchers, retrievers and response/representation caches key off the
+            # version, so an unchanged catalog keeps its index (and version).
+            fingerprints = {r.package_id: r.fingerprint for r in records}
+            changed = report.fetched or report.removed or fingerprints != {
+                package_id: r.fingerprint for package_id, r in previous.by_id.items()
+            }
+            if changed:
+                self.index = CatalogIndex(records, version=previous.version + 1)
+            self.last_report = report
+            self.last_error = None
+            logger.info(
+                "Catalog sync finished in %.2fs: %s packages, %s fetched, %s unchanged, %s removed, %s errors", report.duration, report.packages, report.fetched, report.unchanged, report.removed, report.errors
+            )
+            return report
+
+    async def _run(self, delay: float = 0.0) -> None:
+        if delay:
+            await asyncio.sleep(delay)
+        while True:
+            try:
+                await self.sync()
+            except Exception as e:
+                self.last_error = f"{type(e).__name__}: {e}"
+                logger.error("Catalog sync failed; serving the previous index (%s packages): %s", len(self.index), e)
+            await asyncio.sleep(self.interval)
+
+    def start(self, delay: float = 0.0) -> None:
+        """Sync every ``interval`` seconds in the background, the first time after ``delay``."""
+        if self._task is None or self._task.done():
+            self._task = asyncio.get_running_loop().create_task(self._run(delay))
+
+    async def stop(self) -> None:
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+
+    def stats(self) -> dict:
+        report = self.last_report
+        return {
+            "ready": self.ready,
+            "stale": self.stale,
+            "last_error": self.last_error,
+            "version": self.index.version,
+            "packages": len(self.index),
+            "last_sync": None if report is None else report.__dict__,
+        }
+
+
+catalog = CatalogSyncer(
+    page_size=settings.CATALOG_PAGE_SIZE,
+    concurrency=settings.CATALOG_SYNC_CONCURRENCY,
+    interval=settings.CATALOG_SYNC_INTERVAL,
+)
@@ -0,0 +1,169 @@
+"""
+Per-endpoint circuit breakers for TripXplo calls.
+
+Each endpoint (``GET /admin/package/{id}/hotels``, ...) gets a breaker that
+watches a sliding window of recent calls. When enough calls have been made
+and either the failure rate or the slow-call rate crosses its threshold, the
+circuit opens and calls fail immediately with ``CircuitOpenError`` instead of
+waiting out a hanging upstream. After ``open_seconds`` the breaker goes
+half-open and lets a few probe calls through; if they succeed it closes,
+otherwise it opens again.
+
+Callers treat ``UpstreamUnavailable`` (which ``CircuitOpenError`` is) as the
+signal to serve the last good snapshot from the catalog cache.
+"""
+import threading
+import time
+from collections import deque
+from typing import Deque, Dict, Optional, Tuple
+
+from ..config import settings
+from ..utils.logger import setup_logger
+
+logger = setup_logger(__name__)
+
+CLOSED, OPEN, HALF_OPEN = "closed", "open", "half_open"
+
+
+class UpstreamUnavailable(Exception):
+    """An upstream call failed or was refused; ``default`` is the empty result callers used to get."""
+
+    def __init__(self, message: str, default=None):
+        super().__init__(message)
+        self.default = default
+
+
+class CircuitOpenError(UpstreamUnavailable):
+    pass
+
+
+class CircuitBreaker:
+    def __init__(
+        self,
+        name: str,
+        window: int = 20,
+        min_calls: int = 5,
+        failure_rate: float = 0.5,
+        slow_call_seconds: float = 3.0,
+        slow_call_rate: float = 0.8,
+        open_seconds: float = 30.0,
+        half_open_calls: int = 2,
+    ):
+        self.name = name
+        self.min_calls = min_calls
+        self.failure_rate = failure_rate
+        self.slow_call_seconds = slow_call_seconds
+        self.slow_call_rate = slow_call_rate
+        self.open_seconds = open_seconds
+        self.half_open_calls = half_open_calls
+        self.state = CLOSED
+        self.opened_at = 0.0
+        # (failed, slow) per call, newest last
+        self._window: Deque[Tuple[bool, bool]] = deque(maxlen=window)
+        self._probes = 0
+        self._probe_successes = 0
+        # The sync client calls in from worker threads.
+        self._lock = threading.Lock()
+        self.counters = {"calls": 0, "failures": 0, "slow_calls": 0, "rejected": 0, "opened": 0}
+
+    def allow(self) -> None:
+        """Raise ``CircuitOpenError`` unless a call may go through now."""
+        with self._lock:
+            if self.state == OPEN:
+                if time.monotonic() - self.opened_at < self.open_seconds:
+                    self.counters["rejected"] += 1
+                    raise CircuitOpenError(f"Circuit for {self.name} is open")
+                self.state = HALF_OPEN
+                self._probes = self._probe_successes = 0
+                logger.info("Circuit for %s half-open; probing", self.name)
+            if self.state == HALF_OPEN:
+                if self._probes >= self.half_open_calls:
+                    self.counters["rejected"] += 1
+                    raise CircuitOpenError(f"Circuit for {self.name} is half-open and probing")
+                self._probes += 1
+            self.counters["calls"] += 1
+
+    def release(self) -> None:
+        """Give back a half-open probe slot for a call that was cancelled before it finished."""
+        with self._lock:
+            if self.state == HALF_OPEN and self._probes > 0:
+                self._probes -= 1
+
+    def record(self, ok: bool, seconds: float) -> None:
+        slow = seconds >= self.slow_call_seconds
+        with self._lock:
+            self.counters["failures"] += not ok
+            self.counters["slow_calls"] += slow
+            if self.state == HALF_OPEN:
+                if not ok or slow:
+                    self._open("probe failed" if not ok else "probe slow")
+                else:
+                    self._probe_successes += 1
+                    if self._probe_successes >= self.half_open_calls:
+                        self.state = CLOSED
+                        self._window.clear()
+                        logger.info("Circuit for %s closed", self.name)
+                return
+            self._window.append((not ok, slow))
+            if self.state == CLOSED and len(self._window) >= self.min_calls:
+                failures = sum(failed for failed, _ in self._window) / len(self._window)
+                slow_calls = sum(s for _, s in self._window) / len(self._window)
+                if failures >= self.failure_rate:
+                    self._open(f"failure rate {failures:.0%}")
+                elif slow_calls >= self.slow_call_rate:
+                    self._open(f"slow-call rate {slow_calls:.0%}")
+
+    def _open(self, reason: str) -> None:
+        self.state = OPEN
+        self.opened_at = time.monotonic()
+        self._window.clear()
+        self.counters["opened"] += 1
+        logger.warning("Circuit for %s opened (%s); failing fast for %ss", self.name, reason, self.open_seconds)
+
+    def stats(self) -> dict:
+        with self._lock:
+            window = list(self._window)
+        return {
+            "state": self.state,
+            "window": len(window),
+            "failure_rate": round(sum(f for f, _ in window) / len(window), 3) if window else 0.0,
+            "slow_call_rate": round(sum(s for _, s in window) / len(window), 3) if window else 0.0,
+            "open_for": round(max(0.0, self.open_seconds - (time.monotonic() - self.opened_at)), 1)
+            if self.state == OPEN else 0.0,
+            **self.counters,
+        }
+
+
+class BreakerBoard:
+    """One breaker per endpoint, created on first use with the configured thresholds."""
+
+    def __init__(self, enabled: bool = True, **options):
+        self.enabled = enabled
+        self.options = options
+        self.breakers: Dict[str, CircuitBreaker] = {}
+
+    def get(self, endpoint: str) -> Optional[CircuitBreaker]:
+        if not self.enabled:
+            return None
+        breaker = self.breakers.get(endpoint)
+        if breaker is None:
+            breaker = self.breakers.setdefault(endpoint, CircuitBreaker(endpoint, **self.options))
+        return breaker
+
+    def any_open(self) -> bool:
+        return any(b.state != CLOSED for b in self.breakers.values())
+
+    def stats(self) -> dict:
+        return {"enabled": self.enabled, "endpoints": {name: b.stats() for name, b in self.breakers.items()}}
+
+
+breakers = BreakerBoard(
+    enabled=settings.BREAKER_ENABLED,
+    window=settings.BREAKER_WINDOW,
+    min_calls=settings.BREAKER_MIN_CALLS,
+    failure_rate=settings.BREAKER_FAILURE_RATE,
+    slow_call_seconds=settings.BREAKER_SLOW_CALL_SECONDS,
+    slow_call_rate=settings.BREAKER_SLOW_CALL_RATE,
+    open_seconds=settings.BREAKER_OPEN_SECONDS,
+    half_open_calls=settings.BREAKER_HALF_OPEN_CALLS,
+)
@@ -0,0 +1,97 @@
+"""
+Field projection, cursor pagination and NDJSON export for package listings.
+
+Pages are cut from a ``CatalogIndex`` snapshot in package-ID order. A cursor
+is the opaque, URL-safe encoding of the last ID on the previous page, so it
+stays valid across catalog resyncs: packages added or removed elsewhere in
+the catalog do not shift the next page.
+
+``ndjson_chunks`` is a plain generator: it holds one chunk of serialized
+lines at a time, whatever the size of the catalog. Handed to a
+``StreamingResponse`` it is iterated in the threadpool, so serializing a
+catalog-wide export does not block the event loop. Every line is a package,
+so a limited export returns its cursor in the ``X-Next-Cursor`` header.
+"""
+import base64
+import binascii
+import json
+from itertools import islice
+from typing import Any, Dict, Iterator, List, Optional, Sequence, Tuple
+
+from .catalog import CatalogIndex
+
+
+class InvalidCursor(ValueError):
+    pass
+
+
+def parse_fields(fields: Optional[str]) -> Optional[Tuple[str, ...]]:
+    """``"packageId, startFrom"`` -> ``("packageId", "startFrom")``; empty means every field."""
+    if not fields:
+        return None
+    names = tuple(dict.fromkeys(name.strip() for name in fields.split(",") if name.strip()))
+    return names or None
+
+
+def project(doc: Dict[str, Any], fields: Optional[Sequence[str]]) -> Dict[str, Any]:
+    """Keep only ``fields`` (top-level keys) of ``doc``; fields it lacks are left out."""
+    if fields is None:
+        return doc
+    return {name: doc[name] for name in fields if name in doc}
+
+
+def encode_cursor(package_id: str) -> str:
+    return base64.urlsafe_b64encode(package_id.encode()).decode().rstrip("=")
+
+
+def decode_cursor(cursor: str) -> str:
+    try:
+        return base64.b64decode(cursor + "=" * (-len(cursor) % 4), altchars=b"-_", validate=True).decode()
+    except (binascii.Error, UnicodeDecodeError) as e:
+        raise InvalidCursor(f"Invalid cursor: {cursor!r}") from e
+
+
+def page(
+    index: CatalogIndex,
+    fields: Optional[Sequence[str]] = None,
+    after: Optional[str] = None,
+    limit: int = 100,
+) -> Dict[str, Any]:
+    """One page of listing documents after package ``after``, and the cursor for the next (None on the last page)."""
+    records = list(islice(index.iter_from(after), limit + 1))
+    next_cursor = encode_cursor(records[limit - 1].package_id) if len(records) > limit else None
+    return {
+        "packages": [project(record.summary, fields) for record in records[:limit]],
+        "next_cursor": next_cursor,
+    }
+
+
+def next_cursor(index: CatalogIndex, after: Optional[str], limit: int) -> Optional[str]:
+    """Cursor for the page after the ``limit`` packages following ``after``; None if they are the last."""
+    records = list(islice(index.iter_from(after), limit - 1, limit + 1))
+    return encode_cursor(records[0].package_id) if len(records) > 1 else None
+
+
+def ndjson_chunks(
+    index: CatalogIndex,
+    fields: Optional[Sequence[str]] = None,
+    after: Optional[str] = None,
+    limit: Optional[int] = None,
+    chunk_bytes: int = 64 * 1024,
+) -> Iterator[bytes]:
+    """Listing documents after package ``after`` as newline-delimited JSON, batched into ~``chunk_bytes`` writes."""
+    records = index.iter_from(after)
+    if limit is not None:
+        records = islice(records, limit)
+    buffer: List[bytes] = []
+    size = 0
+    for record in records:
+        line = json.dumps(project(record.summary, fields), ensure_ascii=False, separators=(",", ":"), default=str)
+        encoded = line.encode() + b"\n"
+        buffer.append(encoded)
+        size += len(encoded)
+        if size >= chunk_bytes:
+            yield b"".join(buffer)
+            buffer, size = [], 0
+    if buffer:
+        yield b"".join(buffer)
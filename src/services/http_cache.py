@@ -0,0 +1,206 @@
+"""
+Conditional GETs and precompressed bodies for the catalog routes.
+
+A ``Representation`` is one serialized JSON body with a strong ETag (a hash
+of its bytes) and a Last-Modified time (when that content was first seen).
+Bodies of at least ``COMPRESSION_MIN_BYTES`` are compressed once, when the
+representation is created, with gzip and, if the ``brotli`` package is
+installed, br; every later request reuses those bytes.
+
+``RepresentationCache`` keeps recent representations by content hash, plus a
+map from a caller-chosen key (e.g. ``("packages", catalog version)``) to
+content, so a hot listing is neither rebuilt, re-serialized nor
+re-compressed until the catalog changes. ``respond`` answers
+``If-None-Match``/``If-Modified-Since`` with a 304 and otherwise negotiates
+``Accept-Encoding``.
+"""
+import asyncio
+import gzip
+import hashlib
+import json
+import time
+from collections import OrderedDict
+from email.utils import formatdate, parsedate_to_datetime
+from typing import Any, Callable, Dict, Hashable, Optional
+
+from fastapi import Request
+from fastapi.responses import Response
+
+from ..config import settings
+
+try:
+    import brotli
+except ImportError:  # br is optional; gzip is always available
+    brotli = None
+
+# Bodies this large are compressed off the event loop.
+_THREAD_BYTES = 64 * 1024
+
+
+def _compressors(gzip_level: int, brotli_quality: int) -> Dict[str, Callable[[bytes], bytes]]:
+    encoders = {"gzip": lambda body: gzip.compress(body, compresslevel=gzip_level, mtime=0)}
+    if brotli is not None:
+        encoders["br"] = lambda body: brotli.compress(body, quality=brotli_quality)
+    return encoders
+
+
+def accepted_encodings(header: str) -> Dict[str, float]:
+    """``"gzip;q=0.8, br"`` -> ``{"gzip": 0.8, "br": 1.0}``."""
+    accepted = {}
+    for part in header.split(","):
+        name, _, params = part.strip().partition(";")
+        q = 1.0
+        for param in params.split(";"):
+            key, _, value = param.strip().partition("=")
+            if key == "q":
+                try:
+                    q = float(value)
+                except ValueError:
+                    q = 0.0
+        if name:
+            accepted[name.lower()] = q
+    return accepted
+
+
+class Representation:
+    __slots__ = ("body", "digest", "last_modified", "encoded")
+
+    def __init__(self, body: bytes, digest: str, last_modified: float):
+        self.body = body
+        self.digest = digest
+        self.last_modified = last_modified
+        # encoding -> compressed body
+        self.encoded: Dict[str, bytes] = {}
+
+    def etag(self, encoding: Optional[str] = None) -> str:
+        # Strong validators differ per encoding, since the bytes differ.
+        return f'"{self.digest}-{encoding}"' if encoding else f'"{self.digest}"'
+
+    @property
+    def size(self) -> int:
+        return len(self.body) + sum(len(b) for b in self.encoded.values())
+
+
+class RepresentationCache:
+    def __init__(
+        self,
+        max_entries: int = 256,
+        min_bytes: int = 1024,
+        gzip_level: int = 6,
+        brotli_quality: int = 5,
+    ):
+        self.max_entries = max_entries
+        self.min_bytes = min_bytes
+        self.compressors = _compressors(gzip_level, brotli_quality)
+        self._by_digest: "OrderedDict[str, Representation]" = OrderedDict()
+        self._by_key: "OrderedDict[Hashable, str]" = OrderedDict()
+        self.counters = {
+            "built": 0, "reused": 0, "not_modified": 0, "compressed": 0, "identity": 0,
+            "bytes_sent": 0, "bytes_saved": 0,
+        }
+
+    async def for_value(self, value: Any) -> Representation:
+        """Representation of a JSON-serializable value, reusing one with identical content."""
+        body = json.dumps(value, ensure_ascii=False, separators=(",", ":"), default=str).encode()
+        digest = hashlib.blake2b(body, digest_size=12).hexdigest()
+        rep = self._by_digest.get(digest)
+        if rep is not None:
+            self._by_digest.move_to_end(digest)
+            self.counters["reused"] += 1
+            return rep
+        rep = Representation(body, digest, time.time())
+        if len(body) >= self.min_bytes:
+            if len(body) >= _THREAD_BYTES:
+                rep.encoded = await asyncio.to_thread(self._encode, body)
+            else:
+                rep.encoded = self._encode(body)
+        self.counters["built"] += 1
+        self._by_digest[digest] = rep
+        while len(self._by_digest) > self.max_entries:
+            self._by_digest.popitem(last=False)
+        return rep
+
+    def _encode(self, body: bytes) -> Dict[str, bytes]:
+        return {name: compress(body) for name, compress in self.compressors.items()}
+
+    async def for_key(self, key: Hashable, build: Callable[[], Any]) -> Representation:
+        """Representation for ``key``; ``build()`` runs only when the key is new (or evicted)."""
+        digest = self._by_key.get(key)
+        rep = self._by_digest.get(digest) if digest is not None else None
+        if rep is not None:
+            self._by_key.move_to_end(key)
+            self._by_digest.move_to_end(digest)
+            self.counters["reused"] += 1
+            return rep
+        rep = await self.for_value(build())
+        self._by_key[key] = rep.digest
+        while len(self._by_key) > self.max_entries:
+            self._by_key.popitem(last=False)
+        return rep
+
+    def _not_modified(self, request: Request, rep: Representation) -> bool:
+        if_none_match = request.headers.get("if-none-match")
+        if if_none_match is not None:
+            if if_none_match.strip() == "*":
+                return True
+            tags = {tag.strip().removeprefix("W/") for tag in if_none_match.split(",")}
+            return any(tag.strip('"').split("-", 1)[0] == rep.digest for tag in tags)
+        if_modified_since = request.headers.get("if-modified-since")
+        if if_modified_since:
+            try:
+                return int(rep.last_modified) <= parsedate_to_datetime(if_modified_since).timestamp()
+            except (TypeError, ValueError):
+                return False
+        return False
+
+    def negotiate(self, request: Request, rep: Representation) -> Optional[str]:
+        if not rep.encoded:
+            return None
+        accepted = accepted_encodings(request.headers.get("accept-encoding", ""))
+        wildcard = accepted.get("*", 0.0)
+        best, best_q = None, 0.0
+        # Preference order on ties: br compresses JSON noticeably better than gzip.
+        for name in ("br", "gzip"):
+            q = accepted.get(name, wildcard)
+            if name in rep.encoded and q > best_q:
+                best, best_q = name, q
+        return best
+
+    def respond(self, request: Request, rep: Representation, status_code: int = 200) -> Response:
+        encoding = self.negotiate(request, rep)
+        headers = {
+            "ETag": rep.etag(encoding),
+            "Last-Modified": formatdate(rep.last_modified, usegmt=True),
+            "Cache-Control": "no-cache",
+            "Vary": "Accept-Encoding",
+        }
+        if self._not_modified(request, rep):
+            self.counters["not_modified"] += 1
+            self.counters["bytes_saved"] += len(rep.body)
+            return Response(status_code=304, headers=headers)
+        body = rep.body
+        if encoding is not None:
+            body = rep.encoded[encoding]
+            headers["Content-Encoding"] = encoding
+            self.counters["compressed"] += 1
+            self.counters["bytes_saved"] += len(rep.body) - len(body)
+        else:
+            self.counters["identity"] += 1
+        self.counters["bytes_sent"] += len(body)
+        return Response(body, status_code=status_code, media_type="application/json", headers=headers)
+
+    def stats(self) -> dict:
+        return {
+            "entries": len(self._by_digest),
+            "bytes": sum(rep.size for rep in self._by_digest.values()),
+            "encodings": ["identity", *self.compressors],
+            **self.counters,
+        }
+
+
+representations = RepresentationCache(
+    max_entries=settings.REPRESENTATION_CACHE_ENTRIES,
+    min_bytes=settings.COMPRESSION_MIN_BYTES,
+    gzip_level=settings.COMPRESSION_GZIP_LEVEL,
+    brotli_quality=settings.COMPRESSION_BROTLI_QUALITY,
+)
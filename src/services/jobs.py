@@ -0,0 +1,273 @@
+"""
+Asynchronous query jobs.
+
+``POST /query/jobs`` queues a question and returns at once with a job ID.
+``JobRunner`` runs queued jobs through the agent graph, ``JOB_WORKERS`` at a
+time, as asyncio tasks on the app's event loop. The graph is I/O-bound and
+shares the pooled TripXplo client, the LLM gateway and the catalog index with
+the rest of the worker; none of these could be used from another thread's
+event loop or another process. Once ``JOB_QUEUE_SIZE`` jobs are waiting,
+submissions are refused with a 503.
+
+Jobs live in a local, in-process ``JobStore``. Finished jobs are kept for
+``JOB_TTL`` seconds. Clients can poll ``GET /query/jobs/{id}``, long-poll it
+with ``?wait=``, or stream status events from ``/query/jobs/{id}/events``.
+Every poll or streamed event counts as the client still being there. A
+queued or running job that nobody has looked at for ``JOB_ABANDON_AFTER``
+seconds is cancelled, and so is one that receives ``DELETE``.
+"""
+import asyncio
+import time
+import uuid
+from collections import OrderedDict
+from typing import Any, Awaitable, Callable, Dict, Iterator, List, Optional
+
+from ..config import settings
+from ..utils.logger import setup_logger
+from ..utils.metrics import JOB_SECONDS
+from .admission import Overloaded
+from .cache import track_stale
+
+logger = setup_logger(__name__)
+
+Handler = Callable[[str, Optional[str]], Awaitable[Dict[str, Any]]]
+
+TERMINAL = ("done", "failed", "cancelled")
+
+
+class Job:
+    def __init__(self, question: str, session_id: Optional[str] = None):
+        self.job_id = uuid.uuid4().hex
+        self.question = question
+        self.session_id = session_id
+        # "queued" -> "running" -> "done" | "failed" | "cancelled"
+        self.status = "queued"
+        self.created_at = time.time()
+        self.started_at: Optional[float] = None
+        self.finished_at: Optional[float] = None
+        self.result: Optional[Dict[str, Any]] = None
+        self.error: Optional[str] = None
+        self.last_seen = time.monotonic()
+        # Bumped on every status change; waiters compare against it.
+        self.version = 0
+        self._changed = asyncio.Event()
+        self._task: Optional[asyncio.Task] = None
+
+    @property
+    def finished(self) -> bool:
+        return self.status in TERMINAL
+
+    def touch(self) -> None:
+        self.last_seen = time.monotonic()
+
+    def _set(self, status: str, result: Optional[Dict[str, Any]] = None, error: Optional[str] = None) -> None:
+        self.status = status
+        if status == "running":
+            self.started_at = time.time()
+        elif status in TERMINAL:
+            self.finished_at = time.time()
+        self.result = result
+        self.error = error
+        self.version += 1
+        # Wake everyone waiting on this version; later waiters get a fresh event.
+        changed, self._changed = self._changed, asyncio.Event()
+        changed.set()
+
+    async def wait(self, since: int, timeout: float) -> bool:
+        """Wait up to ``timeout`` for a status change after ``since``; True if one happened."""
+        if self.version != since:
+            return True
+        try:
+            await asyncio.wait_for(self._changed.wait(), timeout)
+        except asyncio.TimeoutError:
+            return False
+        return True
+
+    async def wait_finished(self, timeout: float) -> None:
+        deadline = time.monotonic() + timeout
+        while not self.finished:
+            remaining = deadline - time.monotonic()
+            if remaining <= 0 or not await self.wait(self.version, remaining):
+                return
+
+    def view(self) -> Dict[str, Any]:
+        end = self.finished_at or time.time()
+        view = {
+            "job_id": self.job_id,
+            "status": self.status,
+            "created_at": self.created_at,
+            "queued_seconds": round((self.started_at or end) - self.created_at, 3),
+            "run_seconds": round(end - self.started_at, 3) if self.started_at else None,
+        }
+        if self.result is not None:
+            view["result"] = self.result
+        if self.error is not None:
+            view["error"] = self.error
+        return view
+
+
+class JobStore:
+    """Jobs by ID, oldest first; finished jobs expire after ``ttl`` or when over ``max_jobs``."""
+
+    def __init__(self, ttl: float = 600.0, max_jobs: int = 1000):
+        self.ttl = ttl
+        self.max_jobs = max_jobs
+        self._jobs: "OrderedDict[str, Job]" = OrderedDict()
+
+    def __len__(self) -> int:
+        return len(self._jobs)
+
+    def __iter__(self) -> Iterator[Job]:
+        return iter(list(self._jobs.values()))
+
+    def add(self, job: Job) -> None:
+        self._jobs[job.job_id] = job
+        self.prune()
+
+    def get(self, job_id: str) -> Optional[Job]:
+        return self._jobs.get(job_id)
+
+    def prune(self, now: Optional[float] = None) -> None:
+        now = time.time() if now is None else now
+        finished = [job for job in self._jobs.values() if job.finished]
+        excess = len(self._jobs) - self.max_jobs
+        for job in finished:
+            if now - job.finished_at > self.ttl or excess > 0:
+                del self._jobs[job.job_id]
+                excess -= 1
+
+
+class JobRunner:
+    def __init__(
+        self,
+        handler: Handler,
+        workers: int = 4,
+        max_queue: int = 100,
+        abandon_after: float = 60.0,
+        store: Optional[JobStore] = None,
+    ):
+        self.handler = handler
+        self.workers = workers
+        self.max_queue = max_queue
+        self.abandon_after = abandon_after
+        self.store = store or JobStore()
+        self.counters = {"submitted": 0, "rejected": 0, "done": 0, "failed": 0, "cancelled": 0, "abandoned": 0}
+        self._queue: Optional[asyncio.Queue] = None
+        self._tasks: List[asyncio.Task] = []
+
+    @property
+    def running(self) -> int:
+        return sum(1 for job in self.store if job.status == "running")
+
+    @property
+    def queued(self) -> int:
+        return sum(1 for job in self.store if job.status == "queued")
+
+    def start(self) -> None:
+        """Start the workers; call from the lifespan so they carry no request context."""
+        if self._tasks:
+            return
+        self._queue = asyncio.Queue(maxsize=self.max_queue)
+        loop = asyncio.get_running_loop()
+        self._tasks = [loop.create_task(self._worker()) for _ in range(self.workers)]
+        self._tasks.append(loop.create_task(self._reap()))
+
+    async def stop(self) -> None:
+        for job in self.store:
+            self.cancel(job, "shutting down")
+        for task in self._tasks:
+            task.cancel()
+        await asyncio.gather(*self._tasks, return_exceptions=True)
+        self._tasks = []
+        self._queue = None
+
+    def submit(self, question: str, session_id: Optional[str] = None) -> Job:
+        if self._queue is None:
+            raise RuntimeError("Job runner is not started")
+        if self._queue.full():
+            self.counters["rejected"] += 1
+            raise Overloaded(503, "job queue full", max(1.0, self._queue.qsize() / max(self.workers, 1)))
+        job = Job(question, session_id)
+        self.store.add(job)
+        self._queue.put_nowait(job)
+        self.counters["submitted"] += 1
+        return job
+
+    def cancel(self, job: Job, reason: str = "cancelled by client") -> None:
+        if job.finished:
+            return
+        if job._task is not None:
+            job._task.cancel()
+        job._set("cancelled", error=reason)
+        self.counters["cancelled"] += 1
+        logger.info("Job %s cancelled: %s", job.job_id, reason)
+
+    async def _worker(self) -> None:
+        while True:
+            job = await self._queue.get()
+            if job.finished:  # cancelled while queued
+                continue
+            job._set("running")
+            job._task = asyncio.ensure_future(self._run(job))
+            try:
+                # wait() rather than await: a cancelled job must not stop the worker
+                await asyncio.wait({job._task})
+            except asyncio.CancelledError:
+                job._task.cancel()
+                raise
+            finally:
+                job._task = None
+            JOB_SECONDS.observe(job.started_at - job.created_at, "queued", job.status)
+            JOB_SECONDS.observe(job.finished_at - job.started_at, "run", job.status)
+
+    async def _run(self, job: Job) -> None:
+        track_stale()  # per job, so the result's "stale" flag is its own
+        try:
+            result = await self.handler(job.question, job.session_id)
+        except asyncio.CancelledError:
+            raise
+        except Overloaded as e:
+            job._set("failed", error=f"Server busy; retry in {e.retry_after}s")
+            self.counters["failed"] += 1
+        except Exception as e:
+            logger.error("Job %s failed: %s", job.job_id, e)
+            job._set("failed", error="Something went wrong while processing your query.")
+            self.counters["failed"] += 1
+        else:
+            job._set("done", result=result)
+            self.counters["done"] += 1
+
+    async def _reap(self) -> None:
+        interval = min(max(self.abandon_after / 4, 0.01), 5.0)
+        while True:
+            await asyncio.sleep(interval)
+            now = time.monotonic()
+            for job in self.store:
+                if not job.finished and now - job.last_seen > self.abandon_after:
+                    self.counters["abandoned"] += 1
+                    self.cancel(job, "abandoned by client")
+            self.store.prune()
+
+    def stats(self) -> dict:
+        return {
+            "workers": self.workers,
+            "queued": self.queued,
+            "running": self.running,
+            "stored": len(self.store),
+            **self.counters,
+        }
+
+
+async def _answer(question: str, session_id: Optional[str]) -> Dict[str, Any]:
+    from ..core.agent import answer_question
+
+    return await answer_question(question, session_id)
+
+
+jobs = JobRunner(
+    _answer,
+    workers=settings.JOB_WORKERS,
+    max_queue=settings.JOB_QUEUE_SIZE,
+    abandon_after=settings.JOB_ABANDON_AFTER,
+    store=JobStore(ttl=settings.JOB_TTL, max_jobs=settings.JOB_MAX_STORED),
+)
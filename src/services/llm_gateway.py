@@ -0,0 +1,276 @@
+"""
+Async gateway to the OpenRouter chat-completions API.
+
+* connect/read timeouts on every call
+* jittered exponential retries on 429, 5xx, timeouts and connection errors
+  (honouring ``Retry-After``)
+* a semaphore caps concurrent generations; callers beyond the cap queue and
+  the queue depth / wait time are tracked
+* optional hedging: if the primary model has not answered after
+  ``hedge_after`` seconds, the same prompt is sent to a fallback model and the
+  first answer wins
+* cancelling the caller (e.g. the HTTP client went away) cancels the
+  in-flight upstream requests and closes open streams
+"""
+import asyncio
+import random
+import time
+from typing import TYPE_CHECKING, AsyncIterator, Dict, List, Optional
+
+from ..config import settings
+from ..utils.logger import setup_logger
+from ..utils.metrics import LLM_ERRORS, LLM_SECONDS, span
+from .single_flight import SingleFlight
+
+if TYPE_CHECKING:
+    from openai import AsyncOpenAI
+
+logger = setup_logger(__name__)
+
+RETRYABLE_STATUS = {408, 409, 429, 500, 502, 503, 504}
+
+
+def _is_retryable(error: Exception) -> bool:
+    import openai
+
+    if isinstance(error, (openai.APITimeoutError, openai.APIConnectionError)):
+        return True
+    return isinstance(error, openai.APIStatusError) and error.status_code in RETRYABLE_STATUS
+
+
+def _retry_after(error: Exception) -> Optional[float]:
+    response = getattr(error, "response", None)
+    value = response.headers.get("retry-after") if response is not None else None
+    try:
+        return float(value) if value is not None else None
+    except ValueError:
+        return None
+
+
+class LLMGateway:
+    def __init__(
+        self,
+        api_key: Optional[str],
+        base_url: str,
+        model: str,
+        fallback_model: Optional[str] = None,
+        connect_timeout: float = 5.0,
+        read_timeout: float = 60.0,
+        max_retries: int = 2,
+        retry_base_delay: float = 0.5,
+        max_concurrency: int = 16,
+        hedge_after: float = 0.0,
+    ):
+        self.api_key = api_key
+        self.base_url = base_url
+        self.model = model
+        self.fallback_model = fallback_model or None
+        self.connect_timeout = connect_timeout
+        self.read_timeout = read_timeout
+        self.max_retries = max_retries
+        self.retry_base_delay = retry_base_delay
+        self.max_concurrency = max_concurrency
+        self.hedge_after = hedge_after
+
+        self._client: Optional["AsyncOpenAI"] = None
+        self._semaphore: Optional[asyncio.Semaphore] = None
+        self.in_flight = 0
+        self.waiting = 0
+        self.counters: Dict[str, float] = {
+            "requests": 0, "completed": 0, "failed": 0, "cancelled": 0, "retries": 0,
+            "hedges": 0, "hedge_wins": 0, "max_waiting": 0, "queue_wait_seconds": 0.0,
+            "prompt_tokens": 0, "completion_tokens": 0,
+        }
+
+    def client(self) -> "AsyncOpenAI":
+        if self._client is None:
+            # Imported on first use (or by the startup warm-up): the SDK takes
+            # most of a second to import.
+            import openai
+
+            self._client = openai.AsyncOpenAI(
+                base_url=self.base_url,
+                api_key=self.api_key,
+                timeout=openai.Timeout(self.read_timeout, connect=self.connect_timeout),
+                max_retries=0,  # retries are handled here, with jitter and metrics
+            )
+        return self._client
+
+    async def aclose(self) -> None:
+        if self._client is not None:
+            await self._client.close()
+            self._client = None
+        self._semaphore = None
+
+    # -- admission ---------------------------------------------------------
+
+    async def _acquire(self) -> None:
+        if self._semaphore is None:
+            self._semaphore = asyncio.Semaphore(self.max_concurrency)
+        self.waiting += 1
+        self.counters["max_waiting"] = max(self.counters["max_waiting"], self.waiting)
+        started = time.perf_counter()
+        try:
+            await self._semaphore.acquire()
+        finally:
+            self.waiting -= 1
+            self.counters["queue_wait_seconds"] += time.perf_counter() - started
+        self.in_flight += 1
+
+    def _release(self) -> None:
+        self.in_flight -= 1
+        self._semaphore.release()
+
+    async def _backoff(self, attempt: int, error: Exception) -> None:
+        delay = _retry_after(error)
+        if delay is None:
+            # Full jitter: uniform in [0, base * 2^attempt]
+            delay = random.uniform(0, self.retry_base_delay * (2 ** attempt))
+        self.counters["retries"] += 1
+        logger.warning("LLM call failed (%s); retrying in %.2fs", error.__class__.__name__, delay)
+        await asyncio.sleep(delay)
+
+    # -- completions -------------------------------------------------------
+
+    async def _complete_once(self, messages: List[dict], model: str) -> str:
+        for attempt in range(self.max_retries + 1):
+            try:
+                res = await self.client().chat.completions.create(model=model, messages=messages)
+                usage = getattr(res, "usage", None)
+                if usage is not None:
+                    self.counters["prompt_tokens"] += usage.prompt_tokens or 0
+                    self.counters["completion_tokens"] += usage.completion_tokens or 0
+                content = res.choices[0].message.content
+                return content if content is not None else ""
+            except Exception as e:
+                if attempt >= self.max_retries or not _is_retryable(e):
+                    raise
+                await self._backoff(attempt, e)
+        raise RuntimeError("unreachable")
+
+    async def _complete_hedged(self, messages: List[dict]) -> str:
+        primary = asyncio.ensure_future(self._complete_once(messages, self.model))
+        done, _ = await asyncio.wait({primary}, timeout=self.hedge_after)
+        if done:
+            return primary.result()
+
+        self.counters["hedges"] += 1
+        logger.info("Primary model slower than %ss; hedging to %s", self.hedge_after, self.fallback_model)
+        hedge = asyncio.ensure_future(self._complete_once(messages, self.fallback_model))
+        pending = {primary, hedge}
+        try:
+            while pending:
+                done, pending = await asyncio.wait(pending, return_when=asyncio.FIRST_COMPLETED)
+                for task in done:
+                    if task.exception() is None:
+                        if task is hedge:
+                            self.counters["hedge_wins"] += 1
+                        return task.result()
+            # Both failed: surface the primary's error.
+            return primary.result()
+        finally:
+            for task in (primary, hedge):
+                if not task.done():
+                    task.cancel()
+
+    async def complete(self, prompt: str) -> str:
+        """Return the full completion for a single user prompt."""
+        messages = [{"role": "user", "content": prompt}]
+        self.counters["requests"] += 1
+        with span("llm.complete", LLM_SECONDS, ("complete",), LLM_ERRORS, model=self.model):
+            await self._acquire()
+            try:
+                if self.fallback_model and self.hedge_after > 0:
+                    text = await self._complete_hedged(messages)
+                else:
+                    text = await self._complete_once(messages, self.model)
+                self.counters["completed"] += 1
+                return text
+            except asyncio.CancelledError:
+                self.counters["cancelled"] += 1
+                raise
+            except Exception:
+                self.counters["failed"] += 1
+                raise
+            finally:
+                self._release()
+
+    async def stream(self, prompt: str) -> AsyncIterator[str]:
+        """
+        Yield completion chunks as they arrive.
+
+        Retries apply only until the first chunk; hedging is not used because
+        tokens already sent to the client cannot be taken back.
+        """
+        messages = [{"role": "user", "content": prompt}]
+        self.counters["requests"] += 1
+        # Timed by hand: a span's context cannot stay attached across yields.
+        started = time.perf_counter()
+        await self._acquire()
+        stream = None
+        try:
+            for attempt in range(self.max_retries + 1):
+                try:
+                    stream = await self.client().chat.completions.create(
+                        model=self.model, messages=messages, stream=True
+                    )
+                    break
+                except Exception as e:
+                    if attempt >= self.max_retries or not _is_retryable(e):
+                        raise
+                    await self._backoff(attempt, e)
+            async for chunk in stream:
+                if chunk.choices and chunk.choices[0].delta.content:
+                    yield chunk.choices[0].delta.content
+            self.counters["completed"] += 1
+        except (asyncio.CancelledError, GeneratorExit):
+            self.counters["cancelled"] += 1
+            raise
+        except Exception as e:
+            self.counters["failed"] += 1
+            LLM_ERRORS.inc("stream", type(e).__name__)
+            raise
+        finally:
+            if stream is not None:
+                await _close_stream(stream)
+            self._release()
+            LLM_SECONDS.observe(time.perf_counter() - started, "stream")
+
+    def stats(self) -> dict:
+        return {
+            "model": self.model,
+            "fallback_model": self.fallback_model,
+            "max_concurrency": self.max_concurrency,
+            "in_flight": self.in_flight,
+            "waiting": self.waiting,
+            **self.counters,
+        }
+
+
+async def _close_stream(stream) -> None:
+    # openai>=1.x exposes AsyncStream.close(); older releases only the raw response.
+    close = getattr(stream, "close", None)
+    try:
+        if close is not None:
+            await close()
+        else:
+            await stream.response.aclose()
+    except Exception as e:
+        logger.debug("Ignoring error while closing LLM stream: %s", e)
+
+
+llm = LLMGateway(
+    api_key=settings.OPENROUTER_API_KEY,
+    base_url=settings.OPENROUTER_API_BASE,
+    model=settings.DEFAULT_MODEL,
+    fallback_model=settings.LLM_FALLBACK_MODEL,
+    connect_timeout=settings.LLM_CONNECT_TIMEOUT,
+    read_timeout=settings.LLM_READ_TIMEOUT,
+    max_retries=settings.LLM_MAX_RETRIES,
+    retry_base_delay=settings.LLM_RETRY_BASE_DELAY,
+    max_concurrency=settings.LLM_MAX_CONCURRENCY,
+    hedge_after=settings.LLM_HEDGE_AFTER,
+)
+
+# Shared by the agent so identical concurrent questions cost one generation.
+llm_flight = SingleFlight("llm")
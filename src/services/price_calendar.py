@@ -0,0 +1,300 @@
+"""
+Precomputed price calendars and quotes.
+
+For each package, ``PriceCalendarStore`` keeps a compact calendar: one
+``array('d')`` of prices per common party shape, indexed by day offset from
+the calendar's start date (NaN where upstream had no price). Lookups and
+range minima are answered from memory; a background scheduler rebuilds
+calendars that its invalidation policies flag as stale.
+
+Quotes for party shapes outside the calendar fall back to a live pricing
+call, cached per tuple through ``pricing.price_one``. ``quote_nowait`` never
+touches upstream and is what the agent uses while building a prompt.
+"""
+import asyncio
+import math
+import time
+from array import array
+from dataclasses import dataclass, field
+from datetime import date, timedelta
+from typing import Any, Callable, Dict, List, Optional, Tuple
+
+from ..config import settings
+from ..utils.logger import setup_logger
+from .catalog import PackageRecord, catalog
+from .pricing import price_one
+
+logger = setup_logger(__name__)
+
+# (adults, children, rooms, extra adults)
+Party = Tuple[int, int, int, int]
+
+
+def parse_parties(spec: str) -> List[Party]:
+    """``"2-0-1-0,2-2-1-0"`` -> ``[(2, 0, 1, 0), (2, 2, 1, 0)]``."""
+    parties = []
+    for shape in spec.split(","):
+        parts = [int(p) for p in shape.strip().split("-") if p]
+        if parts:
+            parties.append(tuple((parts + [0, 0, 0, 0])[:4]))
+    return parties
+
+
+def party_for(adults: Optional[int], children: Optional[int]) -> Party:
+    adults = adults or 2
+    return (adults, children or 0, max(1, math.ceil(adults / 2)), 0)
+
+
+def party_key(party: Party) -> str:
+    return "-".join(str(n) for n in party)
+
+
+def extract_price(pricing: Dict[str, Any]) -> float:
+    for key in ("totalPrice", "finalPrice", "totalAmount", "price"):
+        try:
+            return float(pricing[key])
+        except (KeyError, TypeError, ValueError):
+            continue
+    return math.nan
+
+
+@dataclass
+class PriceCalendar:
+    package_id: str
+    start: date
+    days: int
+    fingerprint: str
+    built_at: float = field(default_factory=time.time)
+    prices: Dict[Party, array] = field(default_factory=dict)
+
+    def _offset(self, day: date) -> Optional[int]:
+        offset = (day - self.start).days
+        return offset if 0 <= offset < self.days else None
+
+    def price(self, day: date, party: Party) -> Optional[float]:
+        column = self.prices.get(party)
+        offset = self._offset(day)
+        if column is None or offset is None or math.isnan(column[offset]):
+            return None
+        return column[offset]
+
+    def cheapest(self, party: Party, start: date, end: date) -> Optional[Tuple[date, float]]:
+        """Lowest known price for a start date in ``[start, end]``."""
+        column = self.prices.get(party)
+        if column is None:
+            return None
+        lo = max((start - self.start).days, 0)
+        hi = min((end - self.start).days, self.days - 1)
+        best: Optional[Tuple[int, float]] = None
+        for offset in range(lo, hi + 1):
+            value = column[offset]
+            if not math.isnan(value) and (best is None or value < best[1]):
+                best = (offset, value)
+        if best is None:
+            return None
+        return self.start + timedelta(days=best[0]), best[1]
+
+
+# -- invalidation policies -------------------------------------------------
+# A policy looks at a calendar and the package's current catalog record (None
+# if the package left the catalog) and returns True when it must be rebuilt.
+
+Policy = Callable[[PriceCalendar, Optional[PackageRecord]], bool]
+
+
+def expire_after(seconds: float) -> Policy:
+    return lambda calendar, record: time.time() - calendar.built_at > seconds
+
+
+def catalog_changed(calendar: PriceCalendar, record: Optional[PackageRecord]) -> bool:
+    return record is not None and record.fingerprint != calendar.fingerprint
+
+
+def window_drifted(max_days: int) -> Policy:
+    """Rebuild once the calendar's first day is more than ``max_days`` in the past."""
+    return lambda calendar, record: (date.today() - calendar.start).days > max_days
+
+
+class PriceCalendarStore:
+    def __init__(
+        self,
+        parties: List[Party],
+        days: int = 60,
+        concurrency: int = 4,
+        interval: float = 3600.0,
+        policies: Optional[List[Policy]] = None,
+        warm_on_demand: bool = True,
+    ):
+        self.parties = parties
+        self.days = days
+        self.concurrency = concurrency
+        self.interval = interval
+        self.policies: List[Policy] = list(policies or [])
+        # A build costs days x parties pricing calls, so lookups only trigger
+        # one when calendars are enabled.
+        self.warm_on_demand = warm_on_demand
+        self.calendars: Dict[str, PriceCalendar] = {}
+        self.counters = {"builds": 0, "build_errors": 0, "calendar_quotes": 0, "live_quotes": 0, "misses": 0}
+        self._building: Dict[str, asyncio.Task] = {}
+        self._task: Optional[asyncio.Task] = None
+        self._semaphore: Optional[asyncio.Semaphore] = None
+
+    def add_policy(self, policy: Policy) -> None:
+        self.policies.append(policy)
+
+    def invalidate(self, package_id: Optional[str] = None) -> None:
+        if package_id is None:
+            self.calendars.clear()
+        else:
+            self.calendars.pop(package_id, None)
+
+    def is_stale(self, package_id: str) -> bool:
+        calendar = self.calendars.get(package_id)
+        if calendar is None:
+            return True
+        record = catalog.index.get(package_id)
+        return any(policy(calendar, record) for policy in self.policies)
+
+    async def build(self, package_id: str) -> PriceCalendar:
+        """Price every (day, party) cell for one package and swap the calendar in."""
+        if self._semaphore is None:
+            self._semaphore = asyncio.Semaphore(self.concurrency)
+        start = date.today()
+        record = catalog.index.get(package_id)
+        calendar = PriceCalendar(package_id, start, self.days, record.fingerprint if record else "")
+
+        async def cell(party: Party, offset: int) -> float:
+            day = (start + timedelta(days=offset)).isoformat()
+            async with self._semaphore:
+                try:
+                    return extract_price(await price_one((package_id, day, *party)))
+                except Exception as e:
+                    logger.debug("Calendar cell %s %s %s failed: %s", package_id, day, party_key(party), e)
+                    return math.nan
+
+        for party in self.parties:
+            values = await asyncio.gather(*(cell(party, offset) for offset in range(self.days)))
+            calendar.prices[party] = array("d", values)
+
+        known = sum(1 for column in calendar.prices.values() for v in column if not math.isnan(v))
+        if not known:
+            self.counters["build_errors"] += 1
+            raise RuntimeError(f"No prices available for package {package_id}")
+        self.calendars[package_id] = calendar
+        self.counters["builds"] += 1
+        return calendar
+
+    def warm(self, package_id: str) -> None:
+        """Build ``package_id``'s calendar in the background unless one is already building."""
+        task = self._building.get(package_id)
+        if task is not None and not task.done():
+            return
+
+        async def _build():
+            try:
+                await self.build(package_id)
+            except Exception as e:
+                logger.warning("Price calendar build for %s failed: %s", package_id, e)
+            finally:
+                self._building.pop(package_id, None)
+
+        self._building[package_id] = asyncio.get_running_loop().create_task(_build())
+
+    def warm_if_stale(self, package_id: str) -> None:
+        """Rebuild a missing or stale calendar in the background, if on-demand builds are enabled."""
+        if self.is_stale(package_id):
+            self.counters["misses"] += 1
+            if self.warm_on_demand:
+                self.warm(package_id)
+
+    def quote_nowait(self, package_id: str, day: date, party: Party) -> Optional[float]:
+        """Calendar price, or None (and a background warm-up) if it is not known yet."""
+        calendar = self.calendars.get(package_id)
+        self.warm_if_stale(package_id)
+        if calendar is None:
+            return None
+        value = calendar.price(day, party)
+        if value is not None:
+            self.counters["calendar_quotes"] += 1
+        return value
+
+    def cheapest_nowait(self, package_id: str, party: Party, start: date, end: date) -> Optional[Tuple[date, float]]:
+        calendar = self.calendars.get(package_id)
+        self.warm_if_stale(package_id)
+        if calendar is None:
+            return None
+        return calendar.cheapest(party, start, end)
+
+    async def quote(self, package_id: str, day: date, party: Party) -> Dict[str, Any]:
+        """Quote from the calendar when possible, otherwise live (TTL-cached per tuple)."""
+        value = self.quote_nowait(package_id, day, party)
+        if value is not None:
+            return {"packageId": package_id, "startDate": day.isoformat(), "party": party_key(party),
+                    "totalPrice": value, "source": "calendar"}
+        self.counters["live_quotes"] += 1
+        pricing = await price_one((package_id, day.isoformat(), *party))
+        price = extract_price(pricing)
+        # No price upstream: None, since NaN is not valid JSON
+        return {"packageId": package_id, "startDate": day.isoformat(), "party": party_key(party),
+                "totalPrice": None if math.isnan(price) else price, "source": "live", "pricing": pricing}
+
+    async def refresh_stale(self) -> int:
+        """Rebuild every calendar the policies flag, one package at a time."""
+        rebuilt = 0
+        for package_id in list(catalog.index.by_id):
+            if self.is_stale(package_id):
+                try:
+                    await self.build(package_id)
+                    rebuilt += 1
+                except Exception as e:
+                    logger.warning("Price calendar build for %s failed: %s", package_id, e)
+        for package_id in set(self.calendars) - set(catalog.index.by_id):
+            del self.calendars[package_id]
+        return rebuilt
+
+    async def _run(self) -> None:
+        while True:
+            try:
+                started = time.perf_counter()
+                rebuilt = await self.refresh_stale()
+                logger.info("Price calendars: rebuilt %s in %.1fs", rebuilt, time.perf_counter() - started)
+            except Exception as e:
+                logger.error("Price calendar refresh failed: %s", e)
+            await asyncio.sleep(self.interval)
+
+    def start(self) -> None:
+        if self._task is None or self._task.done():
+            self._task = asyncio.get_running_loop().create_task(self._run())
+
+    async def stop(self) -> None:
+        tasks = list(self._building.values())
+        if self._task is not None:
+            tasks.append(self._task)
+            self._task = None
+        for task in tasks:
+            task.cancel()
+        await asyncio.gather(*tasks, return_exceptions=True)
+        self._building.clear()
+
+    def stats(self) -> dict:
+        return {
+            "calendars": len(self.calendars),
+            "building": len(self._building),
+            "days": self.days,
+            "parties": [party_key(p) for p in self.parties],
+            **self.counters,
+        }
+
+
+price_calendars = PriceCalendarStore(
+    parties=parse_parties(settings.PRICE_CALENDAR_PARTIES),
+    days=settings.PRICE_CALENDAR_DAYS,
+    concurrency=settings.PRICE_CALENDAR_CONCURRENCY,
+    interval=settings.PRICE_CALENDAR_INTERVAL,
+    policies=[
+        expire_after(settings.PRICE_CALENDAR_TTL),
+        catalog_changed,
+        window_drifted(7),
+    ],
+    warm_on_demand=settings.PRICE_CALENDAR_ENABLED,
+)
@@ -0,0 +1,120 @@
+"""
+Batch pricing: many (package, start date, party) tuples in one request.
+
+Tuples are deduplicated, priced concurrently under a semaphore, cached per
+tuple in the ``pricing`` namespace of the catalog cache, and yielded in
+completion order so the caller can stream them. A failing tuple is reported
+as its own result instead of failing the batch.
+"""
+import asyncio
+import json
+from datetime import date, timedelta
+from typing import Any, AsyncIterator, Dict, List, Optional, Tuple
+
+from ..config import settings
+from ..models.schemas import PricingBatchRequest, PricingDateRange
+from ..utils.logger import setup_logger
+from .cache import catalog_cache
+from .tripxplo_client import fetch_package_pricing
+
+logger = setup_logger(__name__)
+
+PARTY_FIELDS = ("noAdult", "noChild", "noRoomCount", "noExtraAdult")
+
+PricingTuple = Tuple[str, str, int, int, int, int]
+
+
+class BatchTooLarge(ValueError):
+    pass
+
+
+def expand_range(spec: PricingDateRange) -> List[Dict[str, Any]]:
+    start, end = date.fromisoformat(spec.fromDate), date.fromisoformat(spec.toDate)
+    if end < start:
+        raise ValueError("toDate must not be before fromDate")
+    party = {name: getattr(spec, name) for name in PARTY_FIELDS}
+    days = (end - start).days + 1
+    return [
+        {"packageId": package_id, "startDate": (start + timedelta(days=i)).isoformat(), **party}
+        for package_id in spec.packageIds
+        for i in range(days)
+    ]
+
+
+def collect_items(request: PricingBatchRequest, max_items: int) -> List[Dict[str, Any]]:
+    items = [item.model_dump() for item in request.items]
+    if request.range is not None:
+        span = (date.fromisoformat(request.range.toDate) - date.fromisoformat(request.range.fromDate)).days + 1
+        if len(items) + span * len(request.range.packageIds) > max_items:
+            raise BatchTooLarge(f"A batch may price at most {max_items} tuples")
+        items.extend(expand_range(request.range))
+    if len(items) > max_items:
+        raise BatchTooLarge(f"A batch may price at most {max_items} tuples")
+    return items
+
+
+def tuple_key(item: Dict[str, Any]) -> PricingTuple:
+    return (str(item["packageId"]), str(item["startDate"]), *(int(item.get(name) or 0) for name in PARTY_FIELDS))
+
+
+async def price_one(key: PricingTuple) -> dict:
+    package_id, start_date, *party = key
+    params = {"startDate": start_date, **dict(zip(PARTY_FIELDS, party))}
+    return await catalog_cache.get_or_fetch(
+        "pricing", json.dumps(key, separators=(",", ":")), lambda: fetch_package_pricing(package_id, params)
+    )
+
+
+async def price_batch(
+    items: List[Dict[str, Any]], concurrency: Optional[int] = None
+) -> AsyncIterator[Dict[str, Any]]:
+    """
+    Yield one result per unique tuple as soon as it is priced, then a summary.
+
+    ``indexes`` lists the positions in ``items`` a result answers, so
+    duplicate tuples are priced once but still accounted for.
+    """
+    positions: Dict[PricingTuple, List[int]] = {}
+    for index, item in enumerate(items):
+        positions.setdefault(tuple_key(item), []).append(index)
+
+    semaphore = asyncio.Semaphore(concurrency or settings.PRICING_BATCH_CONCURRENCY)
+
+    async def run(key: PricingTuple) -> Dict[str, Any]:
+        package_id, start_date, *party = key
+        result: Dict[str, Any] = {
+            "type": "result",
+            "indexes": positions[key],
+            "packageId": package_id,
+            "startDate": start_date,
+            **dict(zip(PARTY_FIELDS, party)),
+        }
+        async with semaphore:
+            try:
+                result["pricing"] = await price_one(key)
+                result["status"] = "ok"
+            except Exception as e:
+                logger.warning("Batch pricing failed for %s on %s: %s", package_id, start_date, e)
+                result["status"] = "error"
+                result["error"] = str(e) or e.__class__.__name__
+        return result
+
+    tasks = [asyncio.ensure_future(run(key)) for key in positions]
+    failed = 0
+    try:
+        for next_done in asyncio.as_completed(tasks):
+            result = await next_done
+            failed += result["status"] == "error"
+            yield result
+    finally:
+        # The client may disconnect mid-batch: stop pricing what nobody will read.
+        for task in tasks:
+            task.cancel()
+
+    yield {
+        "type": "summary",
+        "requested": len(items),
+        "unique": len(positions),
+        "succeeded": len(positions) - failed,
+        "failed": failed,
+    }
@@ -0,0 +1,131 @@
+"""
+Cache of finished LLM answers.
+
+Two keying modes:
+
+* ``exact``: hash of model + final prompt, so only byte-identical prompts hit.
+* ``semantic``: model + normalized intent + destinations + IDs of the
+  retrieved items + other prompt facets (price hints), so "goa packages"
+  and "packages for goa trip" share one answer as long as retrieval picked
+  the same packages. Only listing prompts are keyed this way; for follow-up
+  and detail prompts the question itself matters ("does P1 include
+  flights?" vs "P1's itinerary?" retrieve the same item), so they are keyed
+  exactly.
+
+Entries expire after ``ttl`` seconds, the store is a size-bounded LRU, and the
+whole cache is dropped when the catalog index version changes, since answers
+quote package names and prices.
+"""
+import hashlib
+import json
+import re
+import time
+from typing import Iterable, Iterator, Optional
+
+from ..config import settings
+from ..utils.logger import setup_logger
+from .cache import CacheEntry, LRUCache
+from .catalog import catalog
+
+logger = setup_logger(__name__)
+
+MODES = ("off", "exact", "semantic")
+
+_CHUNK = re.compile(r"\S+\s*|\s+")
+
+
+def _digest(*parts: str) -> str:
+    return hashlib.blake2b("\x1f".join(parts).encode(), digest_size=16).hexdigest()
+
+
+def replay_chunks(text: str) -> Iterator[str]:
+    """Split a cached answer into word-sized chunks so it can be streamed like a live one."""
+    return (m.group(0) for m in _CHUNK.finditer(text))
+
+
+class ResponseCache:
+    def __init__(
+        self,
+        mode: str = "semantic",
+        ttl: float = 1800.0,
+        max_entries: int = 1000,
+        max_bytes: int = 16 * 1024 * 1024,
+    ):
+        if mode not in MODES:
+            raise ValueError(f"RESPONSE_CACHE_MODE must be one of {MODES}, got {mode!r}")
+        self.mode = mode
+        self.ttl = ttl
+        self.l1 = LRUCache(max_entries=max_entries, max_bytes=max_bytes)
+        self.counters = {"hits": 0, "misses": 0, "stores": 0, "invalidations": 0}
+        self._version = catalog.index.version
+
+    def key(
+        self,
+        model: str,
+        prompt: str,
+        intent: str,
+        destinations: Iterable[str],
+        item_ids: Iterable[str],
+        facets: Iterable[str] = (),
+        listing: bool = True,
+    ) -> Optional[str]:
+        if self.mode == "exact" or (self.mode == "semantic" and not listing):
+            return "exact:" + _digest(model, prompt)
+        if self.mode == "semantic":
+            signature = json.dumps(
+                [intent, sorted({d.lower() for d in destinations}), list(item_ids), list(facets)],
+                separators=(",", ":"),
+            )
+            return "semantic:" + _digest(model, signature)
+        return None
+
+    def _check_version(self) -> None:
+        version = catalog.index.version
+        if version != self._version:
+            if len(self.l1):
+                logger.info("Catalog version %s -> %s; dropping %s cached answers", self._version, version, len(self.l1))
+                self.counters["invalidations"] += 1
+            self.l1.clear()
+            self._version = version
+
+    def get(self, key: Optional[str]) -> Optional[str]:
+        if key is None:
+            return None
+        self._check_version()
+        entry = self.l1.get(key)
+        if entry is None or not entry.is_fresh(time.time()):
+            if entry is not None:
+                self.l1.delete(key)
+            self.counters["misses"] += 1
+            return None
+        self.counters["hits"] += 1
+        return entry.value
+
+    def set(self, key: Optional[str], text: str) -> None:
+        if key is None or not text:
+            return
+        self._check_version()
+        expires = time.time() + self.ttl
+        self.l1.set(key, CacheEntry(text, len(text.encode()), expires, expires))
+        self.counters["stores"] += 1
+
+    def clear(self) -> None:
+        self.l1.clear()
+
+    def stats(self) -> dict:
+        return {
+            "mode": self.mode,
+            "entries": len(self.l1),
+            "bytes": self.l1.bytes,
+            "evictions": self.l1.evictions,
+            "catalog_version": self._version,
+            **self.counters,
+        }
+
+
+response_cache = ResponseCache(
+    mode=settings.RESPONSE_CACHE_MODE,
+    ttl=settings.RESPONSE_CACHE_TTL,
+    max_entries=settings.RESPONSE_CACHE_MAX_ENTRIES,
+    max_bytes=settings.RESPONSE_CACHE_MAX_BYTES,
+)
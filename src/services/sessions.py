@@ -0,0 +1,220 @@
+"""
+Conversation sessions for multi-turn chat.
+
+A ``Session`` keeps a short window of recent messages, a compact summary of
+older turns and the entities resolved so far (destinations, shown and
+selected package IDs, party, month), so follow-ups like "what about hotels
+for that one?" can skip re-retrieval. Stores are pluggable: an in-process
+LRU with TTL, or a SQLite file shared by every worker on the host.
+"""
+import asyncio
+import json
+import os
+import sqlite3
+import threading
+import time
+import uuid
+from collections import OrderedDict
+from dataclasses import asdict, dataclass, field
+from typing import Any, Dict, List, Optional, Tuple
+
+from ..config import settings
+from ..utils.logger import setup_logger
+
+logger = setup_logger(__name__)
+
+
+def _clip(text: str, limit: int) -> str:
+    text = " ".join(text.split())
+    return text if len(text) <= limit else text[: limit - 1] + "…"
+
+
+@dataclass
+class Session:
+    session_id: str
+    messages: List[Dict[str, str]] = field(default_factory=list)
+    summary: str = ""
+    context: Dict[str, Any] = field(default_factory=dict)
+    updated_at: float = field(default_factory=time.time)
+
+    def record_turn(
+        self,
+        question: str,
+        answer: str,
+        context: Dict[str, Any],
+        max_messages: int = 6,
+        message_chars: int = 600,
+        summary_chars: int = 800,
+    ) -> None:
+        """Append one exchange, keeping the window and the summary bounded."""
+        self.messages.append({"role": "user", "content": _clip(question, message_chars)})
+        self.messages.append({"role": "assistant", "content": _clip(answer, message_chars)})
+        self.context = context
+        self.updated_at = time.time()
+
+        overflow, self.messages = self.messages[:-max_messages], self.messages[-max_messages:]
+        lines = [line for line in self.summary.splitlines() if line]
+        lines += [f"- asked: {_clip(m['content'], 120)}" for m in overflow if m["role"] == "user"]
+        while lines and sum(len(line) + 1 for line in lines) > summary_chars:
+            lines.pop(0)
+        self.summary = "\n".join(lines)
+
+    def to_json(self) -> str:
+        return json.dumps(asdict(self), separators=(",", ":"), default=str)
+
+    @classmethod
+    def from_json(cls, payload: str) -> "Session":
+        return cls(**json.loads(payload))
+
+
+class MemorySessionStore:
+    """Per-process LRU of sessions with an idle TTL."""
+
+    def __init__(self, max_sessions: int = 10000, ttl: float = 3600.0):
+        self.max_sessions = max_sessions
+        self.ttl = ttl
+        self._data: "OrderedDict[str, Tuple[float, str]]" = OrderedDict()
+
+    def __len__(self) -> int:
+        return len(self._data)
+
+    async def get(self, session_id: str) -> Optional[Session]:
+        item = self._data.get(session_id)
+        if item is None:
+            return None
+        expires, payload = item
+        if expires < time.time():
+            del self._data[session_id]
+            return None
+        self._data.move_to_end(session_id)
+        return Session.from_json(payload)
+
+    async def put(self, session: Session) -> None:
+        self._data.pop(session.session_id, None)
+        self._data[session.session_id] = (time.time() + self.ttl, session.to_json())
+        while len(self._data) > self.max_sessions:
+            self._data.popitem(last=False)
+
+    async def delete(self, session_id: str) -> None:
+        self._data.pop(session_id, None)
+
+    async def aclose(self) -> None:
+        pass
+
+
+class SQLiteSessionStore:
+    """Sessions in a SQLite file, so any uvicorn worker can continue a conversation."""
+
+    def __init__(self, path: str, ttl: float = 3600.0):
+        self.path = path
+        self.ttl = ttl
+        self._lock = threading.Lock()
+        self._conn: Optional[sqlite3.Connection] = None
+
+    def _connection(self) -> sqlite3.Connection:
+        # Connect lazily so a preloaded app never shares a handle across fork().
+        if self._conn is None:
+            directory = os.path.dirname(self.path)
+            if directory:
+                os.makedirs(directory, exist_ok=True)
+            conn = sqlite3.connect(self.path, check_same_thread=False, timeout=5)
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("PRAGMA synchronous=NORMAL")
+            conn.execute(
+                "CREATE TABLE IF NOT EXISTS sessions ("
+                " id TEXT PRIMARY KEY, data TEXT NOT NULL, expires REAL NOT NULL)"
+            )
+            conn.commit()
+            self._conn = conn
+        return self._conn
+
+    def _get(self, session_id: str) -> Optional[str]:
+        with self._lock:
+            row = self._connection().execute(
+                "SELECT data FROM sessions WHERE id = ? AND expires >= ?", (session_id, time.time())
+            ).fetchone()
+        return row[0] if row else None
+
+    def _put(self, session_id: str, payload: str) -> None:
+        with self._lock:
+            conn = self._connection()
+            now = time.time()
+            conn.execute(
+                "INSERT OR REPLACE INTO sessions (id, data, expires) VALUES (?, ?, ?)",
+                (session_id, payload, now + self.ttl),
+            )
+            conn.execute("DELETE FROM sessions WHERE expires < ?", (now,))
+            conn.commit()
+
+    def _delete(self, session_id: str) -> None:
+        with self._lock:
+            conn = self._connection()
+            conn.execute("DELETE FROM sessions WHERE id = ?", (session_id,))
+            conn.commit()
+
+    async def get(self, session_id: str) -> Optional[Session]:
+        try:
+            payload = await asyncio.to_thread(self._get, session_id)
+        except sqlite3.Error as e:
+            logger.warning("Session read failed for %s: %s", session_id, e)
+            return None
+        return Session.from_json(payload) if payload else None
+
+    async def put(self, session: Session) -> None:
+        try:
+            await asyncio.to_thread(self._put, session.session_id, session.to_json())
+        except sqlite3.Error as e:
+            logger.warning("Session write failed for %s: %s", session.session_id, e)
+
+    async def delete(self, session_id: str) -> None:
+        await asyncio.to_thread(self._delete, session_id)
+
+    async def aclose(self) -> None:
+        with self._lock:
+            if self._conn is not None:
+                self._conn.close()
+                self._conn = None
+
+
+class SessionManager:
+    def __init__(self, store, max_messages: int = 6, message_chars: int = 600, summary_chars: int = 800):
+        self.store = store
+        self.max_messages = max_messages
+        self.message_chars = message_chars
+        self.summary_chars = summary_chars
+
+    async def load(self, session_id: Optional[str]) -> Session:
+        """The stored session, or a fresh one (new ID if none was given or it expired)."""
+        if session_id:
+            session = await self.store.get(session_id)
+            if session is not None:
+                return session
+        return Session(session_id=session_id or uuid.uuid4().hex)
+
+    async def record(self, session: Session, question: str, answer: str, context: Dict[str, Any]) -> None:
+        session.record_turn(
+            question, answer, context,
+            max_messages=self.max_messages,
+            message_chars=self.message_chars,
+            summary_chars=self.summary_chars,
+        )
+        await self.store.put(session)
+
+    async def aclose(self) -> None:
+        await self.store.aclose()
+
+
+def _build_sessions() -> SessionManager:
+    if settings.SESSION_BACKEND == "sqlite":
+        store = SQLiteSessionStore(settings.SESSION_SQLITE_PATH, ttl=settings.SESSION_TTL)
+    else:
+        store = MemorySessionStore(max_sessions=settings.SESSION_MAX_SESSIONS, ttl=settings.SESSION_TTL)
+    return SessionManager(
+        store,
+        max_messages=settings.SESSION_MAX_MESSAGES,
+        message_chars=settings.SESSION_MESSAGE_CHARS,
+        summary_chars=settings.SESSION_SUMMARY_CHARS,
+    )
+
+
+sessions = _build_sessions()
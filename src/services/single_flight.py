@@ -0,0 +1,151 @@
+"""
+Request coalescing ("single-flight") for identical concurrent calls.
+
+The first caller for a key starts the work; everyone who asks for the same
+key while it is in flight awaits the same task instead of issuing their own
+upstream or LLM call. Nothing is kept once the call finishes: results and
+errors go to the callers that were waiting and the next caller starts fresh.
+
+Waiters are reference-counted. One waiter being cancelled (its client went
+away) does not cancel the shared call, but the last one leaving does.
+"""
+import asyncio
+from collections import OrderedDict
+from typing import Any, AsyncIterator, Awaitable, Callable, Dict, List, Optional
+
+from ..utils.logger import setup_logger
+
+logger = setup_logger(__name__)
+
+
+class _Call:
+    def __init__(self, task: asyncio.Task):
+        self.task = task
+        self.waiters = 0
+
+
+class _Broadcast:
+    """Chunks of one shared stream, replayed to every subscriber from the start."""
+
+    def __init__(self):
+        self.chunks: List[Any] = []
+        self.done = False
+        self.error: Optional[BaseException] = None
+        self.changed = asyncio.Condition()
+        self.task: Optional[asyncio.Task] = None
+        self.waiters = 0
+
+
+class SingleFlight:
+    def __init__(self, name: str, max_tracked_keys: int = 1000):
+        self.name = name
+        self.max_tracked_keys = max_tracked_keys
+        self._calls: Dict[str, _Call] = {}
+        self._streams: Dict[str, _Broadcast] = {}
+        self.totals = {"calls": 0, "coalesced": 0, "errors": 0}
+        self._per_key: "OrderedDict[str, Dict[str, int]]" = OrderedDict()
+
+    def _count(self, key: str, event: str) -> None:
+        self.totals[event] += 1
+        counters = self._per_key.get(key)
+        if counters is None:
+            counters = self._per_key[key] = {"calls": 0, "coalesced": 0, "errors": 0}
+            if len(self._per_key) > self.max_tracked_keys:
+                self._per_key.popitem(last=False)
+        else:
+            self._per_key.move_to_end(key)
+        counters[event] += 1
+
+    def in_flight(self) -> int:
+        return len(self._calls) + len(self._streams)
+
+    async def do(self, key: str, fn: Callable[[], Awaitable[Any]]) -> Any:
+        """Run ``fn()`` once for all concurrent callers of ``key``."""
+        call = self._calls.get(key)
+        if call is None:
+            call = _Call(asyncio.ensure_future(fn()))
+            self._calls[key] = call
+            call.task.add_done_callback(lambda task: self._finish(key, call, task))
+            self._count(key, "calls")
+        else:
+            self._count(key, "coalesced")
+
+        call.waiters += 1
+        try:
+            return await asyncio.shield(call.task)
+        finally:
+            call.waiters -= 1
+            if call.waiters == 0 and not call.task.done():
+                call.task.cancel()
+
+    def _finish(self, key: str, call: _Call, task: asyncio.Task) -> None:
+        if self._calls.get(key) is call:
+            del self._calls[key]
+        if not task.cancelled() and task.exception() is not None:
+            self._count(key, "errors")
+
+    async def stream(self, key: str, factory: Callable[[], AsyncIterator[Any]]) -> AsyncIterator[Any]:
+        """
+        Share one async iterator between concurrent callers of ``key``.
+
+        Late joiners first receive the chunks produced so far, then follow
+        the live stream; an upstream error is raised in every subscriber.
+        """
+        broadcast = self._streams.get(key)
+        if broadcast is None:
+            broadcast = _Broadcast()
+            self._streams[key] = broadcast
+            broadcast.task = asyncio.ensure_future(self._pump(key, broadcast, factory))
+            self._count(key, "calls")
+        else:
+            self._count(key, "coalesced")
+
+        broadcast.waiters += 1
+        position = 0
+        try:
+            while True:
+                async with broadcast.changed:
+                    await broadcast.changed.wait_for(
+                        lambda: broadcast.done or len(broadcast.chunks) > position
+                    )
+                    pending = broadcast.chunks[position:]
+                    finished = broadcast.done
+                for chunk in pending:
+                    position += 1
+                    yield chunk
+                if finished and position == len(broadcast.chunks):
+                    if broadcast.error is not None:
+                        raise broadcast.error
+                    return
+        finally:
+            broadcast.waiters -= 1
+            if broadcast.waiters == 0 and not broadcast.task.done():
+                broadcast.task.cancel()
+
+    async def _pump(self, key: str, broadcast: _Broadcast, factory: Callable[[], AsyncIterator[Any]]) -> None:
+        try:
+            async for chunk in factory():
+                async with broadcast.changed:
+                    broadcast.chunks.append(chunk)
+                    broadcast.changed.notify_all()
+        except asyncio.CancelledError:
+            broadcast.error = asyncio.CancelledError()
+            raise
+        except Exception as e:
+            broadcast.error = e
+            self._count(key, "errors")
+        finally:
+            if self._streams.get(key) is broadcast:
+                del self._streams[key]
+            broadcast.done = True
+            async with broadcast.changed:
+                broadcast.changed.notify_all()
+
+    def stats(self, top: int = 20) -> dict:
+        busiest = sorted(self._per_key.items(), key=lambda item: -item[1]["coalesced"])[:top]
+        return {
+            "name": self.name,
+            "in_flight": self.in_flight(),
+            **self.totals,
+            "top_keys": {key: dict(counters) for key, counters in busiest if counters["coalesced"]},
+        }
@@ -0,0 +1,227 @@
+"""
+TripXplo access-token manager shared by the sync and async clients.
+
+* Tracks expiry from the JWT ``exp`` claim (falling back to ``expiresIn`` in
+  the login response, then to ``TOKEN_DEFAULT_TTL``).
+* Collapses concurrent logins into a single ``PUT /admin/auth/login``.
+* Refreshes ahead of expiry in the background so requests never wait on it.
+* ``refresh_*(stale_token)`` lets callers replay a request once after a 401.
+"""
+import asyncio
+import base64
+import json
+import threading
+import time
+from typing import Optional
+
+import requests
+
+from ..config import settings
+from ..utils.logger import setup_logger
+
+logger = setup_logger(__name__)
+
+LOGIN_PATH = "/admin/auth/login"
+
+
+def decode_expiry(token: str) -> Optional[float]:
+    """Return the ``exp`` claim of a JWT (unverified), or None if it has none."""
+    try:
+        payload = token.split(".")[1]
+        payload += "=" * (-len(payload) % 4)
+        exp = json.loads(base64.urlsafe_b64decode(payload)).get("exp")
+        return float(exp) if exp else None
+    except (IndexError, ValueError, TypeError, AttributeError):
+        return None
+
+
+class TokenManager:
+    def __init__(
+        self,
+        email: Optional[str],
+        password: Optional[str],
+        refresh_margin: float = 120.0,
+        default_ttl: float = 3600.0,
+    ):
+        self.email = email
+        self.password = password
+        self.refresh_margin = refresh_margin
+        self.default_ttl = default_ttl
+
+        self._token: Optional[str] = None
+        self._expires_at = 0.0
+        self._margin = refresh_margin
+        self._state_lock = threading.Lock()
+        self._sync_login_lock = threading.Lock()
+        self._inflight: Optional[asyncio.Task] = None
+        self._refresh_task: Optional[asyncio.Task] = None
+
+        self.counters = {
+            "logins": 0,
+            "refreshes": 0,
+            "background_refreshes": 0,
+            "forced_refreshes": 0,
+            "login_failures": 0,
+        }
+
+    # -- state -------------------------------------------------------------
+
+    def _is_valid(self, now: float) -> bool:
+        return self._token is not None and now < self._expires_at
+
+    def _needs_refresh(self, now: float) -> bool:
+        return now >= self._expires_at - self._margin
+
+    def _store(self, data: dict) -> str:
+        token = data.get("accessToken")
+        if not token:
+            logger.error("No accessToken found in login response")
+            raise ValueError("Failed to get accessToken")
+
+        expires_at = decode_expiry(token)
+        if expires_at is None and data.get("expiresIn"):
+            expires_at = time.time() + float(data["expiresIn"])
+        if expires_at is None:
+            expires_at = time.time() + self.default_ttl
+
+        with self._state_lock:
+            if self.counters["logins"]:
+                self.counters["refreshes"] += 1
+            self.counters["logins"] += 1
+            self._token = token
+            self._expires_at = expires_at
+            # Short-lived tokens would otherwise be "due" the moment they arrive.
+            self._margin = min(self.refresh_margin, max(0.0, expires_at - time.time()) / 2)
+        logger.info("Token retrieved successfully (expires in %ss)", int(expires_at - time.time()))
+        return token
+
+    def invalidate(self) -> None:
+        with self._state_lock:
+            self._token = None
+            self._expires_at = 0.0
+
+    def stats(self) -> dict:
+        return {
+            **self.counters,
+            "has_token": self._token is not None,
+            "expires_in": max(0.0, self._expires_at - time.time()) if self._token else 0.0,
+        }
+
+    # -- sync path (requests) ----------------------------------------------
+
+    def _login_sync(self) -> str:
+        logger.info("Requesting new token from TripXplo API")
+        try:
+            res = requests.put(
+                f"{settings.TRIPXPLO_API_BASE}{LOGIN_PATH}",
+                json={"email": self.email, "password": self.password},
+                timeout=(settings.HTTP_CONNECT_TIMEOUT, settings.HTTP_TIMEOUT),
+            )
+            res.raise_for_status()
+            return self._store(res.json())
+        except (requests.RequestException, ValueError) as e:
+            self.counters["login_failures"] += 1
+            logger.error("Error during token fetch: %s", e)
+            raise
+
+    def get_token_sync(self) -> str:
+        now = time.time()
+        if self._is_valid(now) and not self._needs_refresh(now):
+            return self._token  # type: ignore[return-value]
+        with self._sync_login_lock:
+            # Another thread may have logged in while we waited for the lock.
+            now = time.time()
+            if self._is_valid(now) and not self._needs_refresh(now):
+                return self._token  # type: ignore[return-value]
+            return self._login_sync()
+
+    def refresh_sync(self, stale_token: Optional[str]) -> str:
+        """Force a new login unless another caller already replaced ``stale_token``."""
+        with self._sync_login_lock:
+            if self._token and self._token != stale_token:
+                return self._token
+            self.counters["forced_refreshes"] += 1
+            return self._login_sync()
+
+    # -- async path (shared httpx pool) ------------------------------------
+
+    async def _login_async(self) -> str:
+        from .tripxplo_client import get_client
+
+        logger.info("Requesting new token from TripXplo API")
+        try:
+            res = await get_client().put(
+                LOGIN_PATH, json={"email": self.email, "password": self.password}
+            )
+            res.raise_for_status()
+            token = self._store(res.json())
+        except Exception as e:
+            self.counters["login_failures"] += 1
+            logger.error("Error during token fetch: %s", e)
+            raise
+        self._schedule_refresh()
+        return token
+
+    def _single_flight_login(self) -> asyncio.Task:
+        loop = asyncio.get_running_loop()
+        task = self._inflight
+        if task is None or task.done() or task.get_loop() is not loop:
+            task = loop.create_task(self._login_async())
+            # Background logins may have no awaiter; retrieve their errors here.
+            task.add_done_callback(lambda t: t.cancelled() or t.exception())
+            self._inflight = task
+        return task
+
+    async def get_token(self) -> str:
+        now = time.time()
+        if self._is_valid(now):
+            if self._needs_refresh(now) and (self._inflight is None or self._inflight.done()):
+                # Still usable: serve it and refresh behind the caller's back.
+                self.counters["background_refreshes"] += 1
+                self._single_flight_login()
+            return self._token  # type: ignore[return-value]
+        return await asyncio.shield(self._single_flight_login())
+
+    async def refresh(self, stale_token: Optional[str]) -> str:
+        """Force a new login unless another caller already replaced ``stale_token``."""
+        if self._token and self._token != stale_token and self._is_valid(time.time()):
+            return self._token
+        if self._inflight is None or self._inflight.done():
+            self.counters["forced_refreshes"] += 1
+            self.invalidate()
+        return await asyncio.shield(self._single_flight_login())
+
+    def _schedule_refresh(self) -> None:
+        """Wake up shortly before expiry and log in again ahead of time."""
+        previous = self._refresh_task
+        if previous is not None and not previous.done():
+            previous.cancel()
+        delay = max(0.0, self._expires_at - self._margin - time.time())
+
+        async def _refresh_later():
+            await asyncio.sleep(delay)
+            # Detach before logging in: the login schedules the next refresh,
+            # which must not cancel this one.
+            self._refresh_task = None
+            self.counters["background_refreshes"] += 1
+            try:
+                await asyncio.shield(self._single_flight_login())
+            except Exception as e:
+                logger.warning("Background token refresh failed: %s", e)
+
+        self._refresh_task = asyncio.get_running_loop().create_task(_refresh_later())
+
+    async def aclose(self) -> None:
+        for task in (self._refresh_task, self._inflight):
+            if task is not None and not task.done():
+                task.cancel()
+        self._refresh_task = None
+        self._inflight = None
+
+
+token_manager = TokenManager(
+    settings.TRIPXPLO_EMAIL,
+    settings.TRIPXPLO_PASSWORD,
+    refresh_margin=settings.TOKEN_REFRESH_MARGIN,
+    default_ttl=settings.TOKEN_DEFAULT_TTL,
+)
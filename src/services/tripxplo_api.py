@@ -1,149 +1,130 @@
+import time
+
 import requests
 from ..config import settings
 from ..utils.logger import setup_logger
+from ..utils.metrics import UPSTREAM_ERRORS, UPSTREAM_SECONDS, current_request_id, endpoint_label, span
+from .circuit_breaker import breakers
+from .token_manager import token_manager
 
 logger = setup_logger(__name__)
 
 API = settings.TRIPXPLO_API_BASE
-EMAIL = settings.TRIPXPLO_EMAIL
-PASSWORD = settings.TRIPXPLO_PASSWORD
-
-TOKEN = None
+TIMEOUT = (settings.HTTP_CONNECT_TIMEOUT, settings.HTTP_TIMEOUT)
 
 def get_token():
-    global TOKEN
-    if TOKEN:
-        logger.info("Using cached token")
-        return TOKEN
+    return token_manager.get_token_sync()
+
+def _headers(token):
+    headers = {"Authorization": f"Bearer {token}"}
+    if current_request_id():
+        headers["X-Request-ID"] = current_request_id()
+    return headers
 
-    logger.info("Requesting new token from TripXplo API")
+def _request(method, path, **kwargs):
+    endpoint = endpoint_label(path)
+    breaker = breakers.get(f"{method} {endpoint}")
+    if breaker is not None:
+        breaker.allow()
+    started = time.perf_counter()
+    ok = False
     try:
-        res = requests.put(f"{API}/admin/auth/login", json={"email": EMAIL, "password": PASSWORD})
-        res.raise_for_status()
-        TOKEN = res.json().get("accessToken")
-        if not TOKEN:
-            logger.error("No accessToken found in login response")
-            raise ValueError("Failed to get accessToken")
-        logger.info("Token retrieved successfully")
-        return TOKEN
-    except requests.RequestException as e:
-        logger.error(f"HTTP error during token fetch: {e}")
-        raise
-    except Exception as e:
-        logger.error(f"Error getting token: {e}")
-        raise
+        with span(f"tripxplo {method} {endpoint}", UPSTREAM_SECONDS, (method, endpoint), UPSTREAM_ERRORS):
+            token = get_token()
+            res = requests.request(method, f"{API}{path}", headers=_headers(token), timeout=TIMEOUT, **kwargs)
+            if res.status_code == 401:
+                # Token revoked or expired early: refresh once and replay the request.
+                logger.warning("401 from %s; refreshing token and retrying once", path)
+                token = token_manager.refresh_sync(token)
+                res = requests.request(method, f"{API}{path}", headers=_headers(token), timeout=TIMEOUT, **kwargs)
+            # 4xx other than timeouts and throttling is not an upstream fault
+            ok = res.status_code < 500 and res.status_code not in (408, 429)
+            res.raise_for_status()
+            return res
+    finally:
+        if breaker is not None:
+            breaker.record(ok, time.perf_counter() - started)
 
 def get_packages():
-    token = get_token()
     logger.info("Fetching packages from TripXplo API")
     try:
-        res = requests.get(
-            f"{API}/admin/package?limit=50&offset=0",
-            headers={"Authorization": f"Bearer {token}"}
-        )
-        res.raise_for_status()
+        res = _request("GET", "/admin/package?limit=50&offset=0")
         packages = res.json().get("result", {}).get("docs", [])
-        logger.info(f"Fetched {len(packages)} packages")
+        logger.info("Fetched %s packages", len(packages))
         return packages
     except requests.RequestException as e:
-        logger.error(f"HTTP error during packages fetch: {e}")
+        logger.error("HTTP error during packages fetch: %s", e)
         return []
     except Exception as e:
-        logger.error(f"Unexpected error during packages fetch: {e}")
+        logger.error("Unexpected error during packages fetch: %s", e)
         return []
 
 def get_package_details(package_id):
-    token = get_token()
-    logger.info(f"Fetching details for package_id={package_id}")
+    logger.info("Fetching details for package_id=%s", package_id)
     try:
-        res = requests.get(
-            f"{API}/admin/package/{package_id}",
-            headers={"Authorization": f"Bearer {token}"}
-        )
-        res.raise_for_status()
+        res = _request("GET", f"/admin/package/{package_id}")
         details = res.json().get("result", {})
-        logger.info(f"Fetched package details for {package_id}")
+        logger.info("Fetched package details for %s", package_id)
         return details
     except requests.RequestException as e:
-        logger.error(f"HTTP error during package details fetch: {e}")
+        logger.error("HTTP error during package details fetch: %s", e)
         return {}
     except Exception as e:
-        logger.error(f"Unexpected error during package details fetch: {e}")
+        logger.error("Unexpected error during package details fetch: %s", e)
         return {}
 
 def get_package_pricing(package_id, params):
-    token = get_token()
-    logger.info(f"Fetching pricing for package_id={package_id} with params={params}")
+    logger.info("Fetching pricing for package_id=%s with params=%s", package_id, params)
     try:
-        res = requests.post(
-            f"{API}/admin/package/{package_id}/pricing",
-            json=params,
-            headers={"Authorization": f"Bearer {token}"}
-        )
-        res.raise_for_status()
+        res = _request("POST", f"/admin/package/{package_id}/pricing", json=params)
         pricing = res.json().get("result", {})
-        logger.info(f"Fetched pricing for package {package_id}")
+        logger.info("Fetched pricing for package %s", package_id)
         return pricing
     except requests.RequestException as e:
-        logger.error(f"HTTP error during package pricing fetch: {e}")
+        logger.error("HTTP error during package pricing fetch: %s", e)
         return {}
     except Exception as e:
-        logger.error(f"Unexpected error during package pricing fetch: {e}")
+        logger.error("Unexpected error during package pricing fetch: %s", e)
         return {}
 
 def get_available_hotels(package_id):
-    token = get_token()
-    logger.info(f"Fetching available hotels for package_id={package_id}")
+    logger.info("Fetching available hotels for package_id=%s", package_id)
     try:
-        res = requests.get(
-            f"{API}/admin/package/{package_id}/hotels",
-            headers={"Authorization": f"Bearer {token}"}
-        )
-        res.raise_for_status()
+        res = _request("GET", f"/admin/package/{package_id}/hotels")
         hotels = res.json().get("result", [])
-        logger.info(f"Fetched {len(hotels)} hotels for package {package_id}")
+        logger.info("Fetched %s hotels for package %s", len(hotels), package_id)
         return hotels
     except requests.RequestException as e:
-        logger.error(f"HTTP error during hotels fetch: {e}")
+        logger.error("HTTP error during hotels fetch: %s", e)
         return []
     except Exception as e:
-        logger.error(f"Unexpected error during hotels fetch: {e}")
+        logger.error("Unexpected error during hotels fetch: %s", e)
         return []
 
 def get_available_vehicles(package_id):
-    token = get_token()
-    logger.info(f"Fetching available vehicles for package_id={package_id}")
+    logger.info("Fetching available vehicles for package_id=%s", package_id)
     try:
-        res = requests.get(
-            f"{API}/admin/package/{package_id}/vehicles",
-            headers={"Authorization": f"Bearer {token}"}
-        )
-        res.raise_for_status()
+        res = _request("GET", f"/admin/package/{package_id}/vehicles")
         vehicles = res.json().get("result", [])
-        logger.info(f"Fetched {len(vehicles)} vehicles for package {package_id}")
+        logger.info("Fetched %s vehicles for package %s", len(vehicles), package_id)
         return vehicles
     except requests.RequestException as e:
-        logger.error(f"HTTP error during vehicles fetch: {e}")
+        logger.error("HTTP error during vehicles fetch: %s", e)
         return []
     except Exception as e:
-        logger.error(f"Unexpected error during vehicles fetch: {e}")
+        logger.error("Unexpected error during vehicles fetch: %s", e)
         return []
 
 def get_available_activities(package_id):
-    token = get_token()
-    logger.info(f"Fetching available activities for package_id={package_id}")
+    logger.info("Fetching available activities for package_id=%s", package_id)
     try:
-        res = requests.get(
-            f"{API}/admin/package/{package_id}/activities",
-            headers={"Authorization": f"Bearer {token}"}
-        )
-        res.raise_for_status()
+        res = _request("GET", f"/admin/package/{package_id}/activities")
         activities = res.json().get("result", [])
-        logger.info(f"Fetched {len(activities)} activities for package {package_id}")
+        logger.info("Fetched %s activities for package %s", len(activities), package_id)
         return activities
     except requests.RequestException as e:
-        logger.error(f"HTTP error during activities fetch: {e}")
+        logger.error("HTTP error during activities fetch: %s", e)
         return []
     except Exception as e:
-        logger.error(f"Unexpected error during activities fetch: {e}")
+        logger.error("Unexpected error during activities fetch: %s", e)
         return []
\ No newline at end of file
@@ -0,0 +1,271 @@
+"""
+Async TripXplo client backed by one long-lived, pooled httpx.AsyncClient.
+
+The pool is opened and closed through the FastAPI lifespan (see main.py) and
+shared by every route and by the agent, so no request ever blocks the event
+loop or pays for a fresh TCP/TLS handshake.
+
+Every call passes through the endpoint's circuit breaker
+(src/services/circuit_breaker.py). The cached ``_fetch_*`` readers raise
+``UpstreamUnavailable`` on failure so the catalog cache can fall back to its
+last good entry.
+"""
+import asyncio
+import time
+from typing import Any, Optional
+
+import httpx
+
+from ..config import settings
+from ..utils.logger import setup_logger
+from ..utils.metrics import UPSTREAM_ERRORS, UPSTREAM_SECONDS, current_request_id, endpoint_label, span
+from .cache import catalog_cache
+from .circuit_breaker import CircuitOpenError, UpstreamUnavailable, breakers
+from .single_flight import SingleFlight
+from .token_manager import token_manager
+
+logger = setup_logger(__name__)
+
+API = settings.TRIPXPLO_API_BASE
+
+_client: Optional[httpx.AsyncClient] = None
+
+# Identical concurrent GETs (a burst of users opening the same package) share
+# one upstream call.
+upstream_flight = SingleFlight("tripxplo")
+
+
+def _http2_available() -> bool:
+    try:
+        import h2  # noqa: F401
+    except ImportError:
+        return False
+    return True
+
+
+def _build_client() -> httpx.AsyncClient:
+    http2 = settings.HTTP2_ENABLED and _http2_available()
+    if settings.HTTP2_ENABLED and not http2:
+        logger.warning("HTTP/2 requested but the 'h2' package is not installed; using HTTP/1.1")
+    return httpx.AsyncClient(
+        base_url=API,
+        http2=http2,
+        timeout=httpx.Timeout(settings.HTTP_TIMEOUT, connect=settings.HTTP_CONNECT_TIMEOUT),
+        limits=httpx.Limits(
+            max_connections=settings.HTTP_MAX_CONNECTIONS,
+            max_keepalive_connections=settings.HTTP_MAX_KEEPALIVE,
+            keepalive_expiry=settings.HTTP_KEEPALIVE_EXPIRY,
+        ),
+        headers={"Content-Type": "application/json"},
+    )
+
+
+async def open_client() -> httpx.AsyncClient:
+    """Create the shared connection pool (called from the app lifespan)."""
+    global _client
+    if _client is None or _client.is_closed:
+        _client = _build_client()
+        logger.info("Opened shared TripXplo HTTP client")
+    return _client
+
+
+async def close_client() -> None:
+    """Close the shared connection pool (called from the app lifespan)."""
+    global _client
+    await token_manager.aclose()
+    await catalog_cache.aclose()
+    if _client is not None and not _client.is_closed:
+        await _client.aclose()
+        logger.info("Closed shared TripXplo HTTP client")
+    _client = None
+
+
+def get_client() -> httpx.AsyncClient:
+    """Return the shared client, creating it lazily if the lifespan has not run."""
+    global _client
+    if _client is None or _client.is_closed:
+        _client = _build_client()
+    return _client
+
+
+async def get_token() -> str:
+    return await token_manager.get_token()
+
+
+def _headers(token: str) -> dict:
+    headers = {"Authorization": f"Bearer {token}"}
+    request_id = current_request_id()
+    if request_id:
+        headers["X-Request-ID"] = request_id
+    return headers
+
+
+async def _request(method: str, path: str, **kwargs: Any) -> Any:
+    if method == "GET" and set(kwargs) <= {"params"}:
+        params = sorted((kwargs.get("params") or {}).items())
+        key = f"GET {path}?{params}"
+        return await upstream_flight.do(key, lambda: _send(method, path, **kwargs))
+    return await _send(method, path, **kwargs)
+
+
+def _healthy_status(status: int) -> bool:
+    # Client errors are the caller's fault, not a sign TripXplo is unwell.
+    return status < 500 and status not in (408, 429)
+
+
+async def _send(method: str, path: str, **kwargs: Any) -> Any:
+    endpoint = endpoint_label(path)
+    breaker = breakers.get(f"{method} {endpoint}")
+    if breaker is not None:
+        breaker.allow()
+    started = time.perf_counter()
+    try:
+        with span(f"tripxplo {method} {endpoint}", UPSTREAM_SECONDS, (method, endpoint), UPSTREAM_ERRORS):
+            token = await get_token()
+            res = await get_client().request(method, path, headers=_headers(token), **kwargs)
+            if res.status_code == 401:
+                # Token revoked or expired early: refresh once and replay the request.
+                logger.warning("401 from %s; refreshing token and retrying once", path)
+                token = await token_manager.refresh(token)
+                res = await get_client().request(method, path, headers=_headers(token), **kwargs)
+            res.raise_for_status()
+            data = res.json()
+    except asyncio.CancelledError:
+        if breaker is not None:
+            breaker.release()
+        raise
+    except httpx.HTTPStatusError as e:
+        if breaker is not None:
+            breaker.record(_healthy_status(e.response.status_code), time.perf_counter() - started)
+        raise
+    except Exception:
+        if breaker is not None:
+            breaker.record(False, time.perf_counter() - started)
+        raise
+    if breaker is not None:
+        breaker.record(True, time.perf_counter() - started)
+    return data
+
+
+def _unavailable(what: str, error: Exception, default: Any) -> UpstreamUnavailable:
+    if isinstance(error, CircuitOpenError):
+        logger.info("Skipped %s fetch: %s", what, error)
+    elif isinstance(error, httpx.HTTPError):
+        logger.error("HTTP error during %s fetch: %s", what, error)
+    else:
+        logger.error("Unexpected error during %s fetch: %s", what, error)
+    return UpstreamUnavailable(f"{what} fetch failed: {error}", default)
+
+
+async def _fetch_packages(limit: int, offset: int, search: str):
+    params: dict[str, Any] = {"limit": limit, "offset": offset}
+    if search:
+        params["search"] = search
+    try:
+        data = await _request("GET", "/admin/package", params=params)
+        packages = data.get("result", {}).get("docs", [])
+        logger.info("Fetched %s packages", len(packages))
+        return packages
+    except Exception as e:
+        raise _unavailable("packages", e, []) from e
+
+
+async def _fetch_package_details(package_id: str):
+    try:
+        data = await _request("GET", f"/admin/package/{package_id}")
+        details = data.get("result", {})
+        logger.info("Fetched package details for %s", package_id)
+        return details
+    except Exception as e:
+        raise _unavailable("package details", e, {}) from e
+
+
+async def get_package_pricing(package_id: str, params: dict):
+    try:
+        data = await _request("POST", f"/admin/package/{package_id}/pricing", json=params)
+        pricing = data.get("result", {})
+        logger.info("Fetched pricing for package %s", package_id)
+        return pricing
+    except httpx.HTTPError as e:
+        logger.error("HTTP error during package pricing fetch: %s", e)
+        return {}
+    except Exception as e:
+        logger.error("Unexpected error during package pricing fetch: %s", e)
+        return {}
+
+
+async def _fetch_hotels(package_id: str):
+    try:
+        data = await _request("GET", f"/admin/package/{package_id}/hotels")
+        hotels = data.get("result", [])
+        logger.info("Fetched %s hotels for package %s", len(hotels), package_id)
+        return hotels
+    except Exception as e:
+        raise _unavailable("hotels", e, []) from e
+
+
+async def _fetch_vehicles(package_id: str):
+    try:
+        data = await _request("GET", f"/admin/package/{package_id}/vehicles")
+        vehicles = data.get("result", [])
+        logger.info("Fetched %s vehicles for package %s", len(vehicles), package_id)
+        return vehicles
+    except Exception as e:
+        raise _unavailable("vehicles", e, []) from e
+
+
+async def _fetch_activities(package_id: str):
+    try:
+        data = await _request("GET", f"/admin/package/{package_id}/activities")
+        activities = data.get("result", [])
+        logger.info("Fetched %s activities for package %s", len(activities), package_id)
+        return activities
+    except Exception as e:
+        raise _unavailable("activities", e, []) from e
+
+
+async def fetch_package_page(limit: int, offset: int) -> dict:
+    """One uncached page of the package listing; raises on upstream errors."""
+    data = await _request("GET", "/admin/package", params={"limit": limit, "offset": offset})
+    return data.get("result", {})
+
+
+async def fetch_package(package_id: str) -> dict:
+    """Uncached package details; raises on upstream errors."""
+    data = await _request("GET", f"/admin/package/{package_id}")
+    return data.get("result", {})
+
+
+async def fetch_package_pricing(package_id: str, params: dict) -> dict:
+    """Uncached pricing for one start date and party; raises on upstream errors."""
+    data = await _request("POST", f"/admin/package/{package_id}/pricing", json=params)
+    return data.get("result", {})
+
+
+# -- cached public API -----------------------------------------------------
+# Catalog reads go through the tiered cache (src/services/cache.py). Single
+# pricing lookups are always fetched live; batch pricing (src/services/pricing.py)
+# caches each (package, date, party) tuple for CACHE_TTL_PRICING seconds.
+
+async def get_packages(limit: int = 50, offset: int = 0, search: str = ""):
+    return await catalog_cache.get_or_fetch(
+        "packages", f"{limit}:{offset}:{search}", lambda: _fetch_packages(limit, offset, search)
+    )
+
+
+async def get_package_details(package_id: str):
+    return await catalog_cache.get_or_fetch(
+        "package_details", package_id, lambda: _fetch_package_details(package_id)
+    )
+
+
+async def get_available_hotels(package_id: str):
+    return await catalog_cache.get_or_fetch("hotels", package_id, lambda: _fetch_hotels(package_id))
+
+
+async def get_available_vehicles(package_id: str):
+    return await catalog_cache.get_or_fetch("vehicles", package_id, lambda: _fetch_vehicles(package_id))
+
+
+async def get_available_activities(package_id: str):
+    return await catalog_cache.get_or_fetch("activities", package_id, lambda: _fetch_activities(package_id))
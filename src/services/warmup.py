@@ -0,0 +1,150 @@
+"""
+Startup warm-up and readiness.
+
+Importing the app does no I/O and pulls in neither langgraph nor the OpenAI
+SDK. The lifespan starts ``warmup``, which runs these steps concurrently in
+the background while the server is already accepting connections:
+
+* ``token``   — log in to TripXplo (opens the pooled connection as well)
+* ``catalog`` — first full catalog sync, then the periodic syncer; the query
+  matcher and retriever are built over the result
+* ``agent``   — import langgraph and the OpenAI SDK, compile the graph and
+  build the LLM gateway's client
+
+``GET /ready`` answers 503 until every step has finished, failed, or
+``WARMUP_TIMEOUT`` has passed, so a load balancer only routes traffic to a
+warm worker. A failed step does not keep the worker out of rotation: the
+service it warms retries on its own and serves degraded data meanwhile.
+With ``WARMUP_ENABLED=False`` the worker is ready at once and everything
+initialises on first use.
+
+For forked multi-worker serving with a preloaded app (``gunicorn
+--preload``, see gunicorn.conf.py), ``preload_modules`` imports the heavy
+modules once in the master so workers share them copy-on-write; nothing
+that owns sockets, threads or event-loop state is created before the fork.
+"""
+import asyncio
+import importlib
+import time
+from typing import Awaitable, Callable, Dict, List, Optional
+
+from ..config import settings
+from ..utils.logger import setup_logger
+
+logger = setup_logger(__name__)
+
+Step = Callable[[], Awaitable[None]]
+
+HEAVY_MODULES = ("langgraph.graph", "openai")
+
+
+def preload_modules() -> None:
+    """Import the slow third-party modules (called in a pre-fork master)."""
+    started = time.perf_counter()
+    for name in HEAVY_MODULES:
+        importlib.import_module(name)
+    logger.info("Preloaded %s in %.2fs", ", ".join(HEAVY_MODULES), time.perf_counter() - started)
+
+
+class Warmup:
+    def __init__(self, steps: Dict[str, Step], timeout: float = 20.0, enabled: bool = True):
+        self.steps = steps
+        self.timeout = timeout
+        self.enabled = enabled
+        # step -> "pending" | "ok" | "failed: ..." | "timed out"
+        self.status: Dict[str, str] = {name: "pending" for name in steps}
+        self.seconds: Dict[str, float] = {}
+        self.started_at: Optional[float] = None
+        self.finished_at: Optional[float] = None
+        self._task: Optional[asyncio.Task] = None
+        self._steps: List[asyncio.Task] = []
+
+    @property
+    def ready(self) -> bool:
+        return not self.enabled or self.finished_at is not None
+
+    async def _step(self, name: str, step: Step) -> None:
+        started = time.perf_counter()
+        try:
+            await step()
+            self.status[name] = "ok"
+        except Exception as e:
+            self.status[name] = f"failed: {e}"
+            logger.warning("Warm-up step %s failed: %s", name, e)
+        finally:
+            self.seconds[name] = round(time.perf_counter() - started, 3)
+
+    async def run(self) -> None:
+        self.started_at = time.perf_counter()
+        self._steps = [asyncio.ensure_future(self._step(name, step)) for name, step in self.steps.items()]
+        # Steps still running at the deadline carry on in the background.
+        await asyncio.wait(self._steps, timeout=self.timeout)
+        for name, status in self.status.items():
+            if status == "pending":
+                self.status[name] = "timed out"
+        self.finished_at = time.perf_counter()
+        logger.info("Warm-up finished in %.2fs: %s", self.finished_at - self.started_at, self.status)
+
+    def start(self) -> None:
+        if self.enabled and self._task is None:
+            self._task = asyncio.get_running_loop().create_task(self.run())
+
+    async def stop(self) -> None:
+        tasks = [t for t in [self._task, *self._steps] if t is not None and not t.done()]
+        for task in tasks:
+            task.cancel()
+        if tasks:
+            await asyncio.gather(*tasks, return_exceptions=True)
+        self._task = None
+        self._steps = []
+
+    def stats(self) -> dict:
+        elapsed = None
+        if self.started_at is not None:
+            elapsed = round((self.finished_at or time.perf_counter()) - self.started_at, 3)
+        return {"ready": self.ready, "seconds": elapsed, "steps": dict(self.status), "step_seconds": dict(self.seconds)}
+
+
+# -- default steps -----------------------------------------------------------
+
+async def _warm_token() -> None:
+    from .token_manager import token_manager
+
+    await token_manager.get_token()
+
+
+async def _warm_catalog() -> None:
+    from ..core.matcher import get_matcher
+    from ..core.retrieval import get_retriever
+    from .catalog import catalog
+
+    if settings.CATALOG_SYNC_ENABLED:
+        try:
+            await catalog.sync()
+        finally:
+            # The first sync just ran (or failed); the periodic loop takes over.
+            catalog.start(delay=catalog.interval)
+    # Both are rebuilt per catalog version; build them now rather than on the first query.
+    await asyncio.to_thread(get_matcher)
+    if catalog.ready:
+        await asyncio.to_thread(get_retriever)
+
+
+def _build_agent() -> None:
+    from ..core.agent import get_graph
+    from .llm_gateway import llm
+
+    get_graph()
+    llm.client()
+
+
+async def _warm_agent() -> None:
+    # One thread for both: concurrent imports mostly wait on each other's locks.
+    await asyncio.to_thread(_build_agent)
+
+
+warmup = Warmup(
+    {"token": _warm_token, "catalog": _warm_catalog, "agent": _warm_agent},
+    timeout=settings.WARMUP_TIMEOUT,
+    enabled=settings.WARMUP_ENABLED,
+)
@@ -1,23 +1,220 @@
+"""
+Logging pipeline shared by every module.
+
+Records are handed to a bounded in-memory queue on the request path; a
+``QueueListener`` thread formats them and does the I/O, so a slow stdout or
+log shipper never stalls the event loop. If the queue is full the record is
+dropped and counted rather than blocking.
+
+* ``LOG_FORMAT=json`` (default) emits one JSON object per line with the
+  request ID of the request that logged it; ``text`` keeps the classic line.
+* Messages are formatted lazily: call sites pass ``%s`` arguments, which are
+  only rendered by the listener, and only for records that survive the level
+  and sampling filters.
+* ``LOG_SAMPLING="src.services.tripxplo_client=0.1,..."`` keeps that fraction
+  of a logger's INFO/DEBUG lines (warnings and errors always pass). Sampling
+  is decided per request ID, so a sampled request keeps all of its lines.
+* ``redact(text)`` masks emails, phone/card numbers and bearer tokens and
+  caps the length of user queries and responses before they are logged.
+"""
+import atexit
+import json
 import logging
+import os
+import queue
+import random
+import re
 import sys
+import zlib
+from logging.handlers import QueueHandler, QueueListener
+from typing import Dict, Optional
+
 from src.config import settings
+from src.utils.metrics import current_request_id
+
+
+class JsonFormatter(logging.Formatter):
+    def format(self, record: logging.LogRecord) -> str:
+        payload = {
+            "ts": self.formatTime(record, "%Y-%m-%dT%H:%M:%S") + f".{int(record.msecs):03d}",
+            "level": record.levelname,
+            "logger": record.name,
+            "msg": record.getMessage(),
+        }
+        request_id = getattr(record, "request_id", "")
+        if request_id:
+            payload["request_id"] = request_id
+        if record.exc_info:
+            payload["exc"] = self.formatException(record.exc_info)
+        return json.dumps(payload, ensure_ascii=False, default=str)
+
+
+class TextFormatter(logging.Formatter):
+    def __init__(self):
+        super().__init__("%(asctime)s - %(name)s - %(levelname)s - %(message)s")
+
+    def format(self, record: logging.LogRecord) -> str:
+        line = super().format(record)
+        request_id = getattr(record, "request_id", "")
+        return f"{line} [{request_id}]" if request_id else line
+
+
+def parse_sampling(spec: str) -> Dict[str, float]:
+    """``"a.b=0.1,c=0.5"`` -> ``{"a.b": 0.1, "c": 0.5}``."""
+    rates = {}
+    for part in spec.split(","):
+        name, _, rate = part.partition("=")
+        if name.strip() and rate.strip():
+            rates[name.strip()] = min(max(float(rate), 0.0), 1.0)
+    return rates
+
+
+class SamplingFilter(logging.Filter):
+    """Keep a fraction of INFO/DEBUG records per logger (longest prefix match)."""
+
+    def __init__(self, rates: Dict[str, float]):
+        super().__init__()
+        self.rates = rates
+        self._resolved: Dict[str, float] = {}
+        self.dropped = 0
+
+    def rate_for(self, name: str) -> float:
+        rate = self._resolved.get(name)
+        if rate is None:
+            prefixes = [p for p in self.rates if name == p or name.startswith(p + ".")]
+            rate = self.rates[max(prefixes, key=len)] if prefixes else 1.0
+            self._resolved[name] = rate
+        return rate
+
+    def filter(self, record: logging.LogRecord) -> bool:
+        if record.levelno >= logging.WARNING or not self.rates:
+            return True
+        rate = self.rate_for(record.name)
+        if rate >= 1.0:
+            return True
+        request_id = getattr(record, "request_id", "")
+        draw = (zlib.crc32(request_id.encode()) % 10000) / 10000 if request_id else random.random()
+        if draw < rate:
+            return True
+        self.dropped += 1
+        return False
+
+
+class RequestQueueHandler(QueueHandler):
+    """QueueHandler that tags records with the request ID and never blocks or pre-formats."""
+
+    def __init__(self, log_queue: "queue.Queue", sampling: Optional[SamplingFilter] = None):
+        super().__init__(log_queue)
+        self.sampling = sampling
+        self.dropped = 0
+
+    def handle(self, record: logging.LogRecord) -> bool:
+        # Tag before filtering: the request ID lives in a context variable
+        # that the listener thread cannot see.
+        record.request_id = current_request_id()
+        if self.sampling is not None and not self.sampling.filter(record):
+            return False
+        return super().handle(record)
+
+    def prepare(self, record: logging.LogRecord) -> logging.LogRecord:
+        # The stock implementation formats the message here, on the caller's
+        # thread; leave that to the listener.
+        return record
+
+    def enqueue(self, record: logging.LogRecord) -> None:
+        try:
+            self.queue.put_nowait(record)
+        except queue.Full:
+            self.dropped += 1
+
+
+_handler: Optional[RequestQueueHandler] = None
+_listener: Optional[QueueListener] = None
+
+
+def configure_logging() -> RequestQueueHandler:
+    """Install the queue handler on the root logger and start the listener (once)."""
+    global _handler, _listener
+    if _handler is not None:
+        return _handler
+    output = logging.StreamHandler(sys.stdout)
+    output.setFormatter(JsonFormatter() if settings.LOG_FORMAT == "json" else TextFormatter())
+    log_queue: "queue.Queue" = queue.Queue(maxsize=settings.LOG_QUEUE_SIZE)
+    _handler = RequestQueueHandler(log_queue, SamplingFilter(parse_sampling(settings.LOG_SAMPLING)))
+    root = logging.getLogger()
+    root.addHandler(_handler)
+    root.setLevel(getattr(logging, settings.LOG_LEVEL.upper()))
+    _listener = QueueListener(log_queue, output, respect_handler_level=True)
+    _listener.start()
+    atexit.register(shutdown_logging)
+    if hasattr(os, "register_at_fork"):
+        os.register_at_fork(after_in_child=_restart_after_fork)
+    return _handler
+
+
+def _restart_after_fork() -> None:
+    """
+    The listener thread does not survive fork() (a preloaded app forking
+    workers): give the child a fresh queue and its own listener.
+    """
+    global _listener
+    if _handler is None or _listener is None:
+        return
+    log_queue: "queue.Queue" = queue.Queue(maxsize=settings.LOG_QUEUE_SIZE)
+    _handler.queue = log_queue
+    _listener = QueueListener(log_queue, *_listener.handlers, respect_handler_level=True)
+    _listener.start()
+
+
+def shutdown_logging() -> None:
+    """Flush queued records and stop the listener thread."""
+    global _listener
+    if _listener is not None:
+        _listener.stop()
+        _listener = None
+
+
+def logging_stats() -> dict:
+    if _handler is None:
+        return {}
+    return {
+        "queued": _handler.queue.qsize(),
+        "dropped_queue_full": _handler.dropped,
+        "dropped_sampled": _handler.sampling.dropped if _handler.sampling is not None else 0,
+    }
+
+
+_REDACTIONS = [
+    (re.compile(r"(?i)\bbearer\s+[\w.~+/=-]+"), "Bearer [token]"),
+    (re.compile(r"\beyJ[\w-]+\.[\w-]+\.[\w-]+"), "[jwt]"),
+    (re.compile(r"[\w.+-]+@[\w-]+\.[\w.-]+"), "[email]"),
+    (re.compile(r"(?<!\w)\+?\d[\d -]{8,}\d(?!\w)"), "[number]"),
+]
+
+
+class Redacted:
+    """Lazily redacted, length-capped text: the work happens only if the record is emitted."""
+
+    __slots__ = ("text", "limit")
+
+    def __init__(self, text: str, limit: Optional[int] = None):
+        self.text = text
+        self.limit = settings.LOG_BODY_CHARS if limit is None else limit
+
+    def __str__(self) -> str:
+        text = self.text
+        for pattern, replacement in _REDACTIONS:
+            text = pattern.sub(replacement, text)
+        if len(text) > self.limit:
+            text = f"{text[:self.limit]}…(+{len(text) - self.limit} chars)"
+        return text
+
+
+def redact(text: str, limit: Optional[int] = None) -> Redacted:
+    return Redacted(text, limit)
+
 
 def setup_logger(name: str) -> logging.Logger:
-    """Setup logger with consistent formatting"""
-    logger = logging.getLogger(name)
-    
-    if not logger.handlers:
-        # Create console handler
-        handler = logging.StreamHandler(sys.stdout)
-        
-        # Create formatter
-        formatter = logging.Formatter(
-            '%(asctime)s - %(name)s - %(levelname)s - %(message)s'
-        )
-        handler.setFormatter(formatter)
-        
-        # Add handler to logger
-        logger.addHandler(handler)
-        logger.setLevel(getattr(logging, settings.LOG_LEVEL.upper()))
-    
-    return logger
\ No newline at end of file
+    """Logger for ``name``; records go through the shared queue pipeline."""
+    configure_logging()
+    return logging.getLogger(name)
@@ -0,0 +1,289 @@
+"""
+Lightweight in-process metrics and request-scoped tracing.
+
+Counters, gauges and histograms live in one ``registry`` and render in the
+Prometheus text format at ``/metrics``; no client library is needed.
+Components that already keep their own counters (caches, single-flight, the
+LLM gateway) are exposed through collectors that are read at scrape time, so
+the request path pays nothing extra for them.
+
+Every HTTP request gets a request ID (its ``X-Request-ID`` or a fresh one)
+held in a context variable. It follows the request into the graph nodes and
+upstream calls and is forwarded to TripXplo. ``span`` times a block into a
+histogram and, when ``opentelemetry-api`` is installed and
+``TRACING_ENABLED`` is set, also opens an OpenTelemetry span tagged with it.
+"""
+import bisect
+import contextvars
+import math
+import re
+import time
+import uuid
+from typing import Any, Callable, Dict, List, Optional, Sequence, Tuple
+
+from src.config import settings
+
+try:
+    from opentelemetry import trace
+except ImportError:  # tracing is optional
+    trace = None
+
+request_id_var: contextvars.ContextVar = contextvars.ContextVar("request_id", default="")
+
+
+def current_request_id() -> str:
+    return request_id_var.get()
+
+
+def new_request_id(incoming: Optional[str] = None) -> str:
+    """Accept a sane caller-supplied ID, otherwise mint one."""
+    if incoming and len(incoming) <= 128 and incoming.isprintable():
+        return incoming
+    return uuid.uuid4().hex
+
+
+DEFAULT_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0, 60.0)
+
+Labels = Tuple[str, ...]
+
+
+def _escape(value: str) -> str:
+    return value.replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+
+def _format(names: Sequence[str], values: Sequence[str]) -> str:
+    if not names:
+        return ""
+    return "{" + ",".join(f'{n}="{_escape(str(v))}"' for n, v in zip(names, values)) + "}"
+
+
+def _number(value: float) -> str:
+    if math.isinf(value):
+        return "+Inf" if value > 0 else "-Inf"
+    return repr(float(value)) if not float(value).is_integer() else str(int(value))
+
+
+class Metric:
+    kind = "untyped"
+
+    def __init__(self, name: str, help: str, labels: Sequence[str] = ()):
+        self.name = name
+        self.help = help
+        self.label_names = tuple(labels)
+
+    def lines(self) -> List[str]:
+        raise NotImplementedError
+
+
+class Counter(Metric):
+    kind = "counter"
+
+    def __init__(self, name: str, help: str, labels: Sequence[str] = ()):
+        super().__init__(name, help, labels)
+        self.values: Dict[Labels, float] = {}
+
+    def inc(self, *labels: str, amount: float = 1.0) -> None:
+        self.values[labels] = self.values.get(labels, 0.0) + amount
+
+    def lines(self) -> List[str]:
+        return [f"{self.name}{_format(self.label_names, k)} {_number(v)}" for k, v in self.values.items()]
+
+
+class Gauge(Counter):
+    kind = "gauge"
+
+    def set(self, value: float, *labels: str) -> None:
+        self.values[labels] = value
+
+    def dec(self, *labels: str, amount: float = 1.0) -> None:
+        self.values[labels] = self.values.get(labels, 0.0) - amount
+
+
+class Histogram(Metric):
+    kind = "histogram"
+
+    def __init__(self, name: str, help: str, labels: Sequence[str] = (), buckets: Sequence[float] = DEFAULT_BUCKETS):
+        super().__init__(name, help, labels)
+        self.buckets = tuple(sorted(buckets))
+        # labels -> [per-bucket counts (+Inf last), sum]
+        self.series: Dict[Labels, List[Any]] = {}
+
+    def observe(self, value: float, *labels: str) -> None:
+        series = self.series.get(labels)
+        if series is None:
+            series = self.series[labels] = [[0] * (len(self.buckets) + 1), 0.0]
+        series[0][bisect.bisect_left(self.buckets, value)] += 1
+        series[1] += value
+
+    def lines(self) -> List[str]:
+        out = []
+        names = self.label_names + ("le",)
+        for labels, (counts, total) in self.series.items():
+            cumulative = 0
+            for bound, count in zip(self.buckets + (math.inf,), counts):
+                cumulative += count
+                out.append(f"{self.name}_bucket{_format(names, labels + (_number(bound),))} {cumulative}")
+            out.append(f"{self.name}_sum{_format(self.label_names, labels)} {_number(total)}")
+            out.append(f"{self.name}_count{_format(self.label_names, labels)} {cumulative}")
+        return out
+
+
+class Collected(Metric):
+    """Values read from a callback at scrape time: ``fn() -> {label values: value}``."""
+
+    def __init__(self, name: str, help: str, kind: str, labels: Sequence[str], fn: Callable[[], Dict[Labels, float]]):
+        super().__init__(name, help, labels)
+        self.kind = kind
+        self.fn = fn
+
+    def lines(self) -> List[str]:
+        return [f"{self.name}{_format(self.label_names, k)} {_number(v)}" for k, v in self.fn().items()]
+
+
+class Registry:
+    def __init__(self):
+        self.metrics: Dict[str, Metric] = {}
+
+    def register(self, metric: Metric) -> Any:
+        self.metrics[metric.name] = metric
+        return metric
+
+    def counter(self, name: str, help: str, labels: Sequence[str] = ()) -> Counter:
+        return self.register(Counter(name, help, labels))
+
+    def gauge(self, name: str, help: str, labels: Sequence[str] = ()) -> Gauge:
+        return self.register(Gauge(name, help, labels))
+
+    def histogram(self, name: str, help: str, labels: Sequence[str] = (), buckets: Sequence[float] = DEFAULT_BUCKETS) -> Histogram:
+        return self.register(Histogram(name, help, labels, buckets))
+
+    def collect(self, name: str, help: str, kind: str, labels: Sequence[str], fn: Callable[[], Dict[Labels, float]]) -> None:
+        self.register(Collected(name, help, kind, labels, fn))
+
+    def render(self) -> str:
+        out = []
+        for metric in self.metrics.values():
+            try:
+                lines = metric.lines()
+            except Exception as e:  # a broken collector must not take down the scrape
+                lines = [f"# {metric.name} unavailable: {_escape(str(e))}"]
+            out.append(f"# HELP {metric.name} {metric.help}")
+            out.append(f"# TYPE {metric.name} {metric.kind}")
+            out.extend(lines)
+        return "\n".join(out) + "\n"
+
+
+registry = Registry()
+
+UPSTREAM_SECONDS = registry.histogram(
+    "tripxplo_request_seconds", "TripXplo API call latency.", ("method", "endpoint"))
+UPSTREAM_ERRORS = registry.counter(
+    "tripxplo_request_errors_total", "Failed TripXplo API calls.", ("method", "endpoint", "error"))
+LLM_SECONDS = registry.histogram(
+    "llm_request_seconds", "LLM call latency, including time queued for a slot.", ("operation",))
+LLM_ERRORS = registry.counter("llm_request_errors_total", "Failed LLM calls.", ("operation", "error"))
+NODE_SECONDS = registry.histogram("graph_node_seconds", "Agent graph node latency.", ("node",))
+NODE_ERRORS = registry.counter("graph_node_errors_total", "Agent graph node failures.", ("node", "error"))
+HTTP_SECONDS = registry.histogram(
+    "http_request_seconds", "Route latency until the response body is sent.", ("method", "route", "status"))
+HTTP_IN_FLIGHT = registry.gauge("http_requests_in_flight", "Requests being served.")
+JOB_SECONDS = registry.histogram(
+    "query_job_seconds", "Async query jobs: time queued and time running, by final status.", ("phase", "status"))
+
+
+_PACKAGE_ID = re.compile(r"(/package/)[^/?]+")
+
+
+def endpoint_label(path: str) -> str:
+    """``/admin/package/P1/hotels?x=1`` -> ``/admin/package/{id}/hotels``."""
+    return _PACKAGE_ID.sub(r"\1{id}", path.split("?", 1)[0])
+
+
+def _tracer():
+    if trace is None or not settings.TRACING_ENABLED:
+        return None
+    return trace.get_tracer("tripxplo-ai")
+
+
+class span:
+    """
+    Time a block into ``histogram`` (and ``errors`` on failure), inside an
+    OpenTelemetry span when tracing is enabled. A plain class rather than a
+    generator-based context manager: it sits on every upstream call and
+    graph node, and this is several times cheaper.
+    """
+
+    __slots__ = ("name", "histogram", "labels", "errors", "attributes", "_started", "_otel")
+
+    def __init__(
+        self,
+        name: str,
+        histogram: Optional[Histogram] = None,
+        labels: Labels = (),
+        errors: Optional[Counter] = None,
+        **attributes: Any,
+    ):
+        self.name = name
+        self.histogram = histogram
+        self.labels = labels
+        self.errors = errors
+        self.attributes = attributes
+        self._otel = None
+
+    def __enter__(self) -> "span":
+        tracer = _tracer()
+        if tracer is not None:
+            attributes = {"request.id": current_request_id(), **self.attributes}
+            self._otel = tracer.start_as_current_span(self.name, attributes=attributes)
+            self._otel.__enter__()
+        self._started = time.perf_counter()
+        return self
+
+    def __exit__(self, exc_type, exc, tb) -> bool:
+        if self.histogram is not None:
+            self.histogram.observe(time.perf_counter() - self._started, *self.labels)
+        if self.errors is not None and exc_type is not None and issubclass(exc_type, Exception):
+            self.errors.inc(*self.labels, exc_type.__name__)
+        if self._otel is not None:
+            return bool(self._otel.__exit__(exc_type, exc, tb))
+        return False
+
+
+class MetricsMiddleware:
+    """
+    ASGI middleware: request ID, in-flight gauge and per-route latency.
+
+    Timing stops when the last body chunk is sent, so streaming routes are
+    measured end to end. The route label is the path template (``/packages/
+    {package_id}``) to keep label cardinality bounded.
+    """
+
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+        incoming = next((v for k, v in scope.get("headers") or () if k == b"x-request-id"), b"")
+        request_id = new_request_id(incoming.decode("latin-1"))
+        token = request_id_var.set(request_id)
+        status = {"code": "500"}
+
+        async def send_wrapper(message):
+            if message["type"] == "http.response.start":
+                status["code"] = str(message["status"])
+                message.setdefault("headers", [])
+                message["headers"] = list(message["headers"]) + [(b"x-request-id", request_id.encode("latin-1"))]
+            await send(message)
+
+        HTTP_IN_FLIGHT.inc()
+        started = time.perf_counter()
+        try:
+            await self.app(scope, receive, send_wrapper)
+        finally:
+            HTTP_IN_FLIGHT.dec()
+            route = scope.get("route")
+            path = getattr(route, "path", None) or "unmatched"
+            HTTP_SECONDS.observe(time.perf_counter() - started, scope["method"], path, status["code"])
+            request_id_var.reset(token)
@@ -0,0 +1,6 @@
+import os
+
+# The app refuses to start without credentials; tests never hit the real upstream.
+os.environ.setdefault("TRIPXPLO_EMAIL", "test@example.com")
+os.environ.setdefault("TRIPXPLO_PASSWORD", "test")
+os.environ.setdefault("OPENROUTER_API_KEY", "test")
@@ -0,0 +1,117 @@
+import asyncio
+
+import pytest
+from fastapi import FastAPI
+from fastapi.testclient import TestClient
+
+from src.services.admission import (
+    CATALOG, FAST, LLM, AdmissionController, AdmissionMiddleware, ClientRateLimiter, Overloaded, PriorityLimiter,
+    TokenBucket,
+)
+
+
+def test_token_bucket_refills_and_reports_wait():
+    bucket = TokenBucket(rate=2, burst=2, now=0.0)
+    assert bucket.take(0.0) == 0 and bucket.take(0.0) == 0
+    assert bucket.take(0.0) == pytest.approx(0.5)
+    assert bucket.take(0.5) == 0
+
+
+def test_waiters_are_served_by_priority_then_arrival():
+    limiter = PriorityLimiter("agent", limit=1, max_queue=10, timeout=1)
+    order = []
+
+    async def worker(name, priority):
+        await limiter.acquire(priority)
+        order.append(name)
+        await asyncio.sleep(0)
+        limiter.release()
+
+    async def scenario():
+        await limiter.acquire(FAST)
+        arrivals = (("llm1", LLM), ("fast", FAST), ("llm2", LLM), ("catalog", CATALOG))
+        tasks = [asyncio.ensure_future(worker(name, priority)) for name, priority in arrivals]
+        await asyncio.sleep(0)
+        limiter.release()
+        await asyncio.gather(*tasks)
+
+    asyncio.run(scenario())
+    assert order == ["catalog", "fast", "llm1", "llm2"]
+    assert limiter.active == 0 and limiter.waiting == 0
+
+
+def test_full_queue_and_deadline_are_shed_with_retry_after():
+    limiter = PriorityLimiter("agent", limit=1, max_queue=1, timeout=0.02)
+
+    async def scenario():
+        await limiter.acquire(FAST)
+        waiter = asyncio.ensure_future(limiter.acquire(LLM))
+        await asyncio.sleep(0)
+        with pytest.raises(Overloaded) as full:
+            await limiter.acquire(FAST)
+        with pytest.raises(Overloaded) as late:
+            await waiter
+        return full.value, late.value
+
+    full, late = asyncio.run(scenario())
+    assert full.status_code == 503 and full.retry_after >= 1
+    assert late.reason == "agent queue timeout"
+    assert limiter.waiting == 0 and limiter.active == 1
+
+
+def test_generation_requeues_the_slot_at_llm_priority():
+    limiter = PriorityLimiter("agent", limit=1, max_queue=10, timeout=1)
+    controller = AdmissionController({"agent": limiter})
+    app = FastAPI()
+    order = []
+
+    @app.post("/query")
+    async def query(slow: bool = False):
+        if slow:
+            async with controller.generation():
+                order.append("generation")
+                await asyncio.sleep(0.05)
+        else:
+            order.append("fast")
+        return {}
+
+    guarded = AdmissionMiddleware(app, controller)
+
+    async def call(slow):
+        scope = {"type": "http", "method": "POST", "path": "/query", "raw_path": b"/query",
+                 "query_string": b"slow=true" if slow else b"", "headers": [], "client": ("1.2.3.4", 1)}
+
+        async def receive():
+            return {"type": "http.request", "body": b"", "more_body": False}
+
+        async def send(message):
+            pass
+
+        await guarded(scope, receive, send)
+
+    async def scenario():
+        await asyncio.gather(call(True), call(True), call(False))
+
+    asyncio.run(scenario())
+    # The second generation gives up its slot and queues behind the fast answer.
+    assert order == ["generation", "fast", "generation"]
+    assert limiter.active == 0
+
+
+def test_rate_limited_client_gets_429_with_retry_after():
+    app = FastAPI()
+
+    @app.get("/packages")
+    async def packages():
+        return {}
+
+    controller = AdmissionController(
+        {"catalog": PriorityLimiter("catalog", limit=10)}, rate_limiter=ClientRateLimiter(rate=0.5, burst=2)
+    )
+    app.add_middleware(AdmissionMiddleware, controller=controller)
+    client = TestClient(app)
+    statuses = [client.get("/packages").status_code for _ in range(3)]
+    assert statuses == [200, 200, 429]
+    rejected = client.get("/packages")
+    assert int(rejected.headers["retry-after"]) >= 1
+    assert controller.pools["catalog"].counters["rate_limited"] == 2
@@ -0,0 +1,72 @@
+import asyncio
+import time
+
+from src.services.cache import CacheEntry, LRUCache, SQLiteBackend, TieredCache
+
+
+def test_lru_evicts_least_recently_used_over_byte_budget():
+    lru = LRUCache(max_entries=10, max_bytes=100)
+    lru.set("a", CacheEntry("a", 40, 0, 0))
+    lru.set("b", CacheEntry("b", 40, 0, 0))
+    lru.get("a")
+    lru.set("c", CacheEntry("c", 40, 0, 0))
+    assert lru.get("b") is None
+    assert lru.get("a") is not None and lru.get("c") is not None
+    assert lru.evictions == 1 and lru.bytes == 80
+
+
+def test_stale_entry_is_served_while_revalidating():
+    cache = TieredCache(ttls={"packages": 0.05}, stale_ttl=60)
+    calls = []
+
+    async def fetcher():
+        calls.append(1)
+        return [len(calls)]
+
+    async def scenario():
+        first = await cache.get_or_fetch("packages", "k", fetcher)
+        again = await cache.get_or_fetch("packages", "k", fetcher)
+        time.sleep(0.06)
+        stale = await cache.get_or_fetch("packages", "k", fetcher)
+        await asyncio.sleep(0.001)
+        refreshed = await cache.get_or_fetch("packages", "k", fetcher)
+        return first, again, stale, refreshed
+
+    assert asyncio.run(scenario()) == ([1], [1], [1], [2])
+    assert cache.metrics["packages"] == {"misses": 1, "hits": 2, "stale_hits": 1, "refreshes": 1}
+
+
+def test_empty_results_are_not_cached():
+    cache = TieredCache(ttls={})
+
+    async def empty():
+        return []
+
+    async def scenario():
+        await cache.get_or_fetch("hotels", "goa", empty)
+        await cache.get_or_fetch("hotels", "goa", empty)
+
+    asyncio.run(scenario())
+    assert cache.metrics["hotels"] == {"misses": 2}
+
+
+def test_sqlite_backend_shares_entries_between_caches(tmp_path):
+    path = str(tmp_path / "cache.sqlite3")
+    worker_a = TieredCache(ttls={}, backend=SQLiteBackend(path))
+    worker_b = TieredCache(ttls={}, backend=SQLiteBackend(path))
+
+    async def fetch():
+        return {"packageId": "P1"}
+
+    async def unreachable():
+        raise AssertionError("should have been served from the shared backend")
+
+    async def scenario():
+        await worker_a.get_or_fetch("package_details", "P1", fetch)
+        value = await worker_b.get_or_fetch("package_details", "P1", unreachable)
+        await worker_a.aclose()
+        await worker_b.aclose()
+        return value
+
+    assert asyncio.run(scenario()) == {"packageId": "P1"}
+    assert worker_b.metrics["package_details"] == {"shared_hits": 1}
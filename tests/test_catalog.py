@@ -0,0 +1,79 @@
+import asyncio
+
+from src.services import catalog as catalog_module
+from src.services.catalog import CatalogSyncer
+
+
+def make_docs(n):
+    return [
+        {
+            "packageId": f"P{i}",
+            "packageName": f"Goa Escape {i}" if i % 2 else f"Kerala Backwaters {i}",
+            "destinationName": "Goa" if i % 2 else "Kerala",
+            "noOfDays": 3 + i % 3,
+            "noOfNight": 2 + i % 3,
+            "startFrom": 10000 + 1000 * i,
+            "updatedAt": "v1",
+        }
+        for i in range(n)
+    ]
+
+
+def install_upstream(monkeypatch, docs, include_total=True):
+    calls = {"pages": 0, "details": []}
+
+    async def fetch_package_page(limit, offset):
+        calls["pages"] += 1
+        result = {"docs": docs[offset:offset + limit]}
+        if include_total:
+            result["totalDocs"] = len(docs)
+        return result
+
+    async def fetch_package(package_id):
+        calls["details"].append(package_id)
+        return {"packageId": package_id, "description": "details"}
+
+    monkeypatch.setattr(catalog_module, "fetch_package_page", fetch_package_page)
+    monkeypatch.setattr(catalog_module, "fetch_package", fetch_package)
+    return calls
+
+
+def test_sync_walks_every_page_and_indexes_packages(monkeypatch):
+    docs = make_docs(23)
+    calls = install_upstream(monkeypatch, docs, include_total=False)
+    syncer = CatalogSyncer(page_size=5, concurrency=3)
+
+    report = asyncio.run(syncer.sync())
+
+    assert report.packages == 23 and report.fetched == 23
+    assert syncer.ready and syncer.index.version == 1
+    goa_short = syncer.index.search(destination="goa", days=3)
+    assert [r.package_id for r in goa_short] == ["P3", "P9", "P15", "P21"]
+    assert [r.package_id for r in syncer.index.search(max_price=12000)] == ["P0", "P1", "P2"]
+
+
+def test_incremental_sync_refetches_only_changed_packages(monkeypatch):
+    docs = make_docs(10)
+    calls = install_upstream(monkeypatch, docs)
+    syncer = CatalogSyncer(page_size=4)
+    asyncio.run(syncer.sync())
+    calls["details"].clear()
+
+    docs[2] = {**docs[2], "updatedAt": "v2"}
+    del docs[7]
+    report = asyncio.run(syncer.sync())
+
+    assert calls["details"] == ["P2"]
+    assert (report.fetched, report.unchanged, report.removed) == (1, 8, 1)
+    assert syncer.index.get("P7") is None
+    assert syncer.index.version == 2
+
+
+def test_unchanged_sync_keeps_the_index_and_its_version(monkeypatch):
+    install_upstream(monkeypatch, make_docs(6))
+    syncer = CatalogSyncer(page_size=4)
+    asyncio.run(syncer.sync())
+    index = syncer.index
+
+    report = asyncio.run(syncer.sync())
+    assert report.unchanged == 6 and syncer.index is index and index.version == 1
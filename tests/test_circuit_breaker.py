@@ -0,0 +1,76 @@
+import asyncio
+import time
+
+import pytest
+
+from src.services.cache import TieredCache, track_stale
+from src.services.circuit_breaker import CircuitBreaker, CircuitOpenError, UpstreamUnavailable
+
+
+def test_breaker_opens_on_failure_rate_and_fails_fast():
+    breaker = CircuitBreaker("GET /x", window=10, min_calls=4, failure_rate=0.5, open_seconds=60)
+    for ok in (True, False, True, False):
+        breaker.allow()
+        breaker.record(ok, 0.01)
+    assert breaker.state == "open"
+    with pytest.raises(CircuitOpenError):
+        breaker.allow()
+    assert breaker.counters["rejected"] == 1
+
+
+def test_breaker_opens_on_slow_calls():
+    breaker = CircuitBreaker("GET /x", min_calls=3, slow_call_seconds=0.5, slow_call_rate=0.6)
+    for seconds in (1.0, 0.1, 2.0):
+        breaker.allow()
+        breaker.record(True, seconds)
+    assert breaker.state == "open"
+
+
+def test_half_open_probes_close_or_reopen():
+    breaker = CircuitBreaker("GET /x", min_calls=1, failure_rate=0.5, open_seconds=0.01, half_open_calls=2)
+    breaker.allow()
+    breaker.record(False, 0.01)
+    time.sleep(0.02)
+
+    breaker.allow()
+    breaker.allow()
+    assert breaker.state == "half_open"
+    with pytest.raises(CircuitOpenError):
+        breaker.allow()  # only two probes at a time
+    breaker.record(True, 0.01)
+    breaker.record(True, 0.01)
+    assert breaker.state == "closed"
+
+    breaker.allow()
+    breaker.record(False, 0.01)
+    time.sleep(0.02)
+    breaker.allow()
+    breaker.record(False, 0.01)
+    assert breaker.state == "open"
+
+
+def test_cache_serves_last_good_entry_when_upstream_is_down():
+    cache = TieredCache(ttls={"hotels": 0.01}, stale_ttl=0)
+    up = {"ok": True}
+
+    async def fetcher():
+        if not up["ok"]:
+            raise UpstreamUnavailable("down", default=[])
+        return [{"hotelId": "H1"}]
+
+    async def scenario():
+        sources = track_stale()
+        first = await cache.get_or_fetch("hotels", "P1", fetcher)
+        assert not sources
+        up["ok"] = False
+        await asyncio.sleep(0.02)
+        degraded = await cache.get_or_fetch("hotels", "P1", fetcher)
+        missing = await cache.get_or_fetch("hotels", "P2", fetcher)
+        return first, degraded, missing, sources
+
+    first, degraded, missing, sources = asyncio.run(scenario())
+    assert degraded == first == [{"hotelId": "H1"}]
+    assert missing == []
+    assert sources == {"hotels"}
+    assert cache.metrics["hotels"]["degraded_hits"] == 1
+    assert cache.metrics["hotels"]["upstream_errors"] == 1
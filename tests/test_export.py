@@ -0,0 +1,88 @@
+import json
+
+import pytest
+from fastapi.testclient import TestClient
+
+import main
+from src.services.catalog import CatalogIndex, SyncReport, make_record
+from src.services.export import decode_cursor, encode_cursor, ndjson_chunks, page, parse_fields
+
+client = TestClient(main.app)
+
+
+def make_index(n, version=1):
+    docs = [
+        {"packageId": f"P{i:03d}", "packageName": f"Goa Escape {i}", "startFrom": 10000 + i, "description": "x" * 50}
+        for i in range(n)
+    ]
+    return CatalogIndex((make_record(doc) for doc in docs), version=version)
+
+
+@pytest.fixture
+def local_catalog(monkeypatch):
+    index = make_index(25)
+    monkeypatch.setattr(main.catalog, "index", index)
+    monkeypatch.setattr(main.catalog, "last_report", SyncReport(started_at=0.0))
+    monkeypatch.setattr(main.catalog, "last_error", None)
+    return index
+
+
+def test_pages_walk_the_catalog_once_and_survive_a_resync():
+    index = make_index(25)
+    seen, after = [], None
+    while True:
+        result = page(index, parse_fields("packageId,startFrom"), after, limit=10)
+        seen += result["packages"]
+        if result["next_cursor"] is None:
+            break
+        after = decode_cursor(result["next_cursor"])
+    assert [doc["packageId"] for doc in seen] == [f"P{i:03d}" for i in range(25)]
+    assert set(seen[0]) == {"packageId", "startFrom"}
+
+    # A cursor names a package, not a position: removing earlier packages shifts nothing.
+    cursor = page(index, None, None, limit=10)["next_cursor"]
+    smaller = CatalogIndex(r for r in index.records() if r.package_id != "P003")
+    assert page(smaller, None, decode_cursor(cursor), limit=1)["packages"][0]["packageId"] == "P010"
+
+
+def test_ndjson_streams_in_bounded_chunks():
+    chunks = list(ndjson_chunks(make_index(300), parse_fields("packageId"), chunk_bytes=1024))
+    assert len(chunks) > 1 and all(len(chunk) < 1024 + 100 for chunk in chunks)
+    lines = b"".join(chunks).decode().splitlines()
+    assert len(lines) == 300 and json.loads(lines[-1]) == {"packageId": "P299"}
+
+
+def test_packages_route_projection_pagination_and_ndjson(local_catalog):
+    first = client.get("/packages", params={"fields": "packageId,packageName", "limit": 20}).json()
+    assert len(first["packages"]) == 20 and set(first["packages"][0]) == {"packageId", "packageName"}
+    second = client.get("/packages", params={"cursor": first["next_cursor"], "limit": 20}).json()
+    assert [p["packageId"] for p in second["packages"]] == [f"P{i:03d}" for i in range(20, 25)]
+    assert second["next_cursor"] is None
+
+    response = client.get("/packages", params={"format": "ndjson", "fields": "packageId", "cursor": encode_cursor("P022")})
+    assert response.headers["content-type"].startswith("application/x-ndjson")
+    assert response.text.splitlines() == ['{"packageId":"P023"}', '{"packageId":"P024"}']
+
+    full = client.get("/packages").json()
+    assert len(full["packages"]) == 25 and "next_cursor" not in full
+
+
+def test_limited_ndjson_export_can_be_resumed_and_reports_staleness(local_catalog, monkeypatch):
+    seen, params = [], {"format": "ndjson", "fields": "packageId", "limit": 10}
+    while True:
+        response = client.get("/packages", params=params)
+        seen += [json.loads(line)["packageId"] for line in response.text.splitlines()]
+        if "x-next-cursor" not in response.headers:
+            break
+        params["cursor"] = response.headers["x-next-cursor"]
+    assert seen == [f"P{i:03d}" for i in range(25)]
+    assert "x-data-stale" not in response.headers
+
+    monkeypatch.setattr(main.catalog, "last_error", "sync failed")
+    assert client.get("/packages", params={"format": "ndjson", "limit": 5}).headers["x-data-stale"] == "catalog"
+
+
+def test_packages_route_rejects_bad_parameters(local_catalog):
+    assert client.get("/packages", params={"cursor": "%%%"}).status_code == 400
+    assert client.get("/packages", params={"limit": 0}).status_code == 422
+    assert client.get("/packages", params={"format": "csv"}).status_code == 422
@@ -0,0 +1,93 @@
+import asyncio
+
+from src.core import agent
+from src.core.fast_path import PathStats, fast_answer
+from src.core.matcher import QueryMatcher
+from src.core.retrieval import Retriever
+from src.services.catalog import make_record
+
+DOCS = [
+    {"packageId": "K101", "packageName": "Kerala Backwaters", "destinationName": "Kerala",
+     "noOfDays": 5, "noOfNight": 4, "startFrom": 18000, "description": "Houseboat in Alleppey"},
+    {"packageId": "K102", "packageName": "Munnar Tea Trails", "destinationName": "Kerala",
+     "noOfDays": 4, "noOfNight": 3, "startFrom": 26000},
+    {"packageId": "G201", "packageName": "Goa Beach Escape", "destinationName": "Goa",
+     "noOfDays": 4, "noOfNight": 3, "startFrom": 15000},
+]
+retriever = Retriever([make_record(doc) for doc in DOCS])
+matcher = QueryMatcher()
+
+
+def search(query):
+    return {"mode": "search", "items": [record.summary for record, _ in retriever.search(query, matcher.match(query))]}
+
+
+def test_structured_queries_are_templated():
+    listing = fast_answer("list kerala packages under 20000", matcher.match("list kerala packages under 20000"),
+                          search("list kerala packages under 20000"))
+    assert listing.startswith("Here is 1 Kerala package under ₹20,000:") and "K101" in listing and "K102" not in listing
+
+    nights = fast_answer("how many nights is goa beach escape", matcher.match("how many nights is goa beach escape"),
+                         search("how many nights is goa beach escape"))
+    assert nights == "Goa Beach Escape (ID: G201) is 4 days / 3 nights, starting from ₹15,000 per package."
+
+    details = fast_answer("details please", matcher.match("details please"), {"mode": "followup", "items": [DOCS[0]]})
+    assert "Houseboat in Alleppey" in details and "5 days / 4 nights" in details
+
+
+def test_listing_keeps_only_records_matching_the_named_destination():
+    query = "list kerala packages"
+    mixed = {"mode": "search", "items": [DOCS[2], DOCS[0], DOCS[1]]}  # e.g. embedding retrieval ranking Goa first
+    listing = fast_answer(query, matcher.match(query), mixed)
+    assert listing.startswith("Here are 2 Kerala packages:") and "G201" not in listing
+
+    only_goa = {"mode": "search", "items": [DOCS[2]]}
+    assert fast_answer(query, matcher.match(query), only_goa) is None
+
+
+def test_named_package_price_for_a_party_or_month_uses_the_hint_or_the_llm():
+    query = "how much is goa beach escape for 2 adults in december"
+    entities = matcher.match(query)
+    assert entities.adults == 2 and entities.month == 12 and "pricing" in entities.intents
+
+    hint = {"G201": "from ₹42,000 for 2 adult(s), 0 child(ren) starting 2026-12-03"}
+    quoted = fast_answer(query, entities, search(query), hint)
+    assert "₹42,000 for 2 adult(s)" in quoted and "₹15,000" not in quoted
+    assert fast_answer(query, entities, search(query)) is None
+
+    plain = "how much is goa beach escape"
+    assert "starts from ₹15,000" in fast_answer(plain, matcher.match(plain), search(plain))
+
+
+def test_open_ended_queries_go_to_the_llm():
+    for query in ("suggest the best kerala packages for a honeymoon", "plan a trip to goa", "something relaxing"):
+        assert fast_answer(query, matcher.match(query), search(query)) is None
+
+
+def test_graph_answers_package_id_details_without_the_llm(monkeypatch):
+    async def fake_retriever():
+        return retriever
+
+    async def no_llm(prompt, cache_key=None):
+        raise AssertionError("fast-path answers must not call the LLM")
+
+    monkeypatch.setattr(agent, "package_retriever", fake_retriever)
+    monkeypatch.setattr(agent, "call_deepseek", no_llm)
+    monkeypatch.setattr(agent.catalog.index, "by_id", {r.package_id: r for r in retriever.records})
+
+    result = asyncio.run(agent.build_graph().ainvoke({"messages": [{"role": "user", "content": "package ID k102 details"}]}))
+    assert result["answer"].path == "fast" and "Munnar Tea Trails (ID: K102)" in result["messages"][-1]["content"]
+    assert result["context"]["selected_package"] == "K102"
+
+    answer = asyncio.run(agent.prepare_answer("suggest a romantic kerala getaway"))
+    assert answer.path == "llm" and answer.prompt is not None
+
+
+def test_path_stats_report_share_and_latency():
+    stats = PathStats()
+    for seconds in (0.001, 0.002, 0.003):
+        stats.observe("fast", seconds)
+    stats.observe("llm", 2.0)
+    report = stats.stats()
+    assert report["queries"] == 4
+    assert report["paths"]["fast"]["share"] == 0.75 and report["paths"]["llm"]["p50_ms"] == 2000.0
@@ -0,0 +1,61 @@
+import asyncio
+import time
+
+from src.core import agent
+from src.core.retrieval import Retriever
+from src.services.catalog import make_record
+
+GOA = Retriever([make_record({"packageId": "G1", "packageName": "Goa Escape", "destinationName": "Goa",
+                              "noOfDays": 4, "noOfNight": 3, "startFrom": 18000})])
+
+
+def test_hotels_and_activities_are_fetched_in_parallel(monkeypatch):
+    async def slow(kind):
+        await asyncio.sleep(0.1)
+        return [{f"{kind}Name": f"Best {kind}", f"{kind}Id": f"{kind[0].upper()}1"}]
+
+    async def hotels(lookup):
+        return await slow("hotel")
+
+    async def activities(lookup):
+        return await slow("activity")
+
+    monkeypatch.setattr(agent, "get_available_hotels", hotels)
+    monkeypatch.setattr(agent, "get_available_activities", activities)
+
+    async def goa():
+        return GOA
+
+    monkeypatch.setattr(agent, "package_retriever", goa)
+
+    started = time.perf_counter()
+    answer = asyncio.run(agent.prepare_answer("activities and hotels in Goa"))
+    elapsed = time.perf_counter() - started
+
+    assert elapsed < 0.19
+    assert answer.intent == "hotel+activity"
+    assert "Hotel options" in answer.prompt and "Activity options" in answer.prompt
+    assert {"understand", "fetch_hotels", "fetch_activities", "compose"} <= set(answer.timings)
+    assert "generate" not in answer.timings
+
+
+def test_price_lookup_skips_the_llm(monkeypatch):
+    async def quote(package_id, day, party):
+        return {"startDate": day.isoformat(), "totalPrice": 45500.0, "source": "live"}
+
+    async def no_llm(prompt, cache_key=None):
+        raise AssertionError("lookup answers must not call the LLM")
+
+    monkeypatch.setattr(agent.price_calendars, "quote", quote)
+    monkeypatch.setattr(agent, "call_deepseek", no_llm)
+
+    context = {"package_ids": ["P1", "P2"], "selected_package": "P1", "destinations": ["goa"]}
+    state = {
+        "messages": [{"role": "user", "content": "how much is the second one for 2 adults in December?"}],
+        "context": context,
+    }
+    result = asyncio.run(agent.build_graph().ainvoke(state))
+    reply = result["messages"][-1]["content"]
+    assert "P2" in reply and "₹45,500" in reply and "2 adult(s)" in reply
+    assert "generate" not in result["timings"]
+    assert result["context"]["selected_package"] == "P2"
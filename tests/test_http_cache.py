@@ -0,0 +1,71 @@
+import asyncio
+import gzip
+import json
+
+from fastapi import FastAPI, Request
+from fastapi.testclient import TestClient
+
+from src.services.http_cache import RepresentationCache, accepted_encodings
+
+cache = RepresentationCache(min_bytes=100)
+builds = []
+app = FastAPI()
+
+
+@app.get("/items/{size}")
+async def items(size: int, request: Request):
+    def build():
+        builds.append(size)
+        return {"items": [{"id": i, "name": f"package {i}"} for i in range(size)]}
+
+    return cache.respond(request, await cache.for_key(("items", size), build))
+
+
+client = TestClient(app)
+
+
+def test_accept_encoding_q_values():
+    assert accepted_encodings("gzip;q=0.8, br, identity;q=0") == {"gzip": 0.8, "br": 1.0, "identity": 0.0}
+
+
+def test_large_body_is_compressed_once_and_reused():
+    first = client.get("/items/50", headers={"Accept-Encoding": "gzip"})
+    second = client.get("/items/50", headers={"Accept-Encoding": "gzip"})
+    assert first.headers["content-encoding"] == "gzip"
+    assert first.headers["vary"] == "Accept-Encoding"
+    assert first.json()["items"][49]["id"] == 49
+    assert first.headers["etag"] == second.headers["etag"]
+    assert builds.count(50) == 1
+
+    rep = cache._by_digest[first.headers["etag"].strip('"').split("-")[0]]
+    assert gzip.decompress(rep.encoded["gzip"]) == rep.body
+
+
+def test_small_body_and_refused_encoding_are_identity():
+    small = client.get("/items/1", headers={"Accept-Encoding": "gzip"})
+    assert "content-encoding" not in small.headers
+    refused = client.get("/items/50", headers={"Accept-Encoding": "gzip;q=0"})
+    assert "content-encoding" not in refused.headers
+    assert json.loads(refused.content)["items"][0]["id"] == 0
+
+
+def test_if_none_match_answers_304_for_any_encoding_of_the_same_content():
+    gzipped = client.get("/items/50", headers={"Accept-Encoding": "gzip"})
+    plain = client.get("/items/50", headers={"Accept-Encoding": "identity"})
+    assert gzipped.headers["etag"] != plain.headers["etag"]
+
+    for etag in (gzipped.headers["etag"], f'W/{plain.headers["etag"]}', '"other", ' + plain.headers["etag"]):
+        response = client.get("/items/50", headers={"If-None-Match": etag, "Accept-Encoding": "gzip"})
+        assert response.status_code == 304 and response.content == b""
+    assert client.get("/items/50", headers={"If-None-Match": '"other"'}).status_code == 200
+    assert client.get("/items/50", headers={"If-Modified-Since": plain.headers["last-modified"]}).status_code == 304
+
+
+def test_same_content_under_new_key_keeps_its_validators():
+    async def scenario():
+        a = await cache.for_key(("v", 1), lambda: {"x": 1})
+        b = await cache.for_key(("v", 2), lambda: {"x": 1})
+        return a, b
+
+    a, b = asyncio.run(scenario())
+    assert a is b  # a catalog resync with unchanged content keeps ETag and Last-Modified
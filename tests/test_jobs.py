@@ -0,0 +1,102 @@
+import asyncio
+import json
+
+import httpx
+import pytest
+
+import main
+from src.services.admission import Overloaded
+from src.services.jobs import JobRunner
+
+
+def test_jobs_run_on_a_bounded_pool():
+    active = {"now": 0, "max": 0}
+
+    async def handler(question, session_id):
+        active["now"] += 1
+        active["max"] = max(active["max"], active["now"])
+        await asyncio.sleep(0.02)
+        active["now"] -= 1
+        return {"response": question.upper()}
+
+    runner = JobRunner(handler, workers=2)
+
+    async def scenario():
+        runner.start()
+        submitted = [runner.submit(f"q{i}") for i in range(5)]
+        await asyncio.gather(*(job.wait_finished(1) for job in submitted))
+        await runner.stop()
+        return submitted
+
+    submitted = asyncio.run(scenario())
+    assert [job.result["response"] for job in submitted] == ["Q0", "Q1", "Q2", "Q3", "Q4"]
+    assert active["max"] == 2 and runner.counters["done"] == 5
+
+
+def test_full_queue_rejects_and_abandoned_jobs_are_cancelled():
+    cancelled = []
+
+    async def handler(question, session_id):
+        try:
+            await asyncio.sleep(10)
+        except asyncio.CancelledError:
+            cancelled.append(question)
+            raise
+
+    runner = JobRunner(handler, workers=1, max_queue=1, abandon_after=0.05)
+
+    async def scenario():
+        runner.start()
+        running = runner.submit("running")
+        await asyncio.sleep(0)  # the worker takes it off the queue
+        queued = runner.submit("queued")
+        with pytest.raises(Overloaded):
+            runner.submit("one too many")
+        await asyncio.wait_for(running.wait_finished(1), 1)
+        await queued.wait_finished(1)
+        await runner.stop()
+        return running, queued
+
+    running, queued = asyncio.run(scenario())
+    assert running.status == queued.status == "cancelled"
+    assert running.error == "abandoned by client"
+    assert cancelled == ["running"]  # the queued job never started
+    assert runner.counters["rejected"] == 1
+
+
+def test_job_routes_poll_stream_and_cancel(monkeypatch):
+    async def scenario():
+        gate = asyncio.Event()
+
+        async def handler(question, session_id):
+            if question == "slow":
+                await gate.wait()
+            return {"response": f"answer to {question}", "session_id": session_id}
+
+        runner = JobRunner(handler, workers=2)
+        monkeypatch.setattr(main, "jobs", runner)
+        runner.start()
+        transport = httpx.ASGITransport(app=main.app)
+        async with httpx.AsyncClient(transport=transport, base_url="http://test") as client:
+            submitted = await client.post("/query/jobs", json={"question": "goa"})
+            assert submitted.status_code == 202
+            job_id = submitted.json()["job_id"]
+            assert submitted.headers["location"] == f"/query/jobs/{job_id}"
+
+            polled = await client.get(f"/query/jobs/{job_id}", params={"wait": 1})
+            assert polled.json()["status"] == "done"
+            assert polled.json()["result"]["response"] == "answer to goa"
+
+            stream = await client.get(f"/query/jobs/{job_id}/events")
+            events = [json.loads(line[len("data: "):]) for line in stream.text.splitlines() if line.startswith("data: ")]
+            assert events[-1]["status"] == "done"
+
+            slow = (await client.post("/query/jobs", json={"question": "slow"})).json()["job_id"]
+            assert (await client.delete(f"/query/jobs/{slow}")).json()["status"] == "cancelled"
+            assert (await client.get("/query/jobs/missing")).status_code == 404
+            stats = (await client.get("/jobs/stats")).json()
+        await runner.stop()
+        return stats
+
+    stats = asyncio.run(scenario())
+    assert stats["done"] == 1 and stats["cancelled"] == 1
@@ -0,0 +1,88 @@
+import asyncio
+from types import SimpleNamespace
+
+import httpx
+import openai
+
+from src.services.llm_gateway import LLMGateway
+
+
+def _completion(text):
+    return SimpleNamespace(choices=[SimpleNamespace(message=SimpleNamespace(content=text))])
+
+
+def _rate_limited():
+    request = httpx.Request("POST", "https://llm.test/chat/completions")
+    response = httpx.Response(429, request=request, headers={"retry-after": "0"})
+    return openai.RateLimitError("rate limited", response=response, body=None)
+
+
+class FakeCompletions:
+    def __init__(self, handler):
+        self.handler = handler
+        self.calls = []
+
+    async def create(self, model, messages, stream=False):
+        self.calls.append(model)
+        return await self.handler(model, len(self.calls))
+
+
+def make_gateway(handler, **kwargs):
+    gateway = LLMGateway(api_key="test", base_url="https://llm.test", model="primary", retry_base_delay=0, **kwargs)
+    completions = FakeCompletions(handler)
+    gateway._client = SimpleNamespace(chat=SimpleNamespace(completions=completions))
+    return gateway, completions
+
+
+def test_retries_rate_limits_then_succeeds():
+    async def handler(model, attempt):
+        if attempt < 3:
+            raise _rate_limited()
+        return _completion("ok")
+
+    gateway, completions = make_gateway(handler, max_retries=2)
+    assert asyncio.run(gateway.complete("hi")) == "ok"
+    assert len(completions.calls) == 3
+    assert gateway.counters["retries"] == 2 and gateway.counters["completed"] == 1
+
+
+def test_concurrency_cap_queues_callers():
+    active = []
+    peak = []
+
+    async def handler(model, attempt):
+        active.append(1)
+        peak.append(len(active))
+        await asyncio.sleep(0.01)
+        active.pop()
+        return _completion("ok")
+
+    gateway, _ = make_gateway(handler, max_concurrency=2)
+
+    async def scenario():
+        return await asyncio.gather(*(gateway.complete("hi") for _ in range(6)))
+
+    assert asyncio.run(scenario()) == ["ok"] * 6
+    assert max(peak) == 2
+    assert gateway.counters["max_waiting"] >= 4
+    assert gateway.in_flight == 0
+
+
+def test_hedge_to_fallback_model_wins_when_primary_is_slow():
+    cancelled = []
+
+    async def handler(model, attempt):
+        if model == "primary":
+            try:
+                await asyncio.sleep(1)
+            except asyncio.CancelledError:
+                cancelled.append(model)
+                raise
+            return _completion("slow")
+        return _completion("fast")
+
+    gateway, completions = make_gateway(handler, fallback_model="fallback", hedge_after=0.01)
+    assert asyncio.run(gateway.complete("hi")) == "fast"
+    assert completions.calls == ["primary", "fallback"]
+    assert cancelled == ["primary"]
+    assert gateway.counters["hedges"] == 1 and gateway.counters["hedge_wins"] == 1
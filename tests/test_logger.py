@@ -0,0 +1,51 @@
+import json
+import logging
+import queue
+
+from src.utils.logger import JsonFormatter, RequestQueueHandler, SamplingFilter, parse_sampling, redact
+from src.utils.metrics import request_id_var
+
+
+def record(name="src.services.tripxplo_client", level=logging.INFO, msg="fetched %s", args=("P1",)):
+    return logging.LogRecord(name, level, __file__, 1, msg, args, None)
+
+
+def test_records_are_tagged_queued_unformatted_and_dropped_when_full():
+    log_queue = queue.Queue(maxsize=1)
+    handler = RequestQueueHandler(log_queue)
+    token = request_id_var.set("req-1")
+    try:
+        handler.handle(record())
+        handler.handle(record())
+    finally:
+        request_id_var.reset(token)
+    queued = log_queue.get_nowait()
+    assert queued.msg == "fetched %s" and queued.args == ("P1",)
+    assert handler.dropped == 1
+
+    line = json.loads(JsonFormatter().format(queued))
+    assert line["msg"] == "fetched P1" and line["request_id"] == "req-1" and line["level"] == "INFO"
+
+
+def test_sampling_is_per_logger_and_per_request():
+    sampling = SamplingFilter(parse_sampling("src.services=0.5, src.services.tripxplo_client=0"))
+    assert sampling.rate_for("src.services.tripxplo_client") == 0.0
+    assert sampling.rate_for("src.services.cache") == 0.5 and sampling.rate_for("main") == 1.0
+
+    assert not sampling.filter(record())
+    assert sampling.filter(record(level=logging.WARNING))
+    assert sampling.filter(record(name="main"))
+
+    decisions = set()
+    for _ in range(5):
+        tagged = record(name="src.services.cache")
+        tagged.request_id = "req-42"
+        decisions.add(sampling.filter(tagged))
+    assert len(decisions) == 1
+
+
+def test_redaction_masks_personal_data_and_caps_length():
+    text = str(redact("I am jo@example.com, call +91 98765 43210, Bearer abc.def.ghi", limit=1000))
+    assert "jo@example.com" not in text and "98765" not in text and "abc.def" not in text
+    assert "[email]" in text and "[number]" in text and "Bearer [token]" in text
+    assert str(redact("x" * 50, limit=10)) == "x" * 10 + "…(+40 chars)"
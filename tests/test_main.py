@@ -22,4 +22,27 @@ def test_packages_endpoint():
     """Test the packages endpoint"""
     response = client.get("/packages")
     # Should return 200 or an error, but not 404
-    assert response.status_code != 404
\ No newline at end of file
+    assert response.status_code != 404
+
+
+def test_query_stream_emits_items_before_tokens(monkeypatch):
+    """Test the SSE variant of /query without calling the upstream APIs"""
+    import main
+    from src.core.agent import PreparedAnswer
+
+    async def fake_prepare(question, history=(), summary="", context=None):
+        return PreparedAnswer("package", [{"packageId": "P1"}], prompt="prompt")
+
+    async def fake_stream(prompt, cache_key=None):
+        for chunk in ["Hello", " traveller"]:
+            yield chunk
+
+    monkeypatch.setattr(main, "prepare_answer", fake_prepare)
+    monkeypatch.setattr(main, "stream_deepseek", fake_stream)
+
+    response = client.post("/query/stream", json={"question": "goa packages"})
+    assert response.status_code == 200
+    assert response.headers["content-type"].startswith("text/event-stream")
+    events = [line.split(": ", 1)[1] for line in response.text.splitlines() if line.startswith("event: ")]
+    assert events == ["items", "token", "token", "done"]
+    assert '"response": "Hello traveller"' in response.text
@@ -0,0 +1,33 @@
+from src.core.matcher import QueryMatcher
+
+matcher = QueryMatcher(destinations=["Coorg"])
+
+
+def test_extracts_destinations_intent_and_trip_hints_in_one_call():
+    entities = matcher.match("Hotels in Goa and Kerala for 2 adults, 1 kid, 4N/5D under 25k")
+    assert entities.destinations == ["goa", "kerala"]
+    assert entities.intent == "hotel"
+    assert (entities.nights, entities.days) == (4, 5)
+    assert (entities.adults, entities.children) == (2, 1)
+    assert entities.max_price == 25000
+
+
+def test_word_boundaries_aliases_and_catalog_destinations():
+    assert matcher.match("I care about scenic places").intent == "package"
+    assert matcher.match("things to do near port blair").destinations == ["andaman"]
+    assert matcher.match("weekend in coorg").destinations == ["coorg"]
+    assert matcher.match("weekend in coorg").nights == 2
+
+
+def test_typos_are_corrected_within_one_edit():
+    entities = matcher.match("honeymoon in keral or manalli")
+    assert entities.destinations == ["kerala", "manali"]
+    assert entities.corrections == {"keral": "kerala", "manalli": "manali"}
+    assert entities.adults == 2
+    assert matcher.match("a ball game").destinations == []
+
+
+def test_travel_month_hint():
+    assert matcher.match("how much for 2 adults in December").month == 12
+    assert matcher.match("goa trip next sept").month == 9
+    assert matcher.match("I may go to goa").month is None
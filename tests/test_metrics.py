@@ -0,0 +1,56 @@
+import asyncio
+
+import pytest
+from fastapi.testclient import TestClient
+
+from src.utils.metrics import Registry, current_request_id, endpoint_label, span
+
+
+def test_histograms_and_counters_render_in_prometheus_format():
+    registry = Registry()
+    latency = registry.histogram("op_seconds", "Op latency.", ("op",), buckets=(0.1, 1.0))
+    errors = registry.counter("op_errors_total", "Op failures.", ("op", "error"))
+    registry.collect("queue_depth", "Waiting ops.", "gauge", (), lambda: {(): 3})
+
+    latency.observe(0.05, "read")
+    latency.observe(0.5, "read")
+    with pytest.raises(ValueError):
+        with span("write", latency, ("write",), errors):
+            raise ValueError("boom")
+
+    text = registry.render()
+    assert "# TYPE op_seconds histogram" in text
+    assert 'op_seconds_bucket{op="read",le="0.1"} 1' in text
+    assert 'op_seconds_bucket{op="read",le="1"} 2' in text
+    assert 'op_seconds_bucket{op="read",le="+Inf"} 2' in text
+    assert 'op_seconds_count{op="write"} 1' in text
+    assert 'op_errors_total{op="write",error="ValueError"} 1' in text
+    assert "queue_depth 3" in text
+
+
+def test_endpoint_labels_drop_ids_and_query_strings():
+    assert endpoint_label("/admin/package/P1/hotels") == "/admin/package/{id}/hotels"
+    assert endpoint_label("/admin/package?limit=50&offset=0") == "/admin/package"
+
+
+def test_request_id_reaches_routes_and_metrics(monkeypatch):
+    import main
+
+    seen = []
+
+    async def fake_details(package_id):
+        seen.append(current_request_id())
+        return {"packageId": package_id}
+
+    monkeypatch.setattr(main, "get_package_details", fake_details)
+    client = TestClient(main.app)
+
+    response = client.get("/packages/P42", headers={"X-Request-ID": "req-123"})
+    assert response.status_code == 200 and response.headers["x-request-id"] == "req-123"
+    assert seen == ["req-123"]
+    assert client.get("/packages/P43").headers["x-request-id"] != "req-123"
+
+    metrics = client.get("/metrics")
+    assert metrics.headers["content-type"].startswith("text/plain")
+    assert 'http_request_seconds_count{method="GET",route="/packages/{package_id}",status="200"}' in metrics.text
+    assert "catalog_cache_events_total" in metrics.text and "llm_queue_depth 0" in metrics.text
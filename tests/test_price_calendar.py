@@ -0,0 +1,104 @@
+import asyncio
+import json
+import time
+from datetime import date, timedelta
+
+from src.services import price_calendar
+from src.services.price_calendar import PriceCalendarStore, expire_after, parse_parties
+
+COUPLE = (2, 0, 1, 0)
+
+
+def install_fake_pricing(monkeypatch):
+    calls = []
+
+    async def fake_price_one(key):
+        package_id, day, adults, *_ = key
+        calls.append(key)
+        offset = (date.fromisoformat(day) - date.today()).days
+        # Cheapest on day 3; day 5 has no price upstream.
+        if offset == 5:
+            return {}
+        return {"totalPrice": 1000 * adults + abs(offset - 3) * 10}
+
+    monkeypatch.setattr(price_calendar, "price_one", fake_price_one)
+    return calls
+
+
+def test_calendar_answers_lookups_and_range_minima_locally(monkeypatch):
+    calls = install_fake_pricing(monkeypatch)
+    store = PriceCalendarStore(parties=parse_parties("2-0-1-0,2-2-1-0"), days=10)
+
+    calendar = asyncio.run(store.build("P1"))
+    assert len(calls) == 20
+    today = date.today()
+    assert calendar.price(today, COUPLE) == 2030
+    assert calendar.price(today + timedelta(days=5), COUPLE) is None
+    assert calendar.cheapest(COUPLE, today, today + timedelta(days=9)) == (today + timedelta(days=3), 2000)
+    assert calendar.cheapest(COUPLE, today + timedelta(days=6), today + timedelta(days=30))[0] == today + timedelta(days=6)
+
+    calls.clear()
+    assert store.quote_nowait("P1", today + timedelta(days=1), COUPLE) == 2020
+    assert calls == []
+
+
+def test_unusual_party_falls_back_to_live_quote(monkeypatch):
+    calls = install_fake_pricing(monkeypatch)
+    store = PriceCalendarStore(parties=[COUPLE], days=3)
+
+    async def scenario():
+        await store.build("P1")
+        calls.clear()
+        return await store.quote("P1", date.today(), (4, 0, 2, 0))
+
+    quote = asyncio.run(scenario())
+    assert quote["source"] == "live" and quote["totalPrice"] == 4030
+    assert len(calls) == 1
+
+
+def test_live_quote_without_a_price_is_null_not_nan(monkeypatch):
+    install_fake_pricing(monkeypatch)
+    store = PriceCalendarStore(parties=[COUPLE], days=3, warm_on_demand=False)
+
+    quote = asyncio.run(store.quote("P1", date.today() + timedelta(days=5), (7, 0, 3, 0)))
+    assert quote["source"] == "live" and quote["totalPrice"] is None
+    json.dumps(quote, allow_nan=False)
+
+
+def test_policies_flag_stale_calendars_and_nowait_warms_in_background(monkeypatch):
+    install_fake_pricing(monkeypatch)
+    store = PriceCalendarStore(parties=[COUPLE], days=3, policies=[expire_after(0.05)])
+
+    async def scenario():
+        assert store.quote_nowait("P1", date.today(), COUPLE) is None
+        await asyncio.sleep(0.01)
+        first = store.calendars["P1"].built_at
+        time.sleep(0.06)
+        assert store.is_stale("P1")
+        # Still served while the rebuild runs.
+        assert store.quote_nowait("P1", date.today(), COUPLE) == 2030
+        await asyncio.sleep(0.01)
+        return first
+
+    first = asyncio.run(scenario())
+    assert store.calendars["P1"].built_at > first
+    assert store.counters["builds"] == 2
+
+
+def test_calendar_route_only_warms_known_packages_when_enabled(monkeypatch):
+    from fastapi.testclient import TestClient
+
+    import main
+    from src.services.catalog import CatalogIndex, make_record
+
+    warmed = []
+    monkeypatch.setattr(main.price_calendars, "warm", warmed.append)
+    monkeypatch.setattr(main.catalog, "index", CatalogIndex([make_record({"packageId": "P1"})], version=1))
+    client = TestClient(main.app)
+
+    assert client.get("/packages/made-up/calendar").status_code == 404
+    monkeypatch.setattr(main.price_calendars, "warm_on_demand", False)
+    assert client.get("/packages/P1/calendar").status_code == 404
+    monkeypatch.setattr(main.price_calendars, "warm_on_demand", True)
+    assert client.get("/packages/P1/calendar").status_code == 202
+    assert warmed == ["P1"]
@@ -0,0 +1,91 @@
+import asyncio
+import json
+
+from fastapi.testclient import TestClient
+
+from src.services import pricing
+from src.services.cache import TieredCache
+from src.services.circuit_breaker import CircuitOpenError
+
+
+def install_fake_upstream(monkeypatch):
+    calls = []
+
+    async def fake_pricing(package_id, params):
+        calls.append((package_id, params["startDate"]))
+        await asyncio.sleep(0.001)
+        if package_id == "BROKEN":
+            raise RuntimeError("upstream 500")
+        return {"totalPrice": 1000 + int(params["startDate"][-2:])}
+
+    monkeypatch.setattr(pricing, "fetch_package_pricing", fake_pricing)
+    monkeypatch.setattr(pricing, "catalog_cache", TieredCache(ttls={"pricing": 300}))
+    return calls
+
+
+def test_batch_dedupes_reports_failures_and_caches(monkeypatch):
+    calls = install_fake_upstream(monkeypatch)
+    party = {"noAdult": 2, "noChild": 0, "noRoomCount": 1}
+    items = [
+        {"packageId": "P1", "startDate": "2025-01-10", **party},
+        {"packageId": "P1", "startDate": "2025-01-10", **party},
+        {"packageId": "BROKEN", "startDate": "2025-01-10", **party},
+    ]
+
+    async def run():
+        return [r async for r in pricing.price_batch(items, concurrency=2)]
+
+    results = asyncio.run(run())
+    by_package = {r["packageId"]: r for r in results if r["type"] == "result"}
+    assert by_package["P1"]["status"] == "ok" and by_package["P1"]["indexes"] == [0, 1]
+    assert by_package["BROKEN"]["status"] == "error"
+    assert results[-1] == {"type": "summary", "requested": 3, "unique": 2, "succeeded": 1, "failed": 1}
+
+    asyncio.run(run())
+    # P1 came from the per-tuple cache the second time; failures are never cached.
+    assert calls.count(("P1", "2025-01-10")) == 1
+    assert calls.count(("BROKEN", "2025-01-10")) == 2
+
+
+def test_batch_endpoint_streams_ndjson_for_a_date_range(monkeypatch):
+    install_fake_upstream(monkeypatch)
+    from main import app
+
+    client = TestClient(app)
+    response = client.post("/pricing/batch", json={"range": {
+        "packageIds": ["P1", "P2"], "fromDate": "2025-01-01", "toDate": "2025-01-07",
+        "noAdult": 2, "noChild": 1, "noRoomCount": 1,
+    }})
+    assert response.status_code == 200
+    assert response.headers["content-type"].startswith("application/x-ndjson")
+    lines = [json.loads(line) for line in response.text.splitlines()]
+    assert len([line for line in lines if line["type"] == "result"]) == 14
+    assert lines[-1]["succeeded"] == 14
+
+    too_many = client.post("/pricing/batch", json={"range": {
+        "packageIds": ["P1"], "fromDate": "2025-01-01", "toDate": "2027-01-01",
+        "noAdult": 2, "noChild": 0, "noRoomCount": 1,
+    }})
+    assert too_many.status_code == 413
+
+
+def test_open_pricing_circuit_is_an_error_not_a_missing_price(monkeypatch):
+    async def circuit_open(package_id, params):
+        raise CircuitOpenError("Circuit for POST /admin/package/{id}/pricing is open")
+
+    monkeypatch.setattr(pricing, "fetch_package_pricing", circuit_open)
+    monkeypatch.setattr(pricing, "catalog_cache", TieredCache(ttls={"pricing": 300}))
+    items = [{"packageId": "P1", "startDate": "2025-01-10", "noAdult": 2, "noChild": 0, "noRoomCount": 1}]
+
+    async def run():
+        return [r async for r in pricing.price_batch(items)]
+
+    result, summary = asyncio.run(run())
+    assert result["status"] == "error" and "pricing" not in result
+    assert summary["failed"] == 1 and summary["succeeded"] == 0
+
+    import main
+
+    monkeypatch.setattr(main.price_calendars, "warm_on_demand", False)
+    response = TestClient(main.app).get("/packages/P1/quote", params={"startDate": "2025-01-10", "noAdult": 7})
+    assert response.status_code == 502
@@ -0,0 +1,37 @@
+from src.core.prompts import TEMPLATES, PromptBuilder, TokenCounter, hotel_line, normalize, package_line
+
+PACKAGES = [
+    {"packageId": f"P{i}", "packageName": f"Goa Escape {i}", "destinationName": "Goa", "noOfDays": 4, "noOfNight": 3,
+     "startFrom": 18000 + i, "description": "Beach stay " * 40, "itinerary": [{"title": "Day 1", "description": "Baga beach"}],
+     "updatedAt": "2026-01-01", "inclusions": ["x"] * 50}
+    for i in range(10)
+]
+
+
+def test_templates_carry_no_indentation():
+    for text in TEMPLATES.values():
+        assert all(line == line.strip() for line in text.splitlines())
+    assert normalize("  a   b\n\n\n\n    c  ") == "a b\n\nc"
+
+
+def test_items_are_compact_lines_with_the_fields_answers_need():
+    line = package_line(PACKAGES[0])
+    assert line.startswith("Goa Escape 0 (ID: P0) | 4D/3N | from ₹18,000 | Goa |") and "Baga beach" in line
+    assert "updatedAt" not in line and len(line) < 250
+    hotel = hotel_line({"hotelName": "Sea View", "hotelId": "H1", "starRating": 4, "amenities": ["Pool", "Spa", "Wifi", "Gym"]})
+    assert hotel == "Sea View (ID: H1) | 4★ | Pool, Spa, Wifi"
+
+
+def test_budget_drops_the_lowest_ranked_items():
+    count = TokenCounter()
+    roomy = PromptBuilder(5000, count).build("package_search", [("", "package", PACKAGES)], query="goa")
+    assert roomy.items == 10 and roomy.dropped == 0 and roomy.tokens == count(roomy.text)
+
+    tight = PromptBuilder(roomy.tokens // 3, count).build("package_search", [("", "package", PACKAGES)],
+                                                         {"P0": "cheapest in May"}, query="goa")
+    assert 0 < tight.items < 10 and tight.items + tight.dropped == 10
+    assert "1. Goa Escape 0" in tight.text and "— cheapest in May" in tight.text and "Goa Escape 9" not in tight.text
+    assert tight.tokens <= roomy.tokens // 3
+
+    floor = PromptBuilder(1, count).build("hotel", [("", "hotel", [{"hotelName": "Only", "hotelId": "H1"}])], query="hotels")
+    assert floor.items == 1 and "Only (ID: H1)" in floor.text
@@ -0,0 +1,55 @@
+import asyncio
+
+from src.core import agent
+from src.core.matcher import QueryMatcher
+from src.core.resolver import EntityResolver
+from src.core.retrieval import Retriever
+from src.services.catalog import make_record
+
+DOCS = [
+    {"packageId": "G1", "packageName": "Goa Beach Escape", "destinationName": "Goa",
+     "noOfDays": 4, "noOfNight": 3, "startFrom": 18000},
+    {"packageId": "G2", "packageName": "Goa Party Weekend", "destinationName": "Goa",
+     "noOfDays": 3, "noOfNight": 2, "startFrom": 12000},
+    {"packageId": "A1", "packageName": "Island Hopper", "destinationName": "Andaman & Nicobar",
+     "noOfDays": 5, "noOfNight": 4, "startFrom": 30000},
+]
+retriever = Retriever([make_record(doc) for doc in DOCS])
+resolver = EntityResolver(retriever)
+matcher = QueryMatcher()
+
+
+def resolve(query, limit=3):
+    return resolver.resolve(query, matcher.match(query), limit=limit)
+
+
+def test_destinations_resolve_to_ranked_package_ids():
+    assert set(resolve("hotels in goa")) == {"G1", "G2"}
+    assert resolve("goa beach escape hotels")[0] == "G1"
+    assert resolve("goa hotels under 15000") == ["G2"]
+    assert resolve("hotels in goa", limit=1) in (["G1"], ["G2"])
+
+
+def test_partial_names_and_unknown_destinations():
+    assert resolver._destination_matches("andaman") == [2]
+    assert resolve("xyzzy hotels") == []
+
+
+def test_candidates_are_fetched_concurrently_and_deduplicated(monkeypatch):
+    calls = []
+
+    async def fake_hotels(package_id):
+        calls.append(package_id)
+        await asyncio.sleep(0.05)
+        return [{"hotelName": "Sea View", "hotelId": "H1"}, {"hotelName": f"Stay {package_id}", "hotelId": package_id}]
+
+    async def fake_retriever():
+        return retriever
+
+    monkeypatch.setattr(agent, "get_available_hotels", fake_hotels)
+    monkeypatch.setattr(agent, "package_retriever", fake_retriever)
+
+    answer = asyncio.run(agent.prepare_answer("hotels in goa"))
+    assert sorted(calls) == ["G1", "G2"]
+    assert answer.timings["fetch_hotels"] < 90
+    assert answer.prompt.count("Sea View") == 1 and "Stay G1" in answer.prompt and "Stay G2" in answer.prompt
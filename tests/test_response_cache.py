@@ -0,0 +1,38 @@
+import time
+
+from src.services.catalog import CatalogIndex, catalog
+from src.services.response_cache import ResponseCache, replay_chunks
+
+
+def test_semantic_key_ignores_wording_but_not_retrieved_items():
+    cache = ResponseCache(mode="semantic")
+    a = cache.key("m", "prompt: goa packages", "package", ["Goa"], ["P1", "P2"])
+    b = cache.key("m", "prompt: packages for goa trip", "package", ["goa"], ["P1", "P2"])
+    c = cache.key("m", "prompt: goa packages", "package", ["goa"], ["P3"])
+    assert a == b != c
+    # Follow-ups about one package are keyed by the question, not just the item
+    flights = cache.key("m", "prompt: does P1 include flights?", "package", [], ["P1"], listing=False)
+    itinerary = cache.key("m", "prompt: P1 day by day itinerary", "package", [], ["P1"], listing=False)
+    assert flights != itinerary
+    exact = ResponseCache(mode="exact")
+    assert exact.key("m", "x", "package", [], []) != exact.key("m", "y", "package", [], [])
+    assert ResponseCache(mode="off").key("m", "x", "package", [], []) is None
+
+
+def test_entries_expire_and_are_dropped_on_catalog_change(monkeypatch):
+    cache = ResponseCache(mode="exact", ttl=0.05)
+    cache.set("k", "answer")
+    assert cache.get("k") == "answer"
+    time.sleep(0.06)
+    assert cache.get("k") is None
+
+    cache.set("k", "answer")
+    monkeypatch.setattr(catalog, "index", CatalogIndex([], version=catalog.index.version + 1))
+    assert cache.get("k") is None
+    assert cache.counters["invalidations"] == 1
+
+
+def test_replay_chunks_reassemble_the_answer():
+    text = "Here are  three\npackages for Goa."
+    chunks = list(replay_chunks(text))
+    assert len(chunks) > 1 and "".join(chunks) == text
@@ -0,0 +1,37 @@
+from src.core.matcher import QueryMatcher
+from src.core.retrieval import Retriever
+from src.services.catalog import make_record
+
+DOCS = [
+    {"packageId": "G1", "packageName": "Goa Beach Honeymoon", "destinationName": "Goa",
+     "noOfDays": 4, "noOfNight": 3, "startFrom": 18000, "description": "Romantic beach stay"},
+    {"packageId": "G2", "packageName": "Goa Party Weekend", "destinationName": "Goa",
+     "noOfDays": 3, "noOfNight": 2, "startFrom": 12000, "description": "Nightlife in Baga"},
+    {"packageId": "K1", "packageName": "Kerala Backwaters", "destinationName": "Kerala",
+     "noOfDays": 5, "noOfNight": 4, "startFrom": 25000, "description": "Houseboat in Alleppey"},
+    {"packageId": "M1", "packageName": "Manali Snow Adventure", "destinationName": "Manali",
+     "noOfDays": 6, "noOfNight": 5, "startFrom": 30000, "description": "Paragliding and snow",
+     "itinerary": [{"title": "Solang valley paragliding"}]},
+]
+retriever = Retriever([make_record(doc) for doc in DOCS])
+matcher = QueryMatcher()
+
+
+def search(query):
+    return [record.package_id for record, _ in retriever.search(query, matcher.match(query))]
+
+
+def test_ranks_the_most_relevant_packages_first():
+    assert search("goa honeymoon")[0] == "G1"
+    assert search("houseboat trip")[0] == "K1"
+    assert search("solang valley")[0] == "M1"
+
+
+def test_price_and_duration_filters_apply():
+    assert search("goa packages under 15000") == ["G2"]
+    assert search("goa 3 nights") == ["G1"]
+
+
+def test_filter_only_returns_cheapest_matches():
+    entities = matcher.match("anything under 26000")
+    assert [r.package_id for r in retriever.filter_only(entities)] == ["G2", "G1", "K1"]
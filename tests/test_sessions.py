@@ -0,0 +1,84 @@
+import asyncio
+
+from src.core import agent
+from src.services.sessions import MemorySessionStore, Session, SessionManager, SQLiteSessionStore
+
+
+def test_history_window_and_summary_stay_bounded():
+    session = Session("s1")
+    for i in range(10):
+        session.record_turn(f"question {i} " + "x" * 50, "answer " * 200, {"turn": i},
+                            max_messages=4, message_chars=100, summary_chars=90)
+    assert len(session.messages) == 4
+    assert all(len(m["content"]) <= 100 for m in session.messages)
+    assert session.messages[-2]["content"].startswith("question 9")
+    assert 0 < len(session.summary) <= 90 and "question 7" in session.summary
+    assert session.context == {"turn": 9}
+
+
+def test_stores_round_trip_and_expire(tmp_path):
+    async def scenario(store):
+        manager = SessionManager(store)
+        session = await manager.load(None)
+        await manager.record(session, "goa packages", "Here are some...", {"destinations": ["goa"]})
+        again = await manager.load(session.session_id)
+        return session.session_id, again
+
+    for store in (MemorySessionStore(), SQLiteSessionStore(str(tmp_path / "sessions.sqlite3"))):
+        session_id, again = asyncio.run(scenario(store))
+        assert again.session_id == session_id
+        assert again.context == {"destinations": ["goa"]} and len(again.messages) == 2
+        asyncio.run(store.aclose())
+
+    expired = MemorySessionStore(ttl=-1)
+    asyncio.run(expired.put(Session("old")))
+    assert asyncio.run(expired.get("old")) is None
+
+
+def test_follow_up_reuses_the_referenced_package(monkeypatch):
+    looked_up = []
+
+    async def fake_hotels(package_id):
+        looked_up.append(package_id)
+        return [{"hotelName": "Sea View", "hotelId": "H1"}]
+
+    monkeypatch.setattr(agent, "get_available_hotels", fake_hotels)
+    context = {"destinations": ["goa"], "package_ids": ["P1", "P2", "P3"], "selected_package": "P1"}
+    history = [{"role": "user", "content": "goa packages"}, {"role": "assistant", "content": "1. Goa Escape (ID: P1) ..."}]
+
+    answer = asyncio.run(agent.prepare_answer("what about hotels for the second one?", history, "", context))
+    assert looked_up == ["P2"]
+    assert answer.intent == "hotel" and answer.context["selected_package"] == "P2"
+    assert "Conversation so far" in answer.prompt and "goa packages" in answer.prompt
+    assert answer.context["destinations"] == ["goa"]
+
+    asyncio.run(agent.prepare_answer("and hotels there for 2 adults?", history, "", answer.context))
+    assert looked_up[-1] == "P2"
+
+
+def test_ordinary_questions_are_not_references():
+    context = {"destinations": ["goa"], "package_ids": ["P1", "P2", "P3"], "selected_package": "P1"}
+    for question in ("is it good to visit kerala in june", "what is it like in goa", "show me no 5 star hotels"):
+        assert agent.referenced_package(question, context) is None
+    assert agent.referenced_package("hotels for option 3", context) == "P3"
+    assert agent.referenced_package("no. 2 please", context) == "P2"
+
+
+def test_reference_is_ignored_when_the_user_moves_to_a_new_destination(monkeypatch):
+    class NoCandidates:
+        def resolve(self, query, entities, limit):
+            return []
+
+    async def fake_retriever():
+        return None
+
+    monkeypatch.setattr(agent, "package_retriever", fake_retriever)
+    monkeypatch.setattr(agent, "get_resolver", lambda retriever: NoCandidates())
+    context = {"destinations": ["goa"], "package_ids": ["P1", "P2", "P3"], "selected_package": "P1"}
+
+    def understand(question):
+        state = agent.AgentState(messages=[{"role": "user", "content": question}], context=context)
+        return asyncio.run(agent.understand(state))
+
+    assert understand("hotels for the second one in kerala")["package_id"] is None
+    assert understand("hotels for the second one in goa")["package_id"] == "P2"
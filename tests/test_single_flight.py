@@ -0,0 +1,97 @@
+import asyncio
+
+import pytest
+
+from src.services.single_flight import SingleFlight
+
+
+def test_concurrent_callers_share_one_call():
+    flight = SingleFlight("test")
+    calls = []
+
+    async def fetch():
+        calls.append(1)
+        await asyncio.sleep(0.01)
+        return {"packageId": "P1"}
+
+    async def scenario():
+        return await asyncio.gather(*(flight.do("P1", fetch) for _ in range(5)))
+
+    results = asyncio.run(scenario())
+    assert results == [{"packageId": "P1"}] * 5
+    assert len(calls) == 1
+    stats = flight.stats()
+    assert stats["calls"] == 1 and stats["coalesced"] == 4
+    assert stats["top_keys"]["P1"]["coalesced"] == 4
+
+
+def test_errors_reach_every_waiter_and_are_not_cached():
+    flight = SingleFlight("test")
+    attempts = []
+
+    async def failing():
+        attempts.append(1)
+        await asyncio.sleep(0.01)
+        if len(attempts) == 1:
+            raise RuntimeError("upstream down")
+        return "ok"
+
+    async def scenario():
+        first = await asyncio.gather(*(flight.do("k", failing) for _ in range(3)), return_exceptions=True)
+        second = await flight.do("k", failing)
+        return first, second
+
+    first, second = asyncio.run(scenario())
+    assert all(isinstance(r, RuntimeError) for r in first)
+    assert second == "ok" and len(attempts) == 2
+    assert flight.totals["errors"] == 1
+
+
+def test_shared_call_survives_one_cancelled_waiter_but_not_all():
+    flight = SingleFlight("test")
+    started = []
+
+    async def slow():
+        started.append(1)
+        await asyncio.sleep(0.05)
+        return "done"
+
+    async def scenario():
+        a = asyncio.ensure_future(flight.do("k", slow))
+        b = asyncio.ensure_future(flight.do("k", slow))
+        await asyncio.sleep(0.01)
+        a.cancel()
+        result = await b
+
+        c = asyncio.ensure_future(flight.do("k2", slow))
+        await asyncio.sleep(0.01)
+        c.cancel()
+        with pytest.raises(asyncio.CancelledError):
+            await c
+        await asyncio.sleep(0)
+        return result
+
+    assert asyncio.run(scenario()) == "done"
+    assert flight.in_flight() == 0
+
+
+def test_stream_is_broadcast_to_late_joiners():
+    flight = SingleFlight("test")
+    produced = []
+
+    async def chunks():
+        for chunk in ["Hello", " ", "Goa"]:
+            produced.append(chunk)
+            await asyncio.sleep(0.01)
+            yield chunk
+
+    async def consume(delay):
+        await asyncio.sleep(delay)
+        return [c async for c in flight.stream("k", chunks)]
+
+    async def scenario():
+        return await asyncio.gather(consume(0), consume(0.015))
+
+    first, late = asyncio.run(scenario())
+    assert first == late == ["Hello", " ", "Goa"]
+    assert produced == ["Hello", " ", "Goa"]
@@ -0,0 +1,99 @@
+import asyncio
+import base64
+import json
+import time
+
+import httpx
+
+from src.services import tripxplo_client
+from src.services.token_manager import TokenManager, decode_expiry
+
+
+def make_jwt(exp: float) -> str:
+    payload = base64.urlsafe_b64encode(json.dumps({"exp": exp}).encode()).decode().rstrip("=")
+    return f"header.{payload}.signature"
+
+
+def install_transport(monkeypatch, handler):
+    client = httpx.AsyncClient(base_url="http://tripxplo.test", transport=httpx.MockTransport(handler))
+    monkeypatch.setattr(tripxplo_client, "_client", client)
+    manager = TokenManager("user@example.com", "secret")
+    monkeypatch.setattr(tripxplo_client, "token_manager", manager)
+    monkeypatch.setattr("src.services.token_manager.token_manager", manager)
+    return manager
+
+
+def test_decode_expiry_reads_jwt_exp_claim():
+    assert decode_expiry(make_jwt(1700000000)) == 1700000000
+    assert decode_expiry("not-a-jwt") is None
+
+
+def test_concurrent_cold_start_logs_in_once(monkeypatch):
+    logins = 0
+
+    async def handler(request: httpx.Request):
+        nonlocal logins
+        if request.url.path == "/admin/auth/login":
+            logins += 1
+            await asyncio.sleep(0.01)
+            return httpx.Response(200, json={"accessToken": make_jwt(time.time() + 3600)})
+        return httpx.Response(200, json={"result": {"docs": []}})
+
+    manager = install_transport(monkeypatch, handler)
+
+    async def burst():
+        tokens = await asyncio.gather(*(manager.get_token() for _ in range(50)))
+        await manager.aclose()
+        return tokens
+
+    tokens = asyncio.run(burst())
+    assert len(set(tokens)) == 1
+    assert logins == 1
+    assert manager.counters["logins"] == 1
+
+
+def test_401_refreshes_once_and_replays(monkeypatch):
+    issued = []
+
+    def handler(request: httpx.Request):
+        if request.url.path == "/admin/auth/login":
+            issued.append(make_jwt(time.time() + 3600 + len(issued)))
+            return httpx.Response(200, json={"accessToken": issued[-1]})
+        if request.headers["Authorization"] != f"Bearer {issued[-1]}" or len(issued) == 1:
+            return httpx.Response(401)
+        return httpx.Response(200, json={"result": {"docs": [{"packageId": "P1"}]}})
+
+    manager = install_transport(monkeypatch, handler)
+
+    async def fetch():
+        packages = await tripxplo_client.get_packages()
+        await manager.aclose()
+        return packages
+
+    assert asyncio.run(fetch()) == [{"packageId": "P1"}]
+    assert manager.counters["logins"] == 2
+    assert manager.counters["refreshes"] == 1
+    assert manager.counters["forced_refreshes"] == 1
+
+
+def test_scheduled_refresh_logs_in_and_schedules_the_next_without_cancelling_itself(monkeypatch):
+    logins = 0
+
+    async def handler(request: httpx.Request):
+        nonlocal logins
+        logins += 1
+        return httpx.Response(200, json={"accessToken": "opaque", "expiresIn": 0.2})  # refresh due in 0.1s
+
+    manager = install_transport(monkeypatch, handler)
+
+    async def scenario():
+        await manager.get_token()
+        first = manager._refresh_task
+        await asyncio.wait_for(first, 1)
+        second = manager._refresh_task
+        await manager.aclose()
+        return first, second
+
+    first, second = asyncio.run(scenario())
+    assert not first.cancelled() and second is not None and second is not first
+    assert logins >= 2 and manager.counters["background_refreshes"] >= 1
@@ -0,0 +1,50 @@
+import asyncio
+
+import pytest
+
+from src.config import Settings
+from src.services.warmup import Warmup
+
+
+def test_ready_after_all_steps_even_if_one_fails():
+    async def ok():
+        await asyncio.sleep(0.01)
+
+    async def broken():
+        raise RuntimeError("login refused")
+
+    warmup = Warmup({"token": broken, "catalog": ok})
+
+    async def scenario():
+        assert not warmup.ready
+        await warmup.run()
+
+    asyncio.run(scenario())
+    assert warmup.ready
+    assert warmup.status == {"token": "failed: login refused", "catalog": "ok"}
+
+
+def test_timeout_marks_slow_steps_and_passes_readiness():
+    async def slow():
+        await asyncio.sleep(1)
+
+    warmup = Warmup({"catalog": slow}, timeout=0.02)
+
+    async def scenario():
+        await warmup.run()
+        await warmup.stop()
+
+    asyncio.run(scenario())
+    assert warmup.ready and warmup.status == {"catalog": "timed out"}
+
+
+def test_disabled_warmup_is_ready_immediately():
+    assert Warmup({}, enabled=False).ready
+
+
+def test_missing_credentials_raise_at_startup_not_import():
+    settings = Settings()
+    settings.OPENROUTER_API_KEY = None
+    assert settings.missing() == ["OPENROUTER_API_KEY"]
+    with pytest.raises(ValueError):
+        settings.require()
@@ -1,12 +1,12 @@
 import os
 import requests
-import logging
 from dotenv import load_dotenv
 
 load_dotenv(os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), ".env.local"))
 
-logging.basicConfig(level=logging.INFO, format='%(levelname)s: %(message)s')
-logger = logging.getLogger(__name__)
+from src.utils.logger import setup_logger  # noqa: E402  (after .env.local is loaded)
+
+logger = setup_logger(__name__)
 
 API_BASE = "https://api.tripxplo.com/v1/api"
 EMAIL = os.getenv("TRIPXPLO_EMAIL")
@@ -30,10 +30,10 @@ def get_token():
         _token_cache = response.json().get("accessToken")
         if not _token_cache:
             raise ValueError("No accessToken in login response")
-        logger.info(f"✅ Logged in successfully. JWT Token:\n{_token_cache}\n")
+        logger.info("✅ Logged in successfully")
         return _token_cache
     except Exception as e:
-        logger.error(f"Token fetch error: {e}")
+        logger.error("Token fetch error: %s", e)
         _token_cache = None
         raise
 
@@ -48,10 +48,10 @@ def get_packages():
         )
         response.raise_for_status()
         packages = response.json().get("result", {}).get("docs", [])
-        logger.info(f"Fetched {len(packages)} packages")
+        logger.info("Fetched %s packages", len(packages))
         return packages
     except Exception as e:
-        logger.error(f"Error fetching packages: {e}")
+        logger.error("Error fetching packages: %s", e)
         return []
 
 def get_package_details(package_id: str):
@@ -63,10 +63,10 @@ def get_package_details(package_id: str):
         )
         response.raise_for_status()
         details = response.json().get("result", {})
-        logger.info(f"Fetched details for package {package_id}")
+        logger.info("Fetched details for package %s", package_id)
         return details
     except Exception as e:
-        logger.error(f"Error fetching package details: {e}")
+        logger.error("Error fetching package details: %s", e)
         return {}
 
 def get_package_pricing(package_id: str, params: dict):
@@ -79,10 +79,10 @@ def get_package_pricing(package_id: str, params: dict):
         )
         response.raise_for_status()
         pricing = response.json().get("result", {})
-        logger.info(f"Fetched pricing for package {package_id} with params {params}")
+        logger.info("Fetched pricing for package %s with params %s", package_id, params)
         return pricing
     except Exception as e:
-        logger.error(f"Error fetching package pricing: {e}")
+        logger.error("Error fetching package pricing: %s", e)
         return {}
 
 def get_available_hotels(package_id: str):
@@ -94,10 +94,10 @@ def get_available_hotels(package_id: str):
         )
         response.raise_for_status()
         hotels = response.json().get("result", [])
-        logger.info(f"Fetched {len(hotels)} hotels for package {package_id}")
+        logger.info("Fetched %s hotels for package %s", len(hotels), package_id)
         return hotels
     except Exception as e:
-        logger.error(f"Error fetching hotels: {e}")
+        logger.error("Error fetching hotels: %s", e)
         return []
 
 def get_available_vehicles(package_id: str):
@@ -109,10 +109,10 @@ def get_available_vehicles(package_id: str):
         )
         response.raise_for_status()
         vehicles = response.json().get("result", [])
-        logger.info(f"Fetched {len(vehicles)} vehicles for package {package_id}")
+        logger.info("Fetched %s vehicles for package %s", len(vehicles), package_id)
         return vehicles
     except Exception as e:
-        logger.error(f"Error fetching vehicles: {e}")
+        logger.error("Error fetching vehicles: %s", e)
         return []
 
 def get_available_activities(package_id: str):
@@ -124,10 +124,10 @@ def get_available_activities(package_id: str):
         )
         response.raise_for_status()
         activities = response.json().get("result", [])
-        logger.info(f"Fetched {len(activities)} activities for package {package_id}")
+        logger.info("Fetched %s activities for package %s", len(activities), package_id)
         return activities
     except Exception as e:
-        logger.error(f"Error fetching activities: {e}")
+        logger.error("Error fetching activities: %s", e)
         return []
 
 def get_interests():
@@ -139,10 +139,10 @@ def get_interests():
         )
         response.raise_for_status()
         interests = response.json().get("result", [])
-        logger.info(f"Fetched {len(interests)} interests")
+        logger.info("Fetched %s interests", len(interests))
         return interests
     except Exception as e:
-        logger.error(f"Error fetching interests: {e}")
+        logger.error("Error fetching interests: %s", e)
         return []
 
 def search_destinations(search: str = ""):
@@ -158,8 +158,8 @@ def search_destinations(search: str = ""):
         )
         response.raise_for_status()
         destinations = response.json().get("result", [])
-        logger.info(f"Fetched {len(destinations)} destinations with search='{search}'")
+        logger.info("Fetched %s destinations with search='%s'", len(destinations), search)
         return destinations
     except Exception as e:
-        logger.error(f"Error searching destinations: {e}")
+        logger.error("Error searching destinations: %s", e)
         return []